@@ -0,0 +1,175 @@
+# admissao.py
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional
+
+# Classes de prioridade da fila do LLM (menor valor = atendida primeiro)
+PRIORIDADE_ENTREVISTA = 0   # turno de uma entrevista em andamento
+PRIORIDADE_NOVA_ENTREVISTA = 1   # primeira fala do agente, logo depois de o candidato se identificar
+
+MENSAGEM_AGUARDE = ("Estamos com muitos atendimentos neste momento. Por favor, aguarde alguns segundos "
+                    "e envie sua mensagem novamente.")
+
+
+class RequisicaoRejeitada(Exception):
+    """A requisição não foi admitida; 'retry_after_s' sugere quando o cliente deve tentar de novo."""
+    def __init__(self, motivo: str, retry_after_s: int):
+        super().__init__(f"requisição rejeitada ({motivo})")
+        self.motivo = motivo
+        self.retry_after_s = retry_after_s
+
+
+class LimitadorTaxa:
+    """
+    Token bucket por cliente: 'taxa_por_s' requisições por segundo em regime, com rajadas de até
+    'rajada'. Guarda no máximo 'max_clientes' baldes (os menos usados recentemente são descartados,
+    o que equivale a devolver o balde cheio a um cliente que ficou muito tempo parado).
+    """
+    def __init__(self, taxa_por_s: float, rajada: int, max_clientes: int = 10_000):
+        self.taxa_por_s = taxa_por_s
+        self.rajada = max(rajada, 1)
+        self.max_clientes = max_clientes
+        self._baldes = OrderedDict()  # cliente -> (fichas, instante da última atualização)
+
+    def permitir(self, cliente: str) -> Optional[float]:
+        """None se a requisição pode seguir; senão, os segundos até haver uma ficha livre."""
+        agora = time.monotonic()
+        fichas, ultimo = self._baldes.pop(cliente, (self.rajada, agora))
+        fichas = min(self.rajada, fichas + (agora - ultimo) * self.taxa_por_s)
+        espera = None
+        if fichas >= 1:
+            fichas -= 1
+        else:
+            espera = (1 - fichas) / self.taxa_por_s
+        self._baldes[cliente] = (fichas, agora)
+        if len(self._baldes) > self.max_clientes:
+            self._baldes.popitem(last=False)
+        return espera
+
+
+class ControleAdmissao:
+    """
+    Admissão das requisições que chamam o LLM, com fila de espera limitada e prioridades.
+
+    - Até 'max_concorrencia' chamadas ao LLM em andamento; as demais esperam numa fila de
+      prioridade (entrevistas em andamento antes das que estão começando, por ordem de chegada).
+    - A fila comporta 'max_fila' requisições. Entrevistas novas e sessões novas (busca de vaga)
+      só entram enquanto a fila está abaixo de 'fracao_fila_novas' da capacidade: sob pressão,
+      o trabalho novo é recusado primeiro e a capacidade fica com quem já está sendo entrevistado.
+    - Quem espera mais que 'espera_max_s' desiste; recusas levantam RequisicaoRejeitada com um
+      Retry-After estimado pela duração média recente das chamadas.
+    - Com 'taxa_por_cliente' > 0, cada cliente (cabeçalho X-Client-Id ou IP) tem um token bucket.
+
+    Os parâmetros vêm de LLM_MAX_CONCORRENCIA, ADMISSAO_FILA_MAX, ADMISSAO_FRACAO_NOVAS,
+    ADMISSAO_ESPERA_MAX_S, ADMISSAO_TAXA_CLIENTE e ADMISSAO_RAJADA_CLIENTE.
+    """
+    def __init__(self, max_concorrencia: Optional[int] = None, max_fila: Optional[int] = None,
+                 fracao_fila_novas: Optional[float] = None, espera_max_s: Optional[float] = None,
+                 taxa_por_cliente: Optional[float] = None, rajada_por_cliente: Optional[int] = None):
+        self.max_concorrencia = max_concorrencia or int(os.environ.get('LLM_MAX_CONCORRENCIA', '16'))
+        self.max_fila = int(os.environ.get('ADMISSAO_FILA_MAX', '64')) if max_fila is None else max_fila
+        fracao = float(os.environ.get('ADMISSAO_FRACAO_NOVAS', '0.5')) if fracao_fila_novas is None else fracao_fila_novas
+        self.limite_fila_novas = int(self.max_fila * fracao)
+        self.espera_max_s = espera_max_s or float(os.environ.get('ADMISSAO_ESPERA_MAX_S', '20'))
+        taxa = float(os.environ.get('ADMISSAO_TAXA_CLIENTE', '0')) if taxa_por_cliente is None else taxa_por_cliente
+        rajada = rajada_por_cliente or int(os.environ.get('ADMISSAO_RAJADA_CLIENTE', '20'))
+        self.limitador = LimitadorTaxa(taxa, rajada) if taxa > 0 else None
+
+        self.em_uso = 0
+        self._fila = []  # heap de (prioridade, ordem de chegada, future)
+        self._sequencia = itertools.count()
+        # Média móvel (s) do tempo de cada chamada com a vaga ocupada, usada no Retry-After
+        self._duracao_media_s = 1.0
+        self.contadores = {'admitidas': 0, 'enfileiradas': 0, 'rejeitadas_fila_cheia': 0, 'rejeitadas_novas': 0,
+                           'rejeitadas_tempo_espera': 0, 'rejeitadas_limite_cliente': 0}
+
+    @property
+    def tamanho_fila(self) -> int:
+        return sum(1 for _, _, futuro in self._fila if not futuro.done())
+
+    def retry_after_s(self) -> int:
+        """Estimativa (s) de quando a fila terá andado o suficiente para a requisição ser admitida."""
+        rodadas = (self.tamanho_fila + 1) / self.max_concorrencia
+        return max(1, math.ceil(rodadas * self._duracao_media_s))
+
+    def _rejeitar(self, motivo: str):
+        self.contadores[f'rejeitadas_{motivo}'] += 1
+        raise RequisicaoRejeitada(motivo, self.retry_after_s())
+
+    def verificar_cliente(self, cliente: str):
+        """Aplica o limite de taxa do cliente (se configurado)."""
+        if self.limitador is None:
+            return
+        espera = self.limitador.permitir(cliente)
+        if espera is not None:
+            self.contadores['rejeitadas_limite_cliente'] += 1
+            raise RequisicaoRejeitada('limite_cliente', max(1, math.ceil(espera)))
+
+    def verificar_nova_sessao(self):
+        """Sessões novas (busca de vaga) são recusadas quando a fila do LLM passa da fração reservada a trabalho novo."""
+        if self.tamanho_fila >= max(self.limite_fila_novas, 1) and self.em_uso >= self.max_concorrencia:
+            self._rejeitar('novas')
+
+    def _liberar(self):
+        # A vaga passa direto para o próximo da fila (sem voltar ao contador), na ordem de prioridade
+        while self._fila:
+            _, _, futuro = heapq.heappop(self._fila)
+            if not futuro.done():
+                futuro.set_result(None)
+                return
+        self.em_uso -= 1
+
+    async def _adquirir(self, prioridade: int):
+        if self.em_uso < self.max_concorrencia and not self.tamanho_fila:
+            self.em_uso += 1
+            return
+        fila = self.tamanho_fila
+        if fila >= self.max_fila:
+            self._rejeitar('fila_cheia')
+        if prioridade != PRIORIDADE_ENTREVISTA and fila >= self.limite_fila_novas:
+            self._rejeitar('novas')
+        futuro = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._fila, (prioridade, next(self._sequencia), futuro))
+        self.contadores['enfileiradas'] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(futuro), self.espera_max_s)
+        except asyncio.TimeoutError:
+            if futuro.done():
+                return  # a vaga chegou junto com o timeout: fica com ela
+            futuro.cancel()
+            self._rejeitar('tempo_espera')
+        except asyncio.CancelledError:
+            # Cliente desconectou: se a vaga já tinha sido entregue, repassa ao próximo
+            if futuro.done() and not futuro.cancelled():
+                self._liberar()
+            else:
+                futuro.cancel()
+            raise
+
+    @asynccontextmanager
+    async def vaga(self, prioridade: int = PRIORIDADE_ENTREVISTA):
+        """Ocupa uma das 'max_concorrencia' vagas do LLM enquanto o bloco roda (ou levanta RequisicaoRejeitada)."""
+        await self._adquirir(prioridade)
+        self.contadores['admitidas'] += 1
+        inicio = time.monotonic()
+        try:
+            yield
+        finally:
+            self._duracao_media_s = 0.9 * self._duracao_media_s + 0.1 * (time.monotonic() - inicio)
+            self._liberar()
+
+    def metricas(self) -> dict:
+        por_prioridade = {PRIORIDADE_ENTREVISTA: 0, PRIORIDADE_NOVA_ENTREVISTA: 0}
+        for prioridade, _, futuro in self._fila:
+            if not futuro.done():
+                por_prioridade[prioridade] = por_prioridade.get(prioridade, 0) + 1
+        return {**self.contadores, 'em_uso': self.em_uso, 'max_concorrencia': self.max_concorrencia,
+                'fila': sum(por_prioridade.values()), 'fila_entrevistas': por_prioridade[PRIORIDADE_ENTREVISTA],
+                'fila_novas_entrevistas': por_prioridade[PRIORIDADE_NOVA_ENTREVISTA], 'max_fila': self.max_fila,
+                'duracao_media_ms': round(self._duracao_media_s * 1000, 1)}
@@ -1,7 +1,64 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import re
+import threading
 import pandas as pd
+from collections.abc import Mapping
 from llama_index.llms.groq import Groq
 from llama_index.core.llms import ChatMessage
-from functools import lru_cache
+from cache_consultas import cache_consultas
+from competencias import MatrizCompetencias
+from dados_compartilhados import abrir_tabela_arrow, materializar_arrow
+from historico import GerenciadorHistorico, estimar_tokens
+from indices import IndiceInvertido, IndiceNomes, indice_unico, normalizar_texto, tokenizar
+from llm_resiliente import LLMIndisponivel
+
+# Similaridade mínima (0 a 1) para considerar que o nome digitado é de um prospect da vaga
+LIMIAR_SIMILARIDADE_NOME = 0.6
+
+# Formato do snapshot gerado por 'compilar_dataset.py' (muda quando a estrutura dos índices muda)
+FORMATO_SNAPSHOT = 1
+ARQUIVO_SNAPSHOT = 'snapshot.json'
+ARQUIVO_INDICES = 'indices.pkl'
+
+def uso_de_tokens(response):
+    """(prompt, resposta) informados pelo provedor em response.raw['usage'], ou None se não houver."""
+    raw = getattr(response, 'raw', None)
+    uso = raw.get('usage') if isinstance(raw, Mapping) else getattr(raw, 'usage', None)
+    if isinstance(uso, Mapping):
+        prompt, resposta = uso.get('prompt_tokens'), uso.get('completion_tokens')
+    else:
+        prompt, resposta = getattr(uso, 'prompt_tokens', None), getattr(uso, 'completion_tokens', None)
+    return (prompt, resposta) if isinstance(prompt, int) and isinstance(resposta, int) else None
+
+# Resposta do agente quando o LLM está fora do ar ou não respondeu dentro do prazo
+MENSAGEM_LLM_INDISPONIVEL = ("Desculpe, estou com instabilidade para responder agora. "
+                             "Pode repetir sua última mensagem em alguns instantes?")
+
+# Marcadores dos dados do candidato nas saudações em cache (ver saudacoes.py)
+MARCADOR_NOME = "{nome_candidato}"
+MARCADOR_PRIMEIRO_NOME = "{primeiro_nome}"
+MARCADOR_CONHECIMENTOS = "{conhecimentos_tecnicos}"
+
+def versao_prompt(prompt: str) -> str:
+    """Carimbo curto do prompt de sistema: qualquer mudança no texto do prompt muda a chave da saudação."""
+    return hashlib.sha256(prompt.encode()).hexdigest()[:12]
+
+def _padrao_termo(termo: str) -> str:
+    # Palavra inteira (funciona também para termos que começam ou terminam com pontuação)
+    return rf"(?<!\w){re.escape(termo)}(?!\w)"
+
+def versao_dos_arquivos(*caminhos) -> str:
+    """Carimbo curto de versão derivado do tamanho e da data de modificação dos arquivos."""
+    digest = hashlib.sha256()
+    for caminho in caminhos:
+        info = os.stat(caminho)
+        digest.update(f"{os.path.basename(str(caminho))}:{info.st_size}:{info.st_mtime_ns};".encode())
+    return digest.hexdigest()[:12]
 
 def otimizar_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """Converte colunas do tipo 'object' para 'category' para economizar memória."""
@@ -12,72 +69,385 @@ def otimizar_dataframe(df: pd.DataFrame) -> pd.DataFrame:
             df[col] = df[col].astype('category')
     return df
 
+def linhas_por_posicao(df: pd.DataFrame, posicoes, colunas, **extras) -> pd.DataFrame:
+    """
+    Poucas linhas (ex.: um top-k) de algumas colunas, lidas célula a célula com 'iat', mais as
+    colunas calculadas em 'extras'. Em tabelas grandes com colunas de texto Arrow (vários chunks),
+    'iloc' custa milissegundos mesmo para 10 linhas; 'iat' custa microssegundos por célula.
+    """
+    series = [df[col] for col in colunas]
+    dados = {col: [serie.iat[p] for p in posicoes] for col, serie in zip(colunas, series)}
+    return pd.DataFrame({**dados, **extras}, index=posicoes)
+
+class Dossie(Mapping):
+    """
+    Visão somente-leitura de uma vaga, um candidato e (se houver) o prospect que os liga.
+    Os valores são lidos diretamente das linhas dos DataFrames, sem copiar nem mesclar dicionários.
+    Em chaves repetidas vale a precedência prospect > applicant > vaga.
+    """
+    __slots__ = ('_fontes', '_colunas')
+
+    def __init__(self, *fontes):
+        # Cada fonte é um par (DataFrame, posição); a ordem define a precedência
+        self._fontes = [(df, posicao) for df, posicao in fontes if posicao is not None]
+        self._colunas = None
+
+    def __getitem__(self, chave):
+        for df, posicao in self._fontes:
+            if chave in df.columns:
+                return df[chave].iat[posicao]
+        raise KeyError(chave)
+
+    def __iter__(self):
+        if self._colunas is None:
+            self._colunas = list(dict.fromkeys(col for df, _ in self._fontes for col in df.columns))
+        return iter(self._colunas)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def to_dict(self):
+        return dict(self.items())
+
 class BaseDeDados:
     """
     Carrega os dados PRÉ-PROCESSADOS (Parquet) e serve como a interface
     de conhecimento para o agente.
     """
-    def __init__(self, vagas_path, prospects_path, applicants_path):
-        print("Carregando base de dados pré-processada...")
-        # Carrega os arquivos Parquet
-        df_vagas_raw = pd.read_parquet(vagas_path)
-        df_prospects_raw = pd.read_parquet(prospects_path)
-        df_applicants_raw = pd.read_parquet(applicants_path)
-        
-        print("Otimizando uso de memória dos DataFrames...")
-        # Otimiza cada DataFrame para economizar RAM
-        self.df_vagas = otimizar_dataframe(df_vagas_raw)
-        self.df_prospects = otimizar_dataframe(df_prospects_raw)
-        self.df_applicants = otimizar_dataframe(df_applicants_raw)
-        
+    # Cache de resultados compartilhado por todas as bases do processo (ver cache_consultas.py)
+    cache = cache_consultas
+    # Layout das tabelas carregadas ('parquet', 'arrow' ou 'snapshot-v<formato>'): a mesma versão dos
+    # dados pode ter outra ordem de linhas em outro layout (o snapshot ordena pelas chaves)
+    layout = 'parquet'
+    # Serializa a construção preguiçosa da matriz de competências
+    _lock_competencias = threading.Lock()
+
+    def __init__(self, vagas_path, prospects_path, applicants_path, stop_words=None, pasta_arrow=None):
+        if pasta_arrow:
+            # Modo compartilhado: as tabelas são materializadas uma vez como Arrow IPC e cada
+            # worker só mapeia os arquivos na memória (zero cópia, somente as colunas usadas)
+            print(f"Anexando tabelas Arrow compartilhadas em '{pasta_arrow}'...")
+            caminhos = materializar_arrow({'vagas': vagas_path, 'prospects': prospects_path, 'applicants': applicants_path}, pasta_arrow)
+            self.df_vagas = abrir_tabela_arrow(caminhos['vagas'])
+            self.df_prospects = abrir_tabela_arrow(caminhos['prospects'])
+            self.df_applicants = abrir_tabela_arrow(caminhos['applicants'])
+        else:
+            print("Carregando base de dados pré-processada...")
+            # Carrega os arquivos Parquet
+            df_vagas_raw = pd.read_parquet(vagas_path)
+            df_prospects_raw = pd.read_parquet(prospects_path)
+            df_applicants_raw = pd.read_parquet(applicants_path)
+
+            print("Otimizando uso de memória dos DataFrames...")
+            # Otimiza cada DataFrame para economizar RAM
+            self.df_vagas = otimizar_dataframe(df_vagas_raw)
+            self.df_prospects = otimizar_dataframe(df_prospects_raw)
+            self.df_applicants = otimizar_dataframe(df_applicants_raw)
+
+        self.versao = versao_dos_arquivos(vagas_path, prospects_path, applicants_path)
+        self.layout = 'arrow' if pasta_arrow else 'parquet'
+        self.construir_indices(stop_words)
+        self._registrar_uso_memoria()
+
+    @classmethod
+    def de_snapshot(cls, pasta):
+        """
+        Carrega um snapshot gerado por 'compilar_dataset.py': tabelas já otimizadas (categorias
+        fixas no schema, ordenadas pelas chaves) e índices serializados, sem reotimizar nem reindexar.
+        O arquivo de índices é um pickle gerado localmente: carregue apenas snapshots confiáveis.
+        """
+        with open(os.path.join(pasta, ARQUIVO_SNAPSHOT), 'r', encoding='utf-8') as f:
+            metadados = json.load(f)
+        if metadados.get('formato') != FORMATO_SNAPSHOT:
+            raise ValueError(f"Snapshot em '{pasta}' tem formato {metadados.get('formato')}, esperado {FORMATO_SNAPSHOT}. Recompile com 'python compilar_dataset.py'.")
+
+        print(f"Carregando snapshot compilado '{metadados['versao']}' de '{pasta}'...")
+        db = cls.__new__(cls)
+        db.df_vagas = pd.read_parquet(os.path.join(pasta, 'vagas.parquet'))
+        db.df_prospects = pd.read_parquet(os.path.join(pasta, 'prospects.parquet'))
+        db.df_applicants = pd.read_parquet(os.path.join(pasta, 'applicants.parquet'))
+        with open(os.path.join(pasta, ARQUIVO_INDICES), 'rb') as f:
+            for nome, indice in pickle.load(f).items():
+                setattr(db, nome, indice)
+        db.versao = metadados['versao']
+        db.layout = f"snapshot-v{FORMATO_SNAPSHOT}"
+        db._registrar_uso_memoria()
+        return db
+
+    @property
+    def versao_cache(self) -> str:
+        """Versão das entradas no cache de consultas: as posições de linha dependem dos dados e do layout."""
+        return f"{self.versao}/{self.layout}"
+
+    def construir_indices(self, stop_words=None):
+        """Constrói os índices de busca a partir das tabelas carregadas."""
+        print("Construindo índice de busca de vagas...")
+        # Índice invertido dos títulos: evita varrer df_vagas a cada busca.
+        # 'stop_words=None' usa a lista padrão (STOP_WORDS_PADRAO).
+        self.indice_vagas = IndiceInvertido(self.df_vagas['titulo_vaga'].tolist(), stop_words=stop_words)
+        # Agrupamento id_vaga -> prospects com os nomes já normalizados: a busca por nome
+        # percorre só os prospects da vaga, e não a tabela inteira.
+        self.indice_prospects = IndiceNomes(self.df_prospects['id_vaga'].tolist(), self.df_prospects['nome'].tolist())
+        # Índices de chave primária (chave -> posição) para montar o dossiê sem varrer as tabelas
+        self.pos_vaga = indice_unico(self.df_vagas['id_vaga'].tolist())
+        self.pos_prospect = indice_unico(self.df_prospects['id_vaga'].tolist(), self.df_prospects['codigo'].tolist())
+        self.pos_applicant = indice_unico(self.df_applicants['id_candidato'].tolist())
+
+    def exportar_indices(self) -> dict:
+        """Índices de busca por nome de atributo, no formato serializado pelo snapshot."""
+        return {nome: getattr(self, nome) for nome in ('indice_vagas', 'indice_prospects', 'pos_vaga', 'pos_prospect', 'pos_applicant')}
+
+    def _registrar_uso_memoria(self):
         print("Base de Dados pronta para uso.")
         # Loga o uso de memória para diagnóstico (útil para ver o resultado da otimização)
         print(f"Uso de memória - Vagas: {self.df_vagas.memory_usage(deep=True).sum() / 1e6:.2f} MB")
         print(f"Uso de memória - Prospects: {self.df_prospects.memory_usage(deep=True).sum() / 1e6:.2f} MB")
         print(f"Uso de memória - Applicants: {self.df_applicants.memory_usage(deep=True).sum() / 1e6:.2f} MB")
 
-    @lru_cache(maxsize=128)
     def buscar_vaga_por_texto(self, texto_busca):
-        stop_words = ['vaga', 'de', 'para', 'a', 'o']
-        keywords = [word for word in texto_busca.lower().split() if word not in stop_words]
-        if not keywords: return pd.DataFrame()
-        mask = pd.Series([True] * len(self.df_vagas))
-        for keyword in keywords:
-            mask &= self.df_vagas['titulo_vaga'].str.contains(keyword, case=False, na=False)
-        return self.df_vagas[mask]
+        """Retorna as vagas cujo título contém todas as palavras da busca, da mais para a menos relevante."""
+        # Variações de caixa, acento e espaços da mesma busca compartilham a entrada do cache
+        chave = ('vagas', tuple(self.indice_vagas.tokens_consulta(texto_busca)))
+        posicoes = self.cache.obter(self.versao_cache, chave, lambda: self.indice_vagas.buscar(texto_busca))
+        return self.df_vagas.iloc[posicoes]
+
+    def _buscar_prospects(self, nome_candidato, id_vaga, limiar):
+        """[(posição, similaridade)] dos prospects da vaga parecidos com o nome, via cache."""
+        chave = ('candidatos', id_vaga, ' '.join(tokenizar(nome_candidato)), limiar)
+        return self.cache.obter(self.versao_cache, chave,
+                                lambda: self.indice_prospects.buscar(nome_candidato, id_vaga, limiar=limiar))
+
+    def ranquear_candidatos_em_vaga(self, nome_candidato, id_vaga, limiar=LIMIAR_SIMILARIDADE_NOME, limite=5):
+        """Prospects da vaga parecidos com o nome informado, com a coluna 'similaridade' (0 a 1), do mais ao menos parecido."""
+        resultados = self._buscar_prospects(nome_candidato, id_vaga, limiar)[:limite]
+        candidatos = self.df_prospects.iloc[[posicao for posicao, _ in resultados]].copy()
+        candidatos['similaridade'] = [score for _, score in resultados]
+        return candidatos
 
     def buscar_candidato_em_vaga(self, nome_candidato, id_vaga):
-        prospects_da_vaga = self.df_prospects[self.df_prospects['id_vaga'] == id_vaga]
-        if prospects_da_vaga.empty: return None
-        mask = prospects_da_vaga['nome'].str.contains(nome_candidato, case=False, na=False)
-        candidato_encontrado = prospects_da_vaga[mask]
-        return candidato_encontrado.iloc[0] if not candidato_encontrado.empty else None
+        """Retorna o prospect da vaga mais parecido com o nome informado, ou None."""
+        resultados = self._buscar_prospects(nome_candidato, id_vaga, LIMIAR_SIMILARIDADE_NOME)
+        return self.df_prospects.iloc[resultados[0][0]] if resultados else None
 
     def get_dossie_entrevista(self, id_vaga, id_candidato):
-        vaga_info = self.df_vagas[self.df_vagas['id_vaga'] == id_vaga]
-        prospect_info = self.df_prospects[(self.df_prospects['id_vaga'] == id_vaga) & (self.df_prospects['codigo'] == id_candidato)]
-        applicant_info = self.df_applicants[self.df_applicants['id_candidato'] == id_candidato]
-        if vaga_info.empty or applicant_info.empty: return None
-        info_completa = {**vaga_info.iloc[0].to_dict(), **applicant_info.iloc[0].to_dict(), **prospect_info.iloc[0].to_dict()}
-        return pd.Series(info_completa)
+        """Monta o dossiê (vaga + candidato + prospect) com buscas O(1) nos índices de chave."""
+        posicoes = self.cache.obter(self.versao_cache, ('dossie', id_vaga, id_candidato), lambda: (
+            self.pos_vaga.get(id_vaga), self.pos_applicant.get(id_candidato), self.pos_prospect.get((id_vaga, id_candidato))))
+        pos_vaga, pos_applicant, pos_prospect = posicoes
+        if pos_vaga is None or pos_applicant is None: return None
+        return Dossie((self.df_prospects, pos_prospect), (self.df_applicants, pos_applicant), (self.df_vagas, pos_vaga))
+
+    @property
+    def matriz_competencias(self) -> MatrizCompetencias:
+        """
+        Matrizes esparsas de competências de candidatos e vagas (ver competencias.py).
+        São construídas no primeiro uso, e não na carga, para não atrasar a subida da API.
+        """
+        matriz = getattr(self, '_matriz_competencias', None)
+        if matriz is None:
+            with self._lock_competencias:
+                matriz = getattr(self, '_matriz_competencias', None)
+                if matriz is None:
+                    print("Construindo matriz de competências...")
+                    matriz = MatrizCompetencias(self.df_applicants['conhecimentos_tecnicos'].tolist(),
+                                                self.df_vagas['competencia_tecnicas_e_comportamentais'].tolist())
+                    self._matriz_competencias = matriz
+        return matriz
+
+    def recomendar_candidatos_para_vaga(self, id_vaga, k=10, somente_prospects=False):
+        """
+        Os k candidatos com maior aderência às competências da vaga, com as colunas 'aderencia' (0 a 1)
+        e 'competencias_em_comum'. Com 'somente_prospects', ranqueia apenas quem já está no processo da vaga.
+        Retorna None se a vaga não existe.
+        """
+        pos_vaga = self.pos_vaga.get(id_vaga)
+        if pos_vaga is None: return None
+        def calcular():
+            restricao = None
+            if somente_prospects:
+                codigos = self.df_prospects['codigo'].to_numpy()[self.indice_prospects.posicoes(id_vaga)]
+                restricao = sorted({self.pos_applicant[c] for c in codigos if c in self.pos_applicant})
+            return self.matriz_competencias.candidatos_para_vaga(pos_vaga, k, restricao)
+        posicoes, pontos = self.cache.obter(self.versao_cache, ('recomendar_candidatos', id_vaga, k, somente_prospects), calcular)
+        return linhas_por_posicao(self.df_applicants, posicoes, ['id_candidato', 'nome'], aderencia=pontos.round(4),
+                                  competencias_em_comum=[self.matriz_competencias.termos_em_comum(p, pos_vaga) for p in posicoes])
+
+    def recomendar_vagas_para_candidato(self, id_candidato, k=10):
+        """As k vagas mais aderentes aos conhecimentos do candidato, com a coluna 'aderencia'. None se o candidato não existe."""
+        pos_applicant = self.pos_applicant.get(id_candidato)
+        if pos_applicant is None: return None
+        posicoes, pontos = self.cache.obter(self.versao_cache, ('recomendar_vagas', id_candidato, k),
+                                            lambda: self.matriz_competencias.vagas_para_candidato(pos_applicant, k))
+        return linhas_por_posicao(self.df_vagas, posicoes, ['id_vaga', 'titulo_vaga', 'cliente'], aderencia=pontos.round(4),
+                                  competencias_em_comum=[self.matriz_competencias.termos_em_comum(pos_applicant, p) for p in posicoes])
 
 class AgenteAbstrato:
     """Classe base para os agentes, contendo a lógica de chat."""
-    def __init__(self, llm_instance: Groq, system_prompt: str):
+    # Instrução enviada ao LLM para a primeira fala do agente
+    MENSAGEM_ABERTURA = "Por favor, inicie a entrevista se apresentando."
+    # (classe, id_vaga, versão do prompt) da saudação em cache; None desliga o cache para o agente
+    chave_abertura = None
+    # Nome do candidato (vira marcador na saudação) e dados que não podem aparecer numa saudação reaproveitada
+    nome_candidato = None
+    termos_privados = ()
+
+    def __init__(self, llm_instance: Groq, system_prompt: str, gerenciador_historico: GerenciadorHistorico = None):
         self.llm = llm_instance
         self.conversation_history = [ChatMessage(role="system", content=system_prompt)]
+        # Mantém o prompt dentro do orçamento de tokens (HISTORICO_MAX_TOKENS)
+        self.gerenciador_historico = gerenciador_historico or GerenciadorHistorico()
+        # Tokens (estimados) do prompt enviado ao LLM em cada turno
+        self.tokens_prompt_por_turno = []
+        # Tokens (prompt, resposta) da última chamada: os do provedor ou, na falta deles, estimados
+        self.ultimo_uso_tokens = None
 
-    def conversar(self, user_input: str):
+    @classmethod
+    def de_historico(cls, llm_instance: Groq, historico: list, estado: Mapping = None):
+        """
+        Recria o agente a partir de um histórico exportado (o prompt de sistema é a primeira mensagem)
+        e, se informado, do estado exportado por 'exportar_estado'.
+        """
+        agente = cls.__new__(cls)
+        AgenteAbstrato.__init__(agente, llm_instance, historico[0]['content'])
+        agente.conversation_history = [ChatMessage(role=m['role'], content=m['content']) for m in historico]
+        if estado:
+            agente.tokens_prompt_por_turno = list(estado.get('tokens_prompt_por_turno', []))
+            agente.nome_candidato = estado.get('nome_candidato')
+            agente.termos_privados = tuple(estado.get('termos_privados', ()))
+            chave = estado.get('chave_abertura')
+            agente.chave_abertura = tuple(chave) if chave is not None else None
+        return agente
+
+    def exportar_estado(self) -> dict:
+        """Campos que não estão no histórico: tokens por turno e os dados usados no modelo de saudação."""
+        return {'tokens_prompt_por_turno': list(self.tokens_prompt_por_turno), 'nome_candidato': self.nome_candidato,
+                'termos_privados': list(self.termos_privados), 'chave_abertura': self.chave_abertura}
+
+    def exportar_historico(self) -> list:
+        """Histórico como lista de dicionários simples {'role', 'content'}, pronta para serializar."""
+        return [{'role': getattr(m.role, 'value', m.role), 'content': m.content} for m in self.conversation_history]
+
+    def modelo_de_abertura(self, resposta: str):
+        """
+        Converte a primeira fala do agente num modelo reaproveitável por outros candidatos da mesma
+        vaga: o nome do candidato vira MARCADOR_NOME (e o primeiro nome, MARCADOR_PRIMEIRO_NOME).
+        None se a fala não serve de modelo: LLM indisponível, nome escrito de outra forma ou
+        menção a dados próprios do candidato (como os conhecimentos do dossiê).
+        """
+        if self.chave_abertura is None or not resposta or MENSAGEM_LLM_INDISPONIVEL in resposta:
+            return None
+        nome = str(self.nome_candidato or '').strip()
+        partes = nome.split()
+        modelo = resposta
+        if nome:
+            modelo = re.sub(_padrao_termo(nome), lambda _: MARCADOR_NOME, modelo, flags=re.IGNORECASE)
+        if len(partes) > 1:
+            modelo = re.sub(_padrao_termo(partes[0]), lambda _: MARCADOR_PRIMEIRO_NOME, modelo, flags=re.IGNORECASE)
+        restante = normalizar_texto(modelo.replace(MARCADOR_NOME, ' ').replace(MARCADOR_PRIMEIRO_NOME, ' '))
+        for termo in (*partes, *self.termos_privados):
+            if len(termo) >= 3 and re.search(_padrao_termo(normalizar_texto(termo)), restante):
+                return None
+        return modelo
+
+    def preencher_abertura(self, modelo: str) -> str:
+        """Saudação do cache com os marcadores trocados pelo nome deste candidato."""
+        nome = str(self.nome_candidato or '').strip()
+        return modelo.replace(MARCADOR_NOME, nome).replace(MARCADOR_PRIMEIRO_NOME, nome.split()[0] if nome else '')
+
+    def iniciar_com_abertura(self, texto: str):
+        """Registra a primeira fala vinda do cache no histórico, exatamente como se o LLM a tivesse gerado."""
+        self._adicionar_mensagem_usuario(self.MENSAGEM_ABERTURA)
+        self.conversation_history.append(ChatMessage(role="assistant", content=texto))
+        self.ultimo_uso_tokens = None
+
+    def _adicionar_mensagem_usuario(self, user_input: str):
+        """Adiciona a fala do usuário, compacta o histórico se passar do orçamento e registra os tokens do prompt."""
         self.conversation_history.append(ChatMessage(role="user", content=user_input))
-        response = self.llm.chat(self.conversation_history)
+        self.conversation_history = self.gerenciador_historico.compactar(self.conversation_history)
+        self.tokens_prompt_por_turno.append(self.gerenciador_historico.tokens(self.conversation_history))
+
+    def _responder_indisponivel(self, erro: LLMIndisponivel) -> str:
+        """Desfaz a fala do usuário (para que ela possa ser repetida) e devolve a resposta amigável."""
+        print(f"AVISO: LLM indisponível ({erro}).")
+        self.conversation_history.pop()
+        self.tokens_prompt_por_turno.pop()
+        self.ultimo_uso_tokens = None
+        return MENSAGEM_LLM_INDISPONIVEL
+
+    def conversar(self, user_input: str):
+        self._adicionar_mensagem_usuario(user_input)
+        try:
+            response = self.llm.chat(self.conversation_history)
+        except LLMIndisponivel as e:
+            return self._responder_indisponivel(e)
+        ai_message = response.message
+        self.conversation_history.append(ai_message)
+        self.ultimo_uso_tokens = uso_de_tokens(response) or (self.tokens_prompt_por_turno[-1], estimar_tokens(ai_message.content))
+        return ai_message.content
+
+    async def aconversar(self, user_input: str):
+        """
+        Versão assíncrona de 'conversar': usa 'llm.achat' para não bloquear o event loop.
+        Se o LLM só oferece a API síncrona, a chamada roda em uma thread do executor padrão.
+        """
+        self._adicionar_mensagem_usuario(user_input)
+        achat = getattr(self.llm, 'achat', None)
+        try:
+            if achat is not None and inspect.iscoroutinefunction(achat):
+                response = await achat(self.conversation_history)
+            else:
+                response = await asyncio.to_thread(self.llm.chat, self.conversation_history)
+        except LLMIndisponivel as e:
+            return self._responder_indisponivel(e)
         ai_message = response.message
         self.conversation_history.append(ai_message)
+        self.ultimo_uso_tokens = uso_de_tokens(response) or (self.tokens_prompt_por_turno[-1], estimar_tokens(ai_message.content))
         return ai_message.content
 
+    async def aconversar_stream(self, user_input: str):
+        """
+        Gera a resposta do LLM em pedaços (tokens) à medida que chegam.
+        A mensagem completa só entra no histórico quando o streaming termina.
+        Se o LLM não oferece streaming assíncrono, produz a resposta inteira de uma vez.
+        """
+        astream_chat = getattr(self.llm, 'astream_chat', None)
+        if astream_chat is None or not inspect.iscoroutinefunction(astream_chat):
+            yield await self.aconversar(user_input)
+            return
+        self._adicionar_mensagem_usuario(user_input)
+        try:
+            stream = await astream_chat(self.conversation_history)
+        except LLMIndisponivel as e:
+            yield self._responder_indisponivel(e)
+            return
+        partes = []
+        try:
+            async for chunk in stream:
+                if chunk.delta:
+                    partes.append(chunk.delta)
+                    yield chunk.delta
+        except LLMIndisponivel as e:
+            # Parte da resposta já foi enviada: ela fica no histórico e o aviso vai em seguida
+            print(f"AVISO: streaming do LLM interrompido ({e}).")
+            partes.append("\n\n" + MENSAGEM_LLM_INDISPONIVEL)
+            yield partes[-1]
+        self.conversation_history.append(ChatMessage(role="assistant", content=''.join(partes)))
+        self.ultimo_uso_tokens = (self.tokens_prompt_por_turno[-1], estimar_tokens(self.conversation_history[-1].content))
+
 class AgenteScreener(AgenteAbstrato):
     """Agente para entrevistar NOVOS candidatos."""
-    def __init__(self, vaga_info: pd.Series, nome_candidato: str, llm_instance: Groq):
-        SYSTEM_PROMPT = f"""
+    MENSAGEM_ABERTURA = "Por favor, inicie a entrevista de triagem se apresentando."
+
+    def __init__(self, vaga_info: Mapping, nome_candidato: str, llm_instance: Groq):
+        super().__init__(llm_instance, self.montar_prompt(vaga_info, nome_candidato))
+        self.nome_candidato = nome_candidato
+        if vaga_info.get('id_vaga') is not None:
+            self.chave_abertura = (type(self).__name__, str(vaga_info['id_vaga']),
+                                   versao_prompt(self.montar_prompt(vaga_info, MARCADOR_NOME)))
+
+    @staticmethod
+    def montar_prompt(vaga_info: Mapping, nome_candidato: str) -> str:
+        return f"""
         Você é "Alex", um recrutador de IA da Decision. Sua missão é realizar a primeira triagem (screening) de um NOVO candidato.
         **CONTEXTO:**
         - Nome do Candidato: {nome_candidato}
@@ -88,12 +458,24 @@ class AgenteScreener(AgenteAbstrato):
         3. Pergunte por que ele(a) se interessou por esta vaga.
         Ao final, agradeça e gere o resumo JSON com os dados coletados.
         """
-        super().__init__(llm_instance, SYSTEM_PROMPT)
 
 class AgenteEntrevistador(AgenteAbstrato):
     """Agente para entrevistas APROFUNDADAS com candidatos JÁ CONHECIDOS."""
-    def __init__(self, dossie: pd.Series, llm_instance: Groq):
-        SYSTEM_PROMPT = f"""
+    MENSAGEM_ABERTURA = "Por favor, inicie a entrevista aprofundada se apresentando."
+
+    def __init__(self, dossie: Mapping, llm_instance: Groq):
+        super().__init__(llm_instance, self.montar_prompt(dossie))
+        self.nome_candidato = dossie.get('nome')
+        conhecimentos = dossie.get('conhecimentos_tecnicos')
+        if isinstance(conhecimentos, str):
+            self.termos_privados = tuple(t.strip() for t in re.split(r"[,;/\n]", conhecimentos) if t.strip())
+        if dossie.get('id_vaga') is not None:
+            modelo = {'titulo_vaga': dossie.get('titulo_vaga'), 'nome': MARCADOR_NOME, 'conhecimentos_tecnicos': MARCADOR_CONHECIMENTOS}
+            self.chave_abertura = (type(self).__name__, str(dossie['id_vaga']), versao_prompt(self.montar_prompt(modelo)))
+
+    @staticmethod
+    def montar_prompt(dossie: Mapping) -> str:
+        return f"""
         Você é "Alex", um entrevistador de IA sênior da Decision. Sua missão é conduzir uma entrevista APROFUNDADA com um candidato já conhecido.
         **SEU DOSSIÊ:**
         - Vaga: {dossie.get('titulo_vaga', 'N/A')}
@@ -101,5 +483,4 @@ class AgenteEntrevistador(AgenteAbstrato):
         - Conhecimentos já listados: {dossie.get('conhecimentos_tecnicos', 'N/A')}
         **SEU PLANO:**
         Valide a Análise Técnica, o Fit Cultural e o Engajamento. Faça perguntas aprofundadas baseadas no dossiê. Ao final, agradeça e gere o resumo JSON.
-        """
-        super().__init__(llm_instance, SYSTEM_PROMPT)
\ No newline at end of file
+        """
\ No newline at end of file
@@ -0,0 +1,79 @@
+# benchmarks/bench_dossie.py
+"""
+Compara a montagem do dossiê antiga (3 varreduras booleanas + merge de dicts em pd.Series)
+com a nova (índices de chave primária + Dossie).
+
+Uso: python benchmarks/bench_dossie.py [n_applicants]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agent import BaseDeDados
+
+
+def gerar_tabelas(n_applicants, n_vagas, prospects_por_vaga=10, seed=42):
+    rng = np.random.default_rng(seed)
+    vagas = pd.DataFrame({
+        'id_vaga': [f"v{i}" for i in range(n_vagas)],
+        'titulo_vaga': [f"Analista {i % 97}" for i in range(n_vagas)],
+    })
+    applicants = pd.DataFrame({
+        'id_candidato': [f"c{i}" for i in range(n_applicants)],
+        'nome': [f"Candidato {i}" for i in range(n_applicants)],
+        'conhecimentos_tecnicos': ['Python, SQL'] * n_applicants,
+    })
+    n_prospects = n_vagas * prospects_por_vaga
+    codigos = rng.integers(0, n_applicants, n_prospects)
+    prospects = pd.DataFrame({
+        'id_vaga': np.repeat(vagas['id_vaga'].to_numpy(), prospects_por_vaga),
+        'codigo': [f"c{i}" for i in codigos],
+        'nome': [f"Candidato {i}" for i in codigos],
+        'situacao_candidado': 'Prospect',
+    })
+    return vagas, prospects, applicants
+
+
+def dossie_antigo(db, id_vaga, id_candidato):
+    """Implementação anterior, mantida aqui apenas como referência de comparação."""
+    vaga_info = db.df_vagas[db.df_vagas['id_vaga'] == id_vaga]
+    prospect_info = db.df_prospects[(db.df_prospects['id_vaga'] == id_vaga) & (db.df_prospects['codigo'] == id_candidato)]
+    applicant_info = db.df_applicants[db.df_applicants['id_candidato'] == id_candidato]
+    if vaga_info.empty or applicant_info.empty: return None
+    info_completa = {**vaga_info.iloc[0].to_dict(), **applicant_info.iloc[0].to_dict(), **prospect_info.iloc[0].to_dict()}
+    return pd.Series(info_completa)
+
+
+def cronometrar(funcao, pares):
+    inicio = time.perf_counter()
+    for id_vaga, id_candidato in pares:
+        dossie = funcao(id_vaga, id_candidato)
+        dossie.get('titulo_vaga'), dossie.get('nome'), dossie.get('conhecimentos_tecnicos')
+    return (time.perf_counter() - inicio) / len(pares) * 1000
+
+
+def main(n_applicants=100_000):
+    vagas, prospects, applicants = gerar_tabelas(n_applicants, n_vagas=max(n_applicants // 20, 1))
+    with tempfile.TemporaryDirectory() as pasta:
+        caminhos = {}
+        for nome, df in (('vagas', vagas), ('prospects', prospects), ('applicants', applicants)):
+            caminhos[f"{nome}_path"] = os.path.join(pasta, f"{nome}.parquet")
+            df.to_parquet(caminhos[f"{nome}_path"])
+        db = BaseDeDados(**caminhos)
+
+    amostra = prospects.sample(200, random_state=0)
+    pares = list(zip(amostra['id_vaga'], amostra['codigo']))
+    antes = cronometrar(lambda v, c: dossie_antigo(db, v, c), pares)
+    depois = cronometrar(db.get_dossie_entrevista, pares)
+    print(f"applicants={n_applicants} prospects={len(prospects)} vagas={len(vagas)}")
+    print(f"get_dossie_entrevista antes:  {antes:8.3f} ms/chamada")
+    print(f"get_dossie_entrevista depois: {depois:8.3f} ms/chamada ({antes / depois:.0f}x)")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
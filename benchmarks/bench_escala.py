@@ -0,0 +1,245 @@
+# benchmarks/bench_escala.py
+"""
+Microbenchmarks de escala da BaseDeDados com dados sintéticos realistas (títulos de vaga e
+nomes em português, com acentos). Para cada tamanho (10k, 100k, 1M linhas) mede, em um
+processo novo: o tempo do __init__, a latência (p50/p95) de buscar_vaga_por_texto,
+buscar_candidato_em_vaga e get_dossie_entrevista, o tempo de construção da matriz de competências
+e a latência de recomendar_candidatos_para_vaga (ranking da base inteira), e o pico de memória residente.
+
+As buscas são medidas com o cache de consultas desligado (caminho frio, o pior caso).
+Os resultados são comparados com benchmarks/baseline_escala.json: o script termina com
+código 1 se algum tempo passar de 'tolerancia_tempo' x o baseline ou a memória de
+'tolerancia_memoria' x. Use --atualizar-baseline para gravar a medição atual.
+
+Uso: python benchmarks/bench_escala.py [--tamanhos 10000 100000 1000000] [--consultas 200]
+         [--atualizar-baseline] [--saida resultado.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+ARQUIVO_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_escala.json')
+TAMANHOS_PADRAO = (10_000, 100_000, 1_000_000)
+TOLERANCIA_TEMPO = 1.5
+TOLERANCIA_MEMORIA = 1.25
+BUSCAS = ('buscar_vaga_por_texto', 'buscar_candidato_em_vaga', 'get_dossie_entrevista', 'recomendar_candidatos_para_vaga')
+
+CARGOS = ['Analista', 'Desenvolvedor', 'Engenheiro', 'Cientista', 'Arquiteto', 'Consultor', 'Coordenador',
+          'Gerente', 'Especialista', 'Técnico', 'Administrador', 'Líder Técnico']
+AREAS = ['de Dados', 'de Software', 'de Sistemas', 'de Segurança da Informação', 'de Infraestrutura', 'SAP',
+         'de Negócios', 'de Banco de Dados', 'de Redes', 'de Suporte', 'de Qualidade', 'Mobile', 'Java',
+         'Python', '.NET', 'Front-end', 'Back-end', 'Full Stack', 'DevOps', 'de Projetos', 'Financeiro', 'de BI']
+NIVEIS = ['Júnior', 'Pleno', 'Sênior', 'Especialista', 'Trainee']
+CLIENTES = ['Banco Horizonte', 'Seguradora Atlântica', 'Varejo Brasil', 'Telecom Sul', 'Energia Nova',
+            'Logística Rápida', 'Saúde Integrada', 'Agro Cerrado']
+PRENOMES = ['Ana', 'João', 'Maria', 'José', 'Francisco', 'Antônio', 'Carlos', 'Paulo', 'Pedro', 'Lucas', 'Luiz',
+            'Marcos', 'Luís', 'Gabriel', 'Rafael', 'Daniel', 'Marcelo', 'Bruno', 'Eduardo', 'Felipe', 'Juliana',
+            'Fernanda', 'Patrícia', 'Aline', 'Camila', 'Amanda', 'Bruna', 'Letícia', 'Júlia', 'Beatriz',
+            'Larissa', 'Vitória', 'Débora', 'Cláudia', 'Mônica', 'Márcia', 'Sebastião', 'Raimundo', 'Otávio']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima',
+              'Gomes', 'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes', 'Soares', 'Fernandes',
+              'Vieira', 'Barbosa', 'Rocha', 'Dias', 'Nascimento', 'Andrade', 'Moreira', 'Nunes', 'Marques',
+              'Machado', 'Mendes', 'Freitas', 'Cardoso', 'Ramos', 'Gonçalves', 'Araújo', 'Conceição', 'Brandão']
+CONHECIMENTOS = ['Python', 'SQL', 'Java', 'Spring', 'AWS', 'Azure', 'Docker', 'Kubernetes', 'SAP ABAP', 'Power BI',
+                 'React', 'Angular', 'Node.js', 'C#', '.NET', 'Linux', 'Scrum', 'Excel avançado', 'Spark', 'Git']
+
+
+def _nomes(rng, n):
+    prenome = rng.choice(PRENOMES, n)
+    meio = rng.choice(SOBRENOMES, n)
+    fim = rng.choice(SOBRENOMES, n)
+    return [f"{a} {b} {c}" for a, b, c in zip(prenome, meio, fim)]
+
+
+def gerar_dados_sinteticos(n_linhas, pasta, prospects_por_vaga=10, seed=42):
+    """
+    Grava vagas/prospects/applicants.parquet com 'n_linhas' candidatos e 'n_linhas' prospects
+    (n_linhas / prospects_por_vaga vagas). Retorna os caminhos no formato do construtor da BaseDeDados.
+    """
+    rng = np.random.default_rng(seed)
+    n_vagas = max(n_linhas // prospects_por_vaga, 1)
+    titulos = [f"{c} {a} {n}" for c, a, n in zip(rng.choice(CARGOS, n_vagas), rng.choice(AREAS, n_vagas),
+                                                 rng.choice(NIVEIS, n_vagas))]
+    vagas = pd.DataFrame({
+        'id_vaga': [str(4000 + i) for i in range(n_vagas)],
+        'titulo_vaga': titulos,
+        'cliente': rng.choice(CLIENTES, n_vagas),
+        'nivel profissional': [t.rsplit(' ', 1)[1] for t in titulos],
+        'competencia_tecnicas_e_comportamentais': [', '.join(rng.choice(CONHECIMENTOS, 4, replace=False)) for _ in range(n_vagas)],
+    })
+    applicants = pd.DataFrame({
+        'id_candidato': [str(10_000 + i) for i in range(n_linhas)],
+        'nome': _nomes(rng, n_linhas),
+        'conhecimentos_tecnicos': [', '.join(rng.choice(CONHECIMENTOS, 3, replace=False)) for _ in range(n_linhas)],
+    })
+    candidatos = rng.integers(0, n_linhas, n_vagas * prospects_por_vaga)
+    prospects = pd.DataFrame({
+        'id_vaga': np.repeat(vagas['id_vaga'].to_numpy(), prospects_por_vaga),
+        'codigo': applicants['id_candidato'].to_numpy()[candidatos],
+        'nome': applicants['nome'].to_numpy()[candidatos],
+        'situacao_candidado': rng.choice(['Prospect', 'Encaminhado ao Requisitante', 'Entrevista Técnica',
+                                          'Contratado pela Decision', 'Não Aprovado pelo Cliente'], len(candidatos)),
+    })
+    caminhos = {}
+    for nome, df in (('vagas', vagas), ('prospects', prospects), ('applicants', applicants)):
+        caminhos[f"{nome}_path"] = os.path.join(pasta, f"{nome}.parquet")
+        df.to_parquet(caminhos[f"{nome}_path"], index=False)
+    return caminhos
+
+
+def _percentis_us(tempos):
+    valores = np.array(tempos) * 1e6
+    return {'p50_us': round(float(np.percentile(valores, 50)), 1), 'p95_us': round(float(np.percentile(valores, 95)), 1)}
+
+
+def _medir(caminhos, n_consultas, seed, fila):
+    """Roda em um processo novo (memória limpa): carrega a base e cronometra as buscas."""
+    from agent import BaseDeDados
+    from indices import normalizar_texto
+    from cache_consultas import CacheConsultas
+    # Cache de consultas desligado: nada cabe em 0 bytes, então toda busca percorre os índices
+    BaseDeDados.cache = CacheConsultas(max_bytes=0)
+
+    rss_inicial_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = BaseDeDados(**caminhos)
+    tempo_init = time.perf_counter() - inicio
+
+    rng = np.random.default_rng(seed)
+    n_prospects = len(db.df_prospects)
+    amostra = rng.integers(0, n_prospects, n_consultas)
+    vagas = db.df_prospects['id_vaga'].to_numpy()[amostra]
+    nomes = db.df_prospects['nome'].to_numpy()[amostra]
+    codigos = db.df_prospects['codigo'].to_numpy()[amostra]
+    titulos = db.df_vagas['titulo_vaga'].to_numpy()[rng.integers(0, len(db.df_vagas), n_consultas)]
+    # Buscas como as digitadas pelos candidatos: parte do título, sem acento e em minúsculas
+    consultas_vaga = [normalizar_texto(' '.join(str(t).split()[:2])) for t in titulos]
+
+    tempos = {'buscar_vaga_por_texto': [], 'buscar_candidato_em_vaga': [], 'get_dossie_entrevista': []}
+    for i in range(n_consultas):
+        t0 = time.perf_counter()
+        db.buscar_vaga_por_texto(consultas_vaga[i])
+        t1 = time.perf_counter()
+        db.buscar_candidato_em_vaga(str(nomes[i]).lower(), vagas[i])
+        t2 = time.perf_counter()
+        db.get_dossie_entrevista(vagas[i], codigos[i])
+        t3 = time.perf_counter()
+        tempos['buscar_vaga_por_texto'].append(t1 - t0)
+        tempos['buscar_candidato_em_vaga'].append(t2 - t1)
+        tempos['get_dossie_entrevista'].append(t3 - t2)
+
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        db.matriz_competencias
+    tempo_competencias = time.perf_counter() - inicio
+    tempos['recomendar_candidatos_para_vaga'] = []
+    for id_vaga in vagas:
+        t0 = time.perf_counter()
+        db.recomendar_candidatos_para_vaga(id_vaga, k=10)
+        tempos['recomendar_candidatos_para_vaga'].append(time.perf_counter() - t0)
+
+    fila.put({
+        'init_s': round(tempo_init, 3),
+        'competencias_init_s': round(tempo_competencias, 3),
+        **{nome: _percentis_us(valores) for nome, valores in tempos.items()},
+        'pico_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'rss_inicial_mb': round(rss_inicial_mb, 1),
+    })
+
+
+def medir_tamanho(n_linhas, n_consultas=200, seed=42):
+    with tempfile.TemporaryDirectory() as pasta:
+        caminhos = gerar_dados_sinteticos(n_linhas, pasta, seed=seed)
+        contexto = mp.get_context('spawn')
+        fila = contexto.Queue()
+        processo = contexto.Process(target=_medir, args=(caminhos, n_consultas, seed, fila))
+        processo.start()
+        resultado = fila.get()
+        processo.join()
+    return resultado
+
+
+def comparar_com_baseline(resultados, baseline, tolerancia_tempo=TOLERANCIA_TEMPO, tolerancia_memoria=TOLERANCIA_MEMORIA):
+    """Lista as regressões: métricas acima de tolerância x baseline (só tamanhos presentes nos dois)."""
+    regressoes = []
+    for tamanho, atual in resultados.items():
+        anterior = baseline.get('resultados', {}).get(tamanho)
+        if anterior is None:
+            continue
+        limites = [('init_s', atual['init_s'], anterior['init_s'], tolerancia_tempo),
+                   ('pico_rss_mb', atual['pico_rss_mb'], anterior['pico_rss_mb'], tolerancia_memoria)]
+        if 'competencias_init_s' in anterior:
+            limites.append(('competencias_init_s', atual['competencias_init_s'], anterior['competencias_init_s'], tolerancia_tempo))
+        for busca in BUSCAS:
+            # Métricas ausentes no baseline (acrescentadas depois dele) não são comparadas
+            if busca in anterior:
+                limites.append((f"{busca}.p95_us", atual[busca]['p95_us'], anterior[busca]['p95_us'], tolerancia_tempo))
+        for metrica, valor, referencia, tolerancia in limites:
+            if referencia and valor > referencia * tolerancia:
+                regressoes.append(f"{tamanho} linhas: {metrica} = {valor} (baseline {referencia}, limite {tolerancia}x)")
+    return regressoes
+
+
+def imprimir_tabela(resultados):
+    print(f"{'linhas':>9}{'init (s)':>10}{'vaga p50/p95 (us)':>20}{'nome p50/p95 (us)':>20}"
+          f"{'dossiê p50/p95 (us)':>22}{'ranking p50/p95 (us)':>22}{'pico RSS (MB)':>15}")
+    for tamanho, r in resultados.items():
+        colunas = [f"{r[b]['p50_us']:.0f}/{r[b]['p95_us']:.0f}"
+                   for b in BUSCAS]
+        print(f"{tamanho:>9}{r['init_s']:>10.2f}{colunas[0]:>20}{colunas[1]:>20}{colunas[2]:>22}{colunas[3]:>22}"
+              f"{r['pico_rss_mb']:>15.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks de escala da BaseDeDados com dados sintéticos.")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=list(TAMANHOS_PADRAO))
+    parser.add_argument('--consultas', type=int, default=200, help="Buscas cronometradas por tamanho")
+    parser.add_argument('--baseline', default=ARQUIVO_BASELINE)
+    parser.add_argument('--atualizar-baseline', action='store_true', help="Grava a medição atual como baseline")
+    parser.add_argument('--tolerancia-tempo', type=float, default=TOLERANCIA_TEMPO)
+    parser.add_argument('--tolerancia-memoria', type=float, default=TOLERANCIA_MEMORIA)
+    parser.add_argument('--saida', help="Grava os resultados em JSON")
+    args = parser.parse_args()
+
+    resultados = {}
+    for tamanho in args.tamanhos:
+        resultados[str(tamanho)] = medir_tamanho(tamanho, args.consultas)
+        print(f"{tamanho} linhas medidas.", file=sys.stderr)
+    imprimir_tabela(resultados)
+
+    medicao = {'maquina': {'python': platform.python_version(), 'cpus': os.cpu_count(), 'sistema': platform.platform()},
+               'consultas': args.consultas, 'resultados': resultados}
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(medicao, f, indent=2, ensure_ascii=False)
+    if args.atualizar_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(medicao, f, indent=2, ensure_ascii=False)
+        print(f"Baseline gravado em '{args.baseline}'.")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print("Sem baseline para comparar (use --atualizar-baseline).")
+        sys.exit(0)
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressoes = comparar_com_baseline(resultados, baseline, args.tolerancia_tempo, args.tolerancia_memoria)
+    for regressao in regressoes:
+        print(f"REGRESSÃO: {regressao}")
+    if regressoes:
+        sys.exit(1)
+    print("Nenhuma regressão em relação ao baseline.")
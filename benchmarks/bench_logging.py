@@ -0,0 +1,63 @@
+# benchmarks/bench_logging.py
+"""
+Mede o custo do logging por requisição na thread que loga (o event loop, na API):
+modo síncrono antigo (StreamHandler + FileHandler) x fila com escritor em lote.
+Cada "requisição" emite os 3 registros do /predict (recebida, vaga identificada, finalizada).
+O stdout dos handlers é descartado (/dev/null) para medir só o caminho do logging.
+
+Uso: python benchmarks/bench_logging.py [n_requisicoes]
+"""
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import logger_config
+
+
+def requisicao(logger, i):
+    logger.info("Requisição recebida", extra={"session_id": f"s{i}", "input_length": 42})
+    logger.info("Vaga Identificada", extra={"session_id": f"s{i}", "id_vaga": "4530", "titulo_vaga": "Analista de Dados Sênior",
+                                            "nivel_profissional": "Sênior"})
+    logger.info("Requisição finalizada", extra={"session_id": f"s{i}", "duration_ms": 812.4})
+
+
+def medir(assincrono, n_requisicoes, pasta):
+    caminho = os.path.join(pasta, f"log-{'fila' if assincrono else 'sincrono'}.log")
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        logger = logger_config.setup_logger(caminho, assincrono=assincrono)
+        tempos = []
+        for i in range(n_requisicoes):
+            inicio = time.perf_counter()
+            requisicao(logger, i)
+            tempos.append(time.perf_counter() - inicio)
+        metricas = logger_config.metricas_log(logger)
+        inicio_drenagem = time.perf_counter()
+        for handler in logger.handlers:
+            if hasattr(handler, 'escritor'):
+                handler.escritor.parar()
+        drenagem = time.perf_counter() - inicio_drenagem
+        logger.handlers.clear()
+    tempos_us = np.array(tempos) * 1e6
+    with open(caminho, encoding='utf-8') as f:
+        linhas = sum(1 for _ in f)
+    return tempos_us, drenagem, linhas, metricas
+
+
+def main(n_requisicoes=20_000):
+    with tempfile.TemporaryDirectory() as pasta:
+        print(f"{'modo':<10}{'média (us)':>12}{'p50 (us)':>10}{'p99 (us)':>10}{'máx (us)':>10}{'linhas':>9}{'drenagem (s)':>14}")
+        for assincrono in (False, True):
+            tempos_us, drenagem, linhas, metricas = medir(assincrono, n_requisicoes, pasta)
+            print(f"{'fila' if assincrono else 'síncrono':<10}{tempos_us.mean():>12.1f}{np.percentile(tempos_us, 50):>10.1f}"
+                  f"{np.percentile(tempos_us, 99):>10.1f}{tempos_us.max():>10.1f}{linhas:>9}{drenagem:>14.2f}")
+            if metricas:
+                print(f"          {metricas}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,82 @@
+# benchmarks/bench_memoria_workers.py
+"""
+Mede a memória de N workers carregando a BaseDeDados ao mesmo tempo, comparando o modo
+padrão (read_parquet + otimizar_dataframe em cada processo) com o modo Arrow compartilhado
+(memory-map somente leitura + projeção de colunas).
+
+RSS conta as páginas compartilhadas em todos os processos; PSS divide as páginas
+compartilhadas entre eles, e a soma do PSS é a melhor estimativa do total do container.
+
+Uso: python benchmarks/bench_memoria_workers.py [n_applicants]
+"""
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from bench_dossie import gerar_tabelas
+
+
+def memoria_do_processo():
+    """Retorna (RSS, PSS) do processo atual em MB, lidos de /proc (Linux)."""
+    valores = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for linha in f:
+            partes = linha.split()
+            if partes[0] in ('Rss:', 'Pss:'):
+                valores[partes[0]] = int(partes[1]) / 1024
+    return valores['Rss:'], valores['Pss:']
+
+
+def worker(caminhos, pasta_arrow, barreira, fila):
+    import contextlib
+    import io
+    from agent import BaseDeDados
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = BaseDeDados(**caminhos, pasta_arrow=pasta_arrow)
+        # Toca nas colunas usadas, como as buscas reais fariam
+        db.get_dossie_entrevista(db.df_vagas['id_vaga'].iat[0], db.df_applicants['id_candidato'].iat[0])
+    barreira.wait()  # todos os workers vivos ao mesmo tempo
+    fila.put(memoria_do_processo())
+    barreira.wait()
+
+
+def medir(n_workers, caminhos, pasta_arrow):
+    contexto = mp.get_context('spawn')
+    barreira = contexto.Barrier(n_workers)
+    fila = contexto.Queue()
+    processos = [contexto.Process(target=worker, args=(caminhos, pasta_arrow, barreira, fila)) for _ in range(n_workers)]
+    for p in processos:
+        p.start()
+    medidas = [fila.get() for _ in processos]
+    for p in processos:
+        p.join()
+    rss = sum(m[0] for m in medidas) / n_workers
+    pss_total = sum(m[1] for m in medidas)
+    return rss, pss_total
+
+
+def main(n_applicants=50_000):
+    vagas, prospects, applicants = gerar_tabelas(n_applicants, n_vagas=max(n_applicants // 20, 1))
+    # Colunas de texto longo (como o CV) que existem nos dados reais mas não são usadas pelos agentes
+    applicants['cv_pt'] = applicants['nome'] + " - experiência profissional detalhada " * 30
+    vagas['descricao_longa'] = vagas['titulo_vaga'] + " - atividades e requisitos " * 40
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminhos = {}
+        for nome, df in (('vagas', vagas), ('prospects', prospects), ('applicants', applicants)):
+            caminhos[f"{nome}_path"] = os.path.join(pasta, f"{nome}.parquet")
+            df.to_parquet(caminhos[f"{nome}_path"])
+        pasta_arrow = os.path.join(pasta, 'arrow')
+
+        print(f"applicants={n_applicants} prospects={len(prospects)} vagas={len(vagas)}")
+        print(f"{'modo':<12}{'workers':>8}{'RSS/worker (MB)':>18}{'PSS total (MB)':>17}")
+        for modo, pasta_modo in (('parquet', None), ('arrow-mmap', pasta_arrow)):
+            for n_workers in (1, 4, 8):
+                rss, pss_total = medir(n_workers, caminhos, pasta_modo)
+                print(f"{modo:<12}{n_workers:>8}{rss:>18.1f}{pss_total:>17.1f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
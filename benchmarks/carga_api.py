@@ -0,0 +1,301 @@
+# benchmarks/carga_api.py
+"""
+Teste de carga da API: reproduz sessões de várias rodadas contra o app FastAPI (em processo,
+via ASGI) com um LLM simulado no lugar da Groq, sem custo de API.
+
+As sessões vêm de um JSONL ({"session_id", "user_input"} por linha, agrupadas por sessão na
+ordem do arquivo, ou {"turnos": [...]} por linha) ou são geradas a partir dos próprios dados:
+busca da vaga -> nome do candidato (conhecido ou novo) -> N rodadas de conversa.
+
+O relatório (JSON) traz vazão, p50/p95/p99 por fase da sessão (busca_vaga, nome, conversa),
+taxas de erro, respostas degradadas (LLM indisponível) e as métricas do cliente do LLM.
+Com --comparar, mostra a variação em relação a um relatório anterior.
+
+Uso: python benchmarks/carga_api.py [--dados data_processed] [--sessoes arquivo.jsonl]
+         [--n-sessoes 200] [--concorrencia 20] [--latencia-ms 800] [--tokens-por-s 250]
+         [--saida relatorio.json] [--comparar relatorio_anterior.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from unittest.mock import MagicMock, patch
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main
+from agent import BaseDeDados, MENSAGEM_LLM_INDISPONIVEL
+from bench_dossie import gerar_tabelas
+from llama_index.core.llms import ChatMessage
+from llm_resiliente import LLMResiliente
+
+FASES = ('busca_vaga', 'nome', 'conversa')
+
+NOMES_NOVOS = ['Ana Beatriz Lima', 'Bruno Carvalho', 'Camila Rocha', 'Diego Martins', 'Fernanda Alves',
+               'Gustavo Ribeiro', 'Helena Costa', 'Igor Nascimento', 'Juliana Freitas', 'Lucas Moreira']
+
+RESPOSTAS_CANDIDATO = [
+    "Trabalho com Python e SQL há cinco anos, principalmente com APIs e pipelines de dados.",
+    "Meu inglês é avançado, pretendo 12 mil CLT e prefiro o modelo híbrido.",
+    "Me interessei porque a empresa tem projetos de dados em nuvem e quero crescer nessa área.",
+    "Já liderei um time pequeno e cuidei da migração de um sistema legado para a AWS.",
+    "Tenho disponibilidade imediata e posso começar na próxima semana.",
+]
+
+
+class LLMSimulado:
+    """
+    LLM falso para testes de carga: latência de rede/fila sorteada de uma lognormal (mediana
+    'latencia_s', dispersão 'sigma') mais o tempo de gerar 'tokens_resposta' a 'tokens_por_s'.
+    'taxa_erro' é a fração de chamadas que falham com erro transitório.
+    """
+    def __init__(self, latencia_s=0.8, sigma=0.5, tokens_por_s=250.0, tokens_resposta=60, taxa_erro=0.0, seed=0):
+        self.latencia_s = latencia_s
+        self.sigma = sigma
+        self.tokens_por_s = tokens_por_s
+        self.tokens_resposta = tokens_resposta
+        self.taxa_erro = taxa_erro
+        self.rng = random.Random(seed)
+
+    def _espera_inicial(self):
+        if self.rng.random() < self.taxa_erro:
+            raise ConnectionError("erro transitório simulado")
+        return self.latencia_s * self.rng.lognormvariate(0, self.sigma)
+
+    def _texto(self, mensagens):
+        return ' '.join(["palavra"] * self.tokens_resposta) + f" ({len(mensagens)} mensagens)"
+
+    async def achat(self, mensagens, **kwargs):
+        await asyncio.sleep(self._espera_inicial() + self.tokens_resposta / self.tokens_por_s)
+        resposta = MagicMock()
+        resposta.message = ChatMessage(role="assistant", content=self._texto(mensagens))
+        return resposta
+
+    def chat(self, mensagens, **kwargs):
+        time.sleep(self._espera_inicial() + self.tokens_resposta / self.tokens_por_s)
+        resposta = MagicMock()
+        resposta.message = ChatMessage(role="assistant", content=self._texto(mensagens))
+        return resposta
+
+    async def astream_chat(self, mensagens, **kwargs):
+        espera = self._espera_inicial()
+        palavras = self._texto(mensagens).split(' ')
+
+        async def gerar():
+            await asyncio.sleep(espera)
+            for palavra in palavras:
+                await asyncio.sleep(1 / self.tokens_por_s)
+                yield MagicMock(delta=palavra + ' ')
+        return gerar()
+
+
+def ler_sessoes(caminho):
+    """Lê sessões de um JSONL: linhas {'turnos': [...]} ou {'session_id', 'user_input'} agrupadas por sessão."""
+    sessoes = {}
+    with open(caminho, encoding='utf-8') as f:
+        for numero, linha in enumerate(f):
+            if not linha.strip():
+                continue
+            registro = json.loads(linha)
+            if 'turnos' in registro:
+                sessoes[registro.get('session_id', f"linha-{numero}")] = list(registro['turnos'])
+            elif 'user_input' in registro:
+                sessoes.setdefault(registro['session_id'], []).append(registro['user_input'])
+    return list(sessoes.values())
+
+
+def gerar_sessoes_sinteticas(db, n_sessoes, turnos_conversa=3, proporcao_conhecidos=0.5, seed=0):
+    """Roteiros a partir da base: título de uma vaga, nome de um prospect dela (ou um nome novo) e respostas."""
+    rng = random.Random(seed)
+    titulos = db.df_vagas['titulo_vaga'].astype(str).tolist()
+    ids_vaga = db.df_vagas['id_vaga'].tolist()
+    nomes_por_vaga = db.df_prospects.groupby('id_vaga', observed=True)['nome'].agg(list).to_dict()
+    sessoes = []
+    for _ in range(n_sessoes):
+        i = rng.randrange(len(titulos))
+        conhecidos = nomes_por_vaga.get(ids_vaga[i])
+        if conhecidos and rng.random() < proporcao_conhecidos:
+            nome = str(rng.choice(conhecidos))
+        else:
+            nome = rng.choice(NOMES_NOVOS)
+        sessoes.append([titulos[i], nome] + rng.sample(RESPOSTAS_CANDIDATO, min(turnos_conversa, len(RESPOSTAS_CANDIDATO))))
+    return sessoes
+
+
+def _fase(turno):
+    return FASES[min(turno, 2)]
+
+
+async def executar_sessoes(cliente, sessoes, concorrencia, rota='/predict', pausa_s=0.0):
+    """Executa as sessões com 'concorrencia' sessões simultâneas; cada sessão é sequencial."""
+    fila = asyncio.Queue()
+    for i, turnos in enumerate(sessoes):
+        fila.put_nowait((f"carga-{i}", turnos))
+    medidas = defaultdict(list)   # fase -> [ms]
+    erros = defaultdict(int)
+    degradadas = defaultdict(int)
+
+    async def trabalhador():
+        while not fila.empty():
+            session_id, turnos = fila.get_nowait()
+            for turno, texto in enumerate(turnos):
+                fase = _fase(turno)
+                inicio = time.perf_counter()
+                try:
+                    resposta = await cliente.post(rota, json={'session_id': session_id, 'user_input': texto})
+                    ok = resposta.status_code == 200
+                    corpo = resposta.text if ok else ''
+                    # No streaming a falha chega como evento 'erro' dentro de uma resposta 200
+                    ok = ok and '"tipo": "erro"' not in corpo
+                except httpx.HTTPError:
+                    ok, corpo = False, ''
+                medidas[fase].append((time.perf_counter() - inicio) * 1000)
+                if not ok:
+                    erros[fase] += 1
+                    break
+                if MENSAGEM_LLM_INDISPONIVEL in corpo:
+                    degradadas[fase] += 1
+                if pausa_s:
+                    await asyncio.sleep(pausa_s)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+    return medidas, erros, degradadas, time.perf_counter() - inicio
+
+
+def resumir(latencias_ms, erros=0, degradadas=0):
+    n = len(latencias_ms)
+    if not n:
+        return {'n': 0}
+    valores = np.array(latencias_ms)
+    return {
+        'n': n, 'erros': erros, 'taxa_erro': round(erros / n, 4), 'degradadas': degradadas,
+        'media_ms': round(float(valores.mean()), 2),
+        **{f'p{p}_ms': round(float(np.percentile(valores, p)), 2) for p in (50, 95, 99)},
+    }
+
+
+def _versao_codigo():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+async def rodar_carga(caminhos, sessoes, concorrencia, llm_simulado, rota='/predict', pausa_s=0.0):
+    """Sobe a API com o lifespan real (sem download e com o LLM simulado) e executa as sessões."""
+    with patch.dict(os.environ, {'GROQ_API_KEY': os.environ.get('GROQ_API_KEY', 'carga-local')}), \
+            patch.object(main, 'executar_pipeline_completo', lambda *a, **k: None), \
+            patch.object(main, 'carregar_base', lambda: BaseDeDados(**caminhos)), \
+            patch.object(main, 'criar_cliente_llm', lambda api_key: LLMResiliente(llm_simulado)):
+        return await _rodar_carga(sessoes, concorrencia, rota, pausa_s)
+
+
+async def _rodar_carga(sessoes, concorrencia, rota, pausa_s):
+    async with main.lifespan(main.app):
+        # A base e o LLM carregam em segundo plano: espera a API ficar pronta antes de medir
+        await main.state['tarefa_inicializacao']
+        if not main.api_pronta():
+            raise RuntimeError(f"A API não ficou pronta: {main.state['inicializacao']['erro']}")
+        transporte = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transporte, base_url='http://carga', timeout=None) as cliente:
+            medidas, erros, degradadas, duracao = await executar_sessoes(cliente, sessoes, concorrencia, rota, pausa_s)
+            metricas_llm = main.state['llm'].metricas() if hasattr(main.state['llm'], 'metricas') else None
+
+    todas = [ms for fase in FASES for ms in medidas[fase]]
+    return {
+        'versao_codigo': _versao_codigo(),
+        'rota': rota,
+        'concorrencia': concorrencia,
+        'sessoes': len(sessoes),
+        'duracao_s': round(duracao, 3),
+        'vazao_rps': round(len(todas) / duracao, 2) if duracao else None,
+        'fases': {fase: resumir(medidas[fase], erros[fase], degradadas[fase]) for fase in FASES},
+        'total': resumir(todas, sum(erros.values()), sum(degradadas.values())),
+        'llm': metricas_llm,
+    }
+
+
+def comparar_relatorios(anterior, atual):
+    """Variação percentual de vazão e percentis por fase (positivo = mais lento/maior)."""
+    def variacao(a, b):
+        return round((b - a) / a * 100, 1) if a else None
+    comparacao = {'vazao_rps_%': variacao(anterior.get('vazao_rps'), atual.get('vazao_rps'))}
+    for fase in FASES + ('total',):
+        antes = anterior['fases'].get(fase, {}) if fase != 'total' else anterior['total']
+        depois = atual['fases'].get(fase, {}) if fase != 'total' else atual['total']
+        comparacao[fase] = {f'{p}_%': variacao(antes.get(f'{p}_ms'), depois.get(f'{p}_ms'))
+                            for p in ('p50', 'p95', 'p99') if f'{p}_ms' in antes and f'{p}_ms' in depois}
+        comparacao[fase]['taxa_erro'] = (antes.get('taxa_erro'), depois.get('taxa_erro'))
+    return comparacao
+
+
+def _caminhos_dados(pasta_dados, pasta_temp, n_applicants):
+    if pasta_dados:
+        return {f"{t}_path": os.path.join(pasta_dados, f"{t}.parquet") for t in ('vagas', 'prospects', 'applicants')}
+    caminhos = {}
+    for nome, df in zip(('vagas', 'prospects', 'applicants'), gerar_tabelas(n_applicants, n_vagas=max(n_applicants // 20, 1))):
+        caminhos[f"{nome}_path"] = os.path.join(pasta_temp, f"{nome}.parquet")
+        df.to_parquet(caminhos[f"{nome}_path"])
+    return caminhos
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Teste de carga da API com LLM simulado.")
+    parser.add_argument('--dados', help="Pasta com vagas/prospects/applicants.parquet (padrão: dados sintéticos)")
+    parser.add_argument('--n-applicants', type=int, default=20_000, help="Tamanho dos dados sintéticos")
+    parser.add_argument('--sessoes', help="JSONL com as sessões a reproduzir (padrão: roteiros sintéticos)")
+    parser.add_argument('--n-sessoes', type=int, default=200)
+    parser.add_argument('--turnos-conversa', type=int, default=3)
+    parser.add_argument('--concorrencia', type=int, default=20)
+    parser.add_argument('--stream', action='store_true', help="Usa /predict/stream em vez de /predict")
+    parser.add_argument('--pausa-ms', type=float, default=0.0, help="Pausa entre as rodadas de uma sessão")
+    parser.add_argument('--latencia-ms', type=float, default=800.0, help="Mediana da latência do LLM simulado")
+    parser.add_argument('--sigma', type=float, default=0.5, help="Dispersão (lognormal) da latência")
+    parser.add_argument('--tokens-por-s', type=float, default=250.0)
+    parser.add_argument('--tokens-resposta', type=int, default=60)
+    parser.add_argument('--taxa-erro-llm', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--com-logs', action='store_true', help="Mantém os logs da API (por padrão são silenciados)")
+    parser.add_argument('--saida', help="Arquivo JSON do relatório (padrão: stdout)")
+    parser.add_argument('--comparar', help="Relatório anterior para comparação")
+    args = parser.parse_args()
+
+    if not args.com_logs:
+        main.logger.handlers = []
+
+    # Mensagens de carga da base e avisos dos agentes vão para o stderr; o stdout fica só com o relatório
+    with tempfile.TemporaryDirectory() as pasta_temp, contextlib.redirect_stdout(sys.stderr):
+        caminhos = _caminhos_dados(args.dados, pasta_temp, args.n_applicants)
+        if args.sessoes:
+            sessoes = ler_sessoes(args.sessoes)
+        else:
+            db = BaseDeDados(**caminhos)
+            sessoes = gerar_sessoes_sinteticas(db, args.n_sessoes, args.turnos_conversa, seed=args.seed)
+            del db
+        llm = LLMSimulado(args.latencia_ms / 1000, args.sigma, args.tokens_por_s, args.tokens_resposta,
+                          args.taxa_erro_llm, seed=args.seed)
+        rota = '/predict/stream' if args.stream else '/predict'
+        relatorio = asyncio.run(rodar_carga(caminhos, sessoes, args.concorrencia, llm, rota, args.pausa_ms / 1000))
+
+    relatorio['llm_simulado'] = {'latencia_ms': args.latencia_ms, 'sigma': args.sigma, 'tokens_por_s': args.tokens_por_s,
+                                 'tokens_resposta': args.tokens_resposta, 'taxa_erro': args.taxa_erro_llm}
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            relatorio['comparacao'] = comparar_relatorios(json.load(f), relatorio)
+
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(texto)
+    print(texto)
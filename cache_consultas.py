@@ -0,0 +1,110 @@
+# cache_consultas.py
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+import numpy as np
+
+
+def tamanho_aproximado(valor) -> int:
+    """Estimativa do tamanho em bytes de chaves e resultados (arrays, tuplas, strings e números)."""
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes + 112
+    if isinstance(valor, (tuple, list)):
+        return sys.getsizeof(valor) + sum(tamanho_aproximado(v) for v in valor)
+    return sys.getsizeof(valor)
+
+
+def congelar(valor):
+    """Torna o resultado imutável antes de guardá-lo (arrays viram somente leitura)."""
+    if isinstance(valor, np.ndarray):
+        valor = valor.copy() if valor.flags.writeable else valor
+        valor.flags.writeable = False
+        return valor
+    if isinstance(valor, list):
+        return tuple(congelar(v) for v in valor)
+    return valor
+
+
+class CacheConsultas:
+    """
+    Cache LRU compartilhado pelas buscas da BaseDeDados, limitado por tamanho aproximado em bytes.
+    Guarda apenas resultados imutáveis (posições de linha, tuplas), nunca DataFrames, e não
+    mantém referência às bases. Cada entrada pertence a uma versão do dataset: quando uma
+    base de versão NOVA consulta o cache, as entradas da versão anterior são descartadas.
+    Consultas de versões já substituídas (requisições em andamento durante uma recarga)
+    são calculadas sem passar pelo cache, para não apagar as entradas da versão atual.
+    """
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._dados = OrderedDict()  # chave -> (valor, bytes)
+        self._bytes = 0
+        self._versao = None
+        self._versoes_substituidas = set()
+        self._lock = threading.Lock()
+        self.contadores = {'hits': 0, 'misses': 0, 'despejos': 0, 'invalidacoes': 0}
+
+    def _trocar_versao(self, versao):
+        self._versoes_substituidas.discard(versao)
+        if self._versao is not None:
+            self._versoes_substituidas.add(self._versao)
+            if self._dados:
+                self.contadores['invalidacoes'] += 1
+        self._dados.clear()
+        self._bytes = 0
+        self._versao = versao
+
+    def ativar_versao(self, versao):
+        """Torna 'versao' a versão atual (usado na troca da base, inclusive para voltar a uma versão antiga)."""
+        with self._lock:
+            if versao != self._versao:
+                self._trocar_versao(versao)
+
+    def obter(self, versao, chave: Hashable, calcular: Callable[[], object]):
+        """Retorna o resultado em cache para (versão, chave) ou calcula, congela e guarda."""
+        with self._lock:
+            substituida = versao in self._versoes_substituidas
+            if not substituida:
+                if versao != self._versao:
+                    self._trocar_versao(versao)
+                item = self._dados.get(chave)
+                if item is not None:
+                    self._dados.move_to_end(chave)
+                    self.contadores['hits'] += 1
+                    return item[0]
+                self.contadores['misses'] += 1
+        if substituida:
+            return congelar(calcular())
+
+        # O cálculo roda fora do lock; duas threads podem calcular a mesma chave, sem problema
+        valor = congelar(calcular())
+        tamanho = tamanho_aproximado(chave) + tamanho_aproximado(valor)
+        with self._lock:
+            if versao != self._versao or tamanho > self.max_bytes:
+                return valor
+            antigo = self._dados.pop(chave, None)
+            if antigo is not None:
+                self._bytes -= antigo[1]
+            self._dados[chave] = (valor, tamanho)
+            self._bytes += tamanho
+            while self._bytes > self.max_bytes:
+                _, (_, tamanho_removido) = self._dados.popitem(last=False)
+                self._bytes -= tamanho_removido
+                self.contadores['despejos'] += 1
+        return valor
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+            self._bytes = 0
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return {**self.contadores, 'entradas': len(self._dados), 'bytes': self._bytes,
+                    'max_bytes': self.max_bytes, 'versao_dataset': self._versao}
+
+
+# Instância única usada por todas as BaseDeDados do processo (CACHE_CONSULTAS_MAX_BYTES)
+cache_consultas = CacheConsultas(max_bytes=int(os.environ.get('CACHE_CONSULTAS_MAX_BYTES', str(16 * 1024 * 1024))))
@@ -0,0 +1,127 @@
+# competencias.py
+"""
+Aderência entre os conhecimentos dos candidatos ('conhecimentos_tecnicos') e as competências
+pedidas nas vagas ('competencia_tecnicas_e_comportamentais').
+
+Os textos são quebrados em termos de um vocabulário compartilhado e viram duas matrizes esparsas
+(candidatos x termos e vagas x termos), com peso IDF e linhas normalizadas: a aderência é o
+cosseno entre as linhas. Pontuar todos os candidatos contra uma vaga (ou todas as vagas contra
+um candidato) é um único produto matriz esparsa x vetor, seguido de uma seleção top-k.
+"""
+import numpy as np
+import scipy.sparse as sp
+
+from indices import tokenizar
+
+# Palavras sem valor para comparar competências (conectivos e termos genéricos dos textos das vagas)
+STOP_WORDS_COMPETENCIAS = frozenset({
+    'a', 'ao', 'as', 'com', 'como', 'da', 'das', 'de', 'do', 'dos', 'e', 'em', 'na', 'nas', 'no', 'nos',
+    'o', 'os', 'ou', 'para', 'pela', 'pelo', 'por', 'que', 'se', 'sobre', 'um', 'uma',
+    'conhecimento', 'conhecimentos', 'experiencia', 'experiencias', 'desejavel', 'desejaveis',
+    'obrigatorio', 'obrigatorios', 'requisitos', 'nivel', 'bom', 'boa', 'ter', 'ser',
+})
+
+
+class MatrizCompetencias:
+    """
+    Matrizes esparsas de termos (CSR, float32) de candidatos e vagas, construídas uma vez.
+    As linhas seguem a ordem das listas recebidas (as posições das tabelas da BaseDeDados).
+    """
+    def __init__(self, textos_candidatos: list, textos_vagas: list, stop_words=STOP_WORDS_COMPETENCIAS):
+        self.stop_words = frozenset(stop_words)
+        self._vocabulario = {}
+        # Textos repetidos (listas de conhecimentos costumam se repetir) são tokenizados uma vez
+        memo = {}
+        candidatos = self._matriz_binaria(textos_candidatos, memo)
+        vagas = self._matriz_binaria(textos_vagas, memo)
+        n_termos = len(self._vocabulario)
+        candidatos.resize((candidatos.shape[0], n_termos))
+        vagas.resize((vagas.shape[0], n_termos))
+
+        # IDF sobre as duas bases: termos presentes em quase todo texto ('python', 'sql') pesam menos
+        frequencia = np.bincount(candidatos.indices, minlength=n_termos) + np.bincount(vagas.indices, minlength=n_termos)
+        n_textos = candidatos.shape[0] + vagas.shape[0]
+        self.idf = (np.log((1 + n_textos) / (1 + frequencia)) + 1).astype(np.float32)
+        self.candidatos = self._normalizar(candidatos)
+        self.vagas = self._normalizar(vagas)
+        self.termos = np.empty(n_termos, dtype=object)
+        for termo, coluna in self._vocabulario.items():
+            self.termos[coluna] = termo
+
+    def _ids_termos(self, texto) -> list:
+        ids = {self._vocabulario.setdefault(t, len(self._vocabulario))
+               for t in tokenizar(texto) if t not in self.stop_words}
+        return sorted(ids)
+
+    def _matriz_binaria(self, textos, memo) -> sp.csr_matrix:
+        indptr = [0]
+        indices = []
+        for texto in textos:
+            ids = memo.get(texto)
+            if ids is None:
+                ids = memo[texto] = self._ids_termos(texto)
+            indices.extend(ids)
+            indptr.append(len(indices))
+        indices = np.asarray(indices, dtype=np.int32)
+        dados = np.ones(len(indices), dtype=np.float32)
+        return sp.csr_matrix((dados, indices, np.asarray(indptr, dtype=np.int64)),
+                             shape=(len(textos), max(len(self._vocabulario), 1)))
+
+    def _normalizar(self, matriz: sp.csr_matrix) -> sp.csr_matrix:
+        """Aplica o IDF e normaliza cada linha (norma L2 = 1), direto no vetor de dados da CSR."""
+        linhas = np.repeat(np.arange(matriz.shape[0]), np.diff(matriz.indptr))
+        matriz.data *= self.idf[matriz.indices]
+        normas = np.sqrt(np.bincount(linhas, weights=matriz.data ** 2, minlength=matriz.shape[0]))
+        matriz.data /= normas[linhas].astype(np.float32)
+        return matriz
+
+    @property
+    def n_termos(self) -> int:
+        return len(self.termos)
+
+    @staticmethod
+    def _linha(matriz: sp.csr_matrix, posicao: int):
+        """(colunas, pesos) de uma linha, lidos direto dos vetores da CSR (sem criar uma matriz 1 x n)."""
+        inicio, fim = matriz.indptr[posicao], matriz.indptr[posicao + 1]
+        return matriz.indices[inicio:fim], matriz.data[inicio:fim]
+
+    def _vetor_denso(self, matriz: sp.csr_matrix, posicao: int) -> np.ndarray:
+        colunas, pesos = self._linha(matriz, posicao)
+        vetor = np.zeros(self.n_termos, dtype=np.float32)
+        vetor[colunas] = pesos
+        return vetor
+
+    @staticmethod
+    def _top_k(pontos: np.ndarray, k: int, posicoes=None):
+        """(posições, pontos) dos k maiores pontos > 0, em ordem decrescente (empate: menor posição)."""
+        if posicoes is not None:
+            posicoes = np.asarray(posicoes, dtype=np.int64)
+            pontos = pontos[posicoes]
+        # Seleção parcial O(n) sobre o vetor inteiro; só os k escolhidos são ordenados. Seleciona as k
+        # primeiras de -pontos: pedir as k últimas de 'pontos' degrada com muitos empates de pontuação.
+        escolhidos = np.argpartition(-pontos, k - 1)[:k] if k < pontos.size else np.arange(pontos.size)
+        escolhidos = escolhidos[pontos[escolhidos] > 0]
+        escolhidos = escolhidos[np.lexsort((escolhidos, -pontos[escolhidos]))]
+        pontos_escolhidos = pontos[escolhidos]
+        if posicoes is not None:
+            escolhidos = posicoes[escolhidos]
+        return escolhidos, pontos_escolhidos
+
+    def candidatos_para_vaga(self, posicao_vaga: int, k: int = 10, posicoes_candidatos=None):
+        """
+        Os k candidatos mais aderentes à vaga: (posições em df_applicants, aderência de 0 a 1).
+        'posicoes_candidatos' restringe o ranking a um subconjunto (ex.: os prospects da vaga).
+        """
+        pontos = self.candidatos @ self._vetor_denso(self.vagas, posicao_vaga)
+        return self._top_k(pontos, k, posicoes_candidatos)
+
+    def vagas_para_candidato(self, posicao_candidato: int, k: int = 10):
+        """As k vagas mais aderentes ao candidato: (posições em df_vagas, aderência de 0 a 1)."""
+        pontos = self.vagas @ self._vetor_denso(self.candidatos, posicao_candidato)
+        return self._top_k(pontos, k)
+
+    def termos_em_comum(self, posicao_candidato: int, posicao_vaga: int) -> list:
+        """Termos presentes nos dois textos, dos mais raros (mais informativos) aos mais comuns."""
+        comuns = np.intersect1d(self._linha(self.candidatos, posicao_candidato)[0], self._linha(self.vagas, posicao_vaga)[0])
+        comuns = comuns[np.argsort(-self.idf[comuns], kind='stable')]
+        return self.termos[comuns].tolist()
@@ -0,0 +1,148 @@
+# compilar_dataset.py
+"""
+Compila os Parquets brutos em um snapshot otimizado que a BaseDeDados carrega sem reprocessar:
+- colunas de baixa cardinalidade já gravadas como 'category' (dicionário no Parquet);
+- tabelas ordenadas pelas chaves de busca (id_vaga, (id_vaga, codigo), id_candidato);
+- colunas de texto normalizado (sem acento, minúsculas) pré-calculadas;
+- índices de busca serializados e um carimbo de versão (snapshot.json).
+
+Uso: python compilar_dataset.py [--entrada data_processed] [--saida data_compiled] [--todas-colunas]
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+from agent import (BaseDeDados, otimizar_dataframe, versao_dos_arquivos,
+                   FORMATO_SNAPSHOT, ARQUIVO_SNAPSHOT, ARQUIVO_INDICES)
+from dados_compartilhados import COLUNAS_USADAS
+from indices import normalizar_texto
+from preprocess import PASTA_PARQUET_SAIDA
+
+PASTA_SNAPSHOT = 'data_compiled'
+
+# Chaves pelas quais cada tabela é ordenada (as mesmas usadas nas buscas)
+CHAVES_ORDENACAO = {
+    'vagas': ['id_vaga'],
+    'prospects': ['id_vaga', 'codigo'],
+    'applicants': ['id_candidato'],
+}
+
+# Colunas de texto normalizado pré-calculadas: {tabela: {coluna_origem: coluna_normalizada}}
+COLUNAS_NORMALIZADAS = {
+    'vagas': {'titulo_vaga': 'titulo_vaga_norm'},
+    'prospects': {'nome': 'nome_norm'},
+}
+
+
+def _rss_mb():
+    """RSS atual do processo em MB (Linux)."""
+    with open('/proc/self/status') as f:
+        for linha in f:
+            if linha.startswith('VmRSS:'):
+                return int(linha.split()[1]) / 1024
+    return float('nan')
+
+
+def preparar_tabela(df, tabela, todas_colunas=False):
+    """Projeta, ordena, adiciona o texto normalizado e fixa as categorias de uma tabela."""
+    if not todas_colunas:
+        df = df[[c for c in COLUNAS_USADAS[tabela] if c in df.columns]]
+    df = df.sort_values(CHAVES_ORDENACAO[tabela], kind='stable').reset_index(drop=True)
+    for origem, destino in COLUNAS_NORMALIZADAS.get(tabela, {}).items():
+        df[destino] = [normalizar_texto(v) for v in df[origem].tolist()]
+    return otimizar_dataframe(df)
+
+
+def compilar(pasta_entrada=PASTA_PARQUET_SAIDA, pasta_saida=PASTA_SNAPSHOT, todas_colunas=False, stop_words=None):
+    """Gera o snapshot em uma pasta temporária e o coloca no lugar de 'pasta_saida' ao final."""
+    inicio = time.time()
+    caminhos = {t: os.path.join(pasta_entrada, f"{t}.parquet") for t in CHAVES_ORDENACAO}
+    versao = versao_dos_arquivos(*caminhos.values())
+
+    db = BaseDeDados.__new__(BaseDeDados)
+    tabelas = {t: preparar_tabela(pd.read_parquet(c), t, todas_colunas) for t, c in caminhos.items()}
+    db.df_vagas, db.df_prospects, db.df_applicants = tabelas['vagas'], tabelas['prospects'], tabelas['applicants']
+
+    # Os índices são construídos sobre o texto já normalizado (a normalização é idempotente)
+    db.df_vagas = db.df_vagas.assign(titulo_vaga=db.df_vagas['titulo_vaga_norm'])
+    db.df_prospects = db.df_prospects.assign(nome=db.df_prospects['nome_norm'])
+    db.construir_indices(stop_words)
+    indices = db.exportar_indices()
+
+    pasta_pai = os.path.dirname(os.path.abspath(pasta_saida))
+    pasta_temp = tempfile.mkdtemp(prefix='.snapshot-', dir=pasta_pai)
+    try:
+        for tabela, df in tabelas.items():
+            df.to_parquet(os.path.join(pasta_temp, f"{tabela}.parquet"), index=False)
+        with open(os.path.join(pasta_temp, ARQUIVO_INDICES), 'wb') as f:
+            pickle.dump(indices, f, protocol=pickle.HIGHEST_PROTOCOL)
+        metadados = {
+            'formato': FORMATO_SNAPSHOT,
+            'versao': versao,
+            'criado_em': time.time(),
+            'origem': os.path.abspath(pasta_entrada),
+            'stop_words': sorted(indices['indice_vagas'].stop_words),
+            'tabelas': {t: {'linhas': len(df), 'colunas': list(df.columns),
+                            'categorias': [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]}
+                        for t, df in tabelas.items()},
+        }
+        with open(os.path.join(pasta_temp, ARQUIVO_SNAPSHOT), 'w', encoding='utf-8') as f:
+            json.dump(metadados, f, indent=2, ensure_ascii=False)
+        if os.path.exists(pasta_saida):
+            shutil.rmtree(pasta_saida)
+        os.replace(pasta_temp, pasta_saida)
+    except Exception:
+        shutil.rmtree(pasta_temp, ignore_errors=True)
+        raise
+    print(f"Snapshot '{versao}' compilado em '{pasta_saida}' ({time.time() - inicio:.2f}s).")
+    return metadados
+
+
+def _medir_carga(modo, pasta_entrada, pasta_snapshot, fila):
+    """Roda em um processo novo: mede o tempo e a RSS adicional da carga da base."""
+    import contextlib
+    import io
+    rss_antes = _rss_mb()
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if modo == 'snapshot':
+            db = BaseDeDados.de_snapshot(pasta_snapshot)
+        else:
+            db = BaseDeDados(*(os.path.join(pasta_entrada, f"{t}.parquet") for t in CHAVES_ORDENACAO))
+    fila.put((time.perf_counter() - inicio, _rss_mb() - rss_antes, db.versao))
+
+
+def relatorio_carga(pasta_entrada=PASTA_PARQUET_SAIDA, pasta_snapshot=PASTA_SNAPSHOT):
+    """Compara tempo de carga e memória residente: Parquet bruto x snapshot compilado."""
+    contexto = mp.get_context('spawn')
+    resultados = {}
+    for modo in ('parquet bruto', 'snapshot'):
+        fila = contexto.Queue()
+        processo = contexto.Process(target=_medir_carga, args=(modo, pasta_entrada, pasta_snapshot, fila))
+        processo.start()
+        resultados[modo] = fila.get()
+        processo.join()
+    print(f"{'modo':<16}{'carga (s)':>10}{'RSS (MB)':>10}  versão")
+    for modo, (segundos, rss, versao) in resultados.items():
+        print(f"{modo:<16}{segundos:>10.2f}{rss:>10.1f}  {versao}")
+    return resultados
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compila os Parquets em um snapshot indexado para a BaseDeDados.")
+    parser.add_argument('--entrada', default=PASTA_PARQUET_SAIDA, help="Pasta com vagas/prospects/applicants.parquet")
+    parser.add_argument('--saida', default=PASTA_SNAPSHOT, help="Pasta onde o snapshot será gravado")
+    parser.add_argument('--todas-colunas', action='store_true', help="Mantém todas as colunas (por padrão só as usadas pelos agentes)")
+    parser.add_argument('--sem-relatorio', action='store_true', help="Não mede tempo de carga e memória ao final")
+    args = parser.parse_args()
+
+    compilar(args.entrada, args.saida, todas_colunas=args.todas_colunas)
+    if not args.sem_relatorio:
+        relatorio_carga(args.entrada, args.saida)
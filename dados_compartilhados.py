@@ -0,0 +1,79 @@
+# dados_compartilhados.py
+import json
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Colunas realmente usadas pelos agentes, pela API e pelos logs de drift.
+# Só elas são materializadas no modo compartilhado (projeção de colunas).
+COLUNAS_USADAS = {
+    'vagas': ['id_vaga', 'titulo_vaga', 'cliente', 'nivel profissional', 'competencia_tecnicas_e_comportamentais'],
+    'prospects': ['id_vaga', 'codigo', 'nome', 'situacao_candidado'],
+    'applicants': ['id_candidato', 'nome', 'conhecimentos_tecnicos'],
+}
+
+# Chave de metadados do schema Arrow que registra de qual Parquet (e com quais colunas) o arquivo veio
+_CHAVE_ORIGEM = b'recruta.origem'
+
+
+def _assinatura_origem(caminho_parquet, colunas):
+    info = os.stat(caminho_parquet)
+    return json.dumps({'tamanho': info.st_size, 'mtime_ns': info.st_mtime_ns, 'colunas': colunas}, sort_keys=True).encode()
+
+
+def _arrow_atual(caminho_arrow, assinatura):
+    try:
+        with pa.memory_map(caminho_arrow, 'r') as origem:
+            metadados = pa.ipc.open_file(origem).schema.metadata or {}
+    except (FileNotFoundError, pa.ArrowInvalid):
+        return False
+    return metadados.get(_CHAVE_ORIGEM) == assinatura
+
+
+def materializar_arrow(caminhos_parquet: dict, pasta_arrow: str, colunas: dict = None) -> dict:
+    """
+    Converte cada Parquet em um arquivo Arrow IPC sem compressão, apenas com as colunas usadas.
+    Arquivos já atualizados (mesmo Parquet de origem e mesmas colunas) são reaproveitados, então
+    só o primeiro worker a subir paga a conversão. A escrita é atômica (arquivo temporário + os.replace).
+    'caminhos_parquet' é um dicionário {nome_tabela: caminho}.
+    """
+    colunas = COLUNAS_USADAS if colunas is None else colunas
+    os.makedirs(pasta_arrow, exist_ok=True)
+    caminhos_arrow = {}
+    for tabela, caminho_parquet in caminhos_parquet.items():
+        caminho_arrow = os.path.join(pasta_arrow, f"{tabela}.arrow")
+        caminhos_arrow[tabela] = caminho_arrow
+
+        schema_parquet = pq.read_schema(caminho_parquet)
+        projecao = [c for c in colunas.get(tabela, schema_parquet.names) if c in schema_parquet.names]
+        assinatura = _assinatura_origem(caminho_parquet, projecao)
+        if _arrow_atual(caminho_arrow, assinatura):
+            continue
+
+        tabela_arrow = pq.read_table(caminho_parquet, columns=projecao)
+        # Os metadados do pandas (índice original) são descartados: as tabelas são acessadas por posição
+        tabela_arrow = tabela_arrow.replace_schema_metadata({_CHAVE_ORIGEM: assinatura})
+        descritor, caminho_temp = tempfile.mkstemp(prefix=f".{tabela}-", suffix='.arrow', dir=pasta_arrow)
+        try:
+            with os.fdopen(descritor, 'wb') as destino, pa.ipc.new_file(destino, tabela_arrow.schema) as escritor:
+                escritor.write_table(tabela_arrow)
+            os.replace(caminho_temp, caminho_arrow)
+        except Exception:
+            if os.path.exists(caminho_temp):
+                os.remove(caminho_temp)
+            raise
+    return caminhos_arrow
+
+
+def abrir_tabela_arrow(caminho_arrow: str) -> pd.DataFrame:
+    """
+    Abre o arquivo Arrow com memory-map somente leitura e devolve um DataFrame cujas colunas
+    (dtypes 'pyarrow') apontam direto para as páginas mapeadas: nenhuma cópia é feita, e as
+    páginas ficam no page cache do SO, compartilhadas entre todos os workers.
+    """
+    origem = pa.memory_map(caminho_arrow, 'r')
+    tabela = pa.ipc.open_file(origem).read_all()
+    return tabela.to_pandas(types_mapper=pd.ArrowDtype, ignore_metadata=True)
@@ -1,75 +1,86 @@
 import streamlit as st
 import pandas as pd
-import json
 import plotly.express as px
 
+from ingestao_logs import (IngestorLogs, carregar_rollups, resumo_rollups, percentis_por_minuto,
+                           percentis_por_etapa, ler_ultimas_linhas)
+
 st.set_page_config(layout="wide", page_title="Dashboard de Monitoramento - Decision AI")
 
 st.title("Painel de Monitoramento do Agente de Recrutamento")
 st.markdown("Este painel analisa os logs da API para monitorar o comportamento e detectar drifts de dados.")
 
 LOG_FILE = "app_logs.log"
+PASTA_ROLLUPS = "logs_rollups"
+
+@st.cache_resource
+def obter_ingestor(log_file_path):
+    """Um único ingestor por processo: ele guarda o offset já lido do log."""
+    return IngestorLogs(log_file_path, PASTA_ROLLUPS)
+
+@st.cache_data(ttl=10) # Atualiza a cada 10s, lendo apenas as linhas novas do log
+def load_data(log_file_path, horas):
+    """Ingere o que foi escrito desde a última atualização e devolve os rollups por minuto do período."""
+    obter_ingestor(log_file_path).ingerir()
+    desde = pd.Timestamp.now().floor('min') - pd.Timedelta(hours=horas) if horas else None
+    return carregar_rollups(PASTA_ROLLUPS, desde=desde)
 
-@st.cache_data(ttl=10) # Reduzi o tempo de cache para atualizações mais rápidas
-def load_data(log_file_path):
-    """Lê e processa o arquivo de log JSON para um DataFrame."""
-    log_entries = []
-    try:
-        with open(log_file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                try:
-                    log_entries.append(json.loads(line))
-                except json.JSONDecodeError:
-                    continue # Ignora linhas que não são JSON válido
-        df = pd.DataFrame(log_entries)
-        # Converte a coluna de tempo para o formato datetime, se ela existir
-        if 'asctime' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['asctime'])
-        return df
-    except FileNotFoundError:
-        return pd.DataFrame()
-
-df = load_data(LOG_FILE)
-
-if df.empty:
+horas = st.sidebar.selectbox("Período", options=[1, 6, 24, 24 * 7, 0], index=2,
+                             format_func=lambda h: "Tudo" if h == 0 else f"Últimas {h}h")
+df_minutos, df_contagens, df_etapas = load_data(LOG_FILE, horas)
+
+if df_minutos.empty:
     st.warning("Nenhum dado de log encontrado. Use a API para gerar logs e este painel será atualizado.")
 else:
     # --- Métricas Gerais ---
     st.subheader("Métricas Gerais de Uso")
-    
-    total_reqs = len(df[df['message'] == 'Requisição finalizada'])
-    total_erros = len(df[df['levelname'] == 'ERROR'])
-
-    # CORREÇÃO: Lógica defensiva para calcular a duração média
-    avg_duration = 0.0
-    # 1. Verifica se a coluna 'duration_ms' existe no DataFrame
-    if 'duration_ms' in df.columns:
-        # 2. Remove valores nulos e calcula a média apenas se houver dados
-        duration_data = df['duration_ms'].dropna()
-        if not duration_data.empty:
-            avg_duration = duration_data.mean()
-
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Total de Interações", f"{total_reqs}")
-    col2.metric("Total de Erros", f"{total_erros}")
-    # 3. Exibe o valor calculado de forma segura
-    col3.metric("Duração Média (ms)", f"{avg_duration:.2f}")
+    resumo = resumo_rollups(df_minutos)
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total de Interações", f"{resumo['requisicoes']}")
+    col2.metric("Total de Erros", f"{resumo['erros']}")
+    col3.metric("Duração Média (ms)", f"{resumo['duracao_media_ms']:.2f}")
+    col4.metric("Duração p95 (ms)", f"{resumo['p95_ms']:.0f}" if resumo['p95_ms'] is not None else "-")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Requisições e erros por minuto**")
+        st.line_chart(df_minutos.set_index('minuto')[['requisicoes', 'erros']])
+    with col2:
+        st.markdown("**Percentis de duração por minuto (ms)**")
+        st.line_chart(percentis_por_minuto(df_minutos))
+        st.caption("Percentis aproximados pelos baldes do histograma de duração (resolução de ~25%).")
+
+    # --- Latência por Etapa ---
+    st.markdown("**Latência por etapa do atendimento (ms)**")
+    etapas_resumo = percentis_por_etapa(df_etapas)
+    if not etapas_resumo.empty:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.dataframe(etapas_resumo.round(3))
+        with col2:
+            fig_etapas = px.bar(etapas_resumo.reset_index(names='etapa').melt(id_vars='etapa', value_vars=['p50_ms', 'p95_ms', 'p99_ms'],
+                                                                             var_name='percentil', value_name='ms'),
+                                x='etapa', y='ms', color='percentil', barmode='group', log_y=True,
+                                title="Percentis por etapa (escala log)")
+            st.plotly_chart(fig_etapas, use_container_width=True)
+        st.caption("Buscas na base, montagem do dossiê, construção do agente e chamada ao LLM, medidas em cada requisição.")
+    else:
+        st.info("Aguardando logs com tempos por etapa ('etapas_ms').")
 
     st.divider()
 
     # --- Análise de Drift de Dados ---
     st.subheader("Monitoramento de Drift de Dados")
-    
-    df_vagas_log = df[df['message'] == 'Vaga Identificada'].copy()
 
-    if not df_vagas_log.empty:
+    if not df_contagens.empty:
+        totais = df_contagens.groupby(['dimensao', 'valor'], as_index=False, observed=True)['contagem'].sum()
         col1, col2 = st.columns(2)
 
         with col1:
             st.markdown("**Distribuição de Nível Profissional (Drift)**")
-            # Garante que a coluna existe antes de usar
-            if 'nivel_profissional' in df_vagas_log.columns:
-                drift_chart_data = df_vagas_log['nivel_profissional'].value_counts().reset_index()
+            drift_chart_data = totais[totais['dimensao'] == 'nivel_profissional'].rename(columns={'valor': 'nivel_profissional', 'contagem': 'count'})
+            if not drift_chart_data.empty:
                 fig = px.bar(drift_chart_data, x='nivel_profissional', y='count', title="Contagem de vagas por nível profissional", text_auto=True)
                 st.plotly_chart(fig, use_container_width=True)
                 st.caption("Acompanhe se a proporção de vagas Jr/Pl/Sr está mudando ao longo do tempo.")
@@ -78,9 +89,8 @@ else:
 
         with col2:
             st.markdown("**Top 5 Clientes com Vagas Buscadas**")
-            # Garante que a coluna existe antes de usar
-            if 'cliente' in df_vagas_log.columns:
-                top_clients_data = df_vagas_log['cliente'].value_counts().nlargest(5).reset_index()
+            top_clients_data = totais[totais['dimensao'] == 'cliente'].nlargest(5, 'contagem').rename(columns={'valor': 'cliente', 'contagem': 'count'})
+            if not top_clients_data.empty:
                 fig_clients = px.pie(top_clients_data, names='cliente', values='count', title="Distribuição de vagas por cliente (Top 5)")
                 st.plotly_chart(fig_clients, use_container_width=True)
             else:
@@ -90,7 +100,7 @@ else:
         st.info("Ainda não há dados suficientes de vagas para exibir os gráficos de drift.")
 
     st.divider()
-    
+
     st.subheader("Visualizador de Logs Recentes")
     if st.checkbox("Mostrar logs brutos"):
-        st.dataframe(df.tail(100))
\ No newline at end of file
+        st.dataframe(ler_ultimas_linhas(LOG_FILE, 100))
@@ -0,0 +1,84 @@
+# historico.py
+import os
+from typing import Callable, Optional
+
+from llama_index.core.llms import ChatMessage
+
+# Cabeçalho da mensagem de sistema que guarda os fatos das rodadas antigas já compactadas
+PREFIXO_RESUMO = "RESUMO DA CONVERSA ANTERIOR (fatos já coletados):"
+
+# Tokens extras por mensagem (papel e separadores do template de chat)
+TOKENS_POR_MENSAGEM = 4
+
+
+def estimar_tokens(texto: Optional[str]) -> int:
+    """Estimativa barata de tokens (~4 caracteres por token), sem depender do tokenizer do modelo."""
+    return len(texto or '') // 4 + 1
+
+
+def _encurtar(texto: str, limite: int) -> str:
+    texto = ' '.join((texto or '').split())
+    return texto if len(texto) <= limite else texto[:limite - 3] + '...'
+
+
+class GerenciadorHistorico:
+    """
+    Mantém o histórico enviado ao LLM dentro de um orçamento de tokens.
+    O prompt de sistema e as mensagens mais recentes são sempre preservados; as rodadas mais
+    antigas são dobradas em uma mensagem de "fatos coletados" (pergunta -> resposta do candidato),
+    que é atualizada a cada compactação.
+    """
+    def __init__(self, max_tokens: Optional[int] = None, mensagens_recentes: int = 6,
+                 max_tokens_resumo: Optional[int] = None, contador: Callable[[str], int] = estimar_tokens):
+        self.max_tokens = max_tokens or int(os.environ.get('HISTORICO_MAX_TOKENS', '3000'))
+        self.mensagens_recentes = mensagens_recentes
+        self.max_tokens_resumo = max_tokens_resumo or self.max_tokens // 4
+        self.contador = contador
+
+    def tokens(self, historico: list) -> int:
+        """Tokens (estimados) de um histórico completo, como seria enviado ao LLM."""
+        return sum(self.contador(m.content) + TOKENS_POR_MENSAGEM for m in historico)
+
+    @staticmethod
+    def _eh_resumo(mensagem) -> bool:
+        return getattr(mensagem.role, 'value', mensagem.role) == "system" and (mensagem.content or '').startswith(PREFIXO_RESUMO)
+
+    def compactar(self, historico: list) -> list:
+        """Retorna o histórico dentro do orçamento (o próprio objeto, se nada precisou mudar)."""
+        if self.tokens(historico) <= self.max_tokens:
+            return historico
+
+        sistema, resto = historico[0], historico[1:]
+        fatos = []
+        if resto and self._eh_resumo(resto[0]):
+            fatos = [linha for linha in resto[0].content.splitlines()[1:] if linha.startswith('- ')]
+            resto = resto[1:]
+
+        # Mantém as mensagens recentes; se ainda estourar o orçamento, cede mais mensagens ao resumo
+        # (a última mensagem, que é a pergunta atual do usuário, nunca é dobrada)
+        corte = max(len(resto) - self.mensagens_recentes, 0)
+        orcamento_recentes = self.max_tokens - self.tokens([sistema]) - self.max_tokens_resumo
+        while corte < len(resto) - 1 and self.tokens(resto[corte:]) > orcamento_recentes:
+            corte += 1
+        antigos, recentes = resto[:corte], resto[corte:]
+
+        ultima_pergunta = None
+        for mensagem in antigos:
+            papel = getattr(mensagem.role, 'value', mensagem.role)
+            if papel == "assistant":
+                ultima_pergunta = mensagem.content
+            elif papel == "user":
+                if ultima_pergunta:
+                    fatos.append(f"- P: {_encurtar(ultima_pergunta, 120)} | R: {_encurtar(mensagem.content, 300)}")
+                else:
+                    fatos.append(f"- R: {_encurtar(mensagem.content, 300)}")
+                ultima_pergunta = None
+
+        # O resumo também tem teto: os fatos mais antigos saem primeiro
+        while fatos and self.contador('\n'.join([PREFIXO_RESUMO, *fatos])) + TOKENS_POR_MENSAGEM > self.max_tokens_resumo:
+            fatos.pop(0)
+
+        compactado = [sistema]
+        if fatos:
+            compactado.append(ChatMessage(role="system", content='\n'.join([PREFIXO_RESUMO, *fatos])))
+        return compactado + recentes
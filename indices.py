@@ -0,0 +1,173 @@
+# indices.py
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Iterable, Optional
+
+import numpy as np
+
+# Palavras ignoradas na busca de vagas por padrão (podem ser substituídas na BaseDeDados)
+STOP_WORDS_PADRAO = frozenset({'vaga', 'de', 'para', 'a', 'o'})
+
+_RE_TOKEN = re.compile(r'\w+')
+_VAZIO = np.empty(0, dtype=np.int64)
+
+
+def normalizar_texto(texto) -> str:
+    """Remove acentos e converte para minúsculas ('Função' -> 'funcao')."""
+    if texto is None or (isinstance(texto, float) and np.isnan(texto)):
+        return ''
+    decomposto = unicodedata.normalize('NFKD', str(texto))
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def tokenizar(texto) -> list:
+    """Quebra um texto normalizado em tokens alfanuméricos."""
+    return _RE_TOKEN.findall(normalizar_texto(texto))
+
+
+class IndiceInvertido:
+    """
+    Índice invertido token -> posições de linha, construído uma única vez na carga.
+    Uma consulta com várias palavras intersecta as listas de postings de cada palavra,
+    sem varrer a tabela inteira.
+    """
+    def __init__(self, textos: Iterable, stop_words: Optional[Iterable[str]] = None):
+        self.stop_words = frozenset(normalizar_texto(w) for w in (STOP_WORDS_PADRAO if stop_words is None else stop_words))
+
+        postings = defaultdict(list)
+        tamanhos = []
+        for posicao, texto in enumerate(textos):
+            tokens = {t for t in tokenizar(texto) if t not in self.stop_words}
+            for token in tokens:
+                postings[token].append(posicao)
+            tamanhos.append(max(len(tokens), 1))
+
+        # As posições já chegam em ordem crescente, o que permite intersecções com assume_unique
+        self._postings = {token: np.asarray(pos, dtype=np.int64) for token, pos in postings.items()}
+        self._vocabulario = sorted(self._postings)
+        self._tamanhos = np.asarray(tamanhos, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._tamanhos)
+
+    def tokens_consulta(self, texto) -> list:
+        """Tokens relevantes de uma consulta, sem stop words e sem repetições."""
+        return list(dict.fromkeys(t for t in tokenizar(texto) if t not in self.stop_words))
+
+    def _postings_por_prefixo(self, prefixo: str) -> np.ndarray:
+        """Une as postings de todos os tokens que começam com o prefixo (busca binária no vocabulário)."""
+        inicio = bisect_left(self._vocabulario, prefixo)
+        listas = []
+        for token in self._vocabulario[inicio:]:
+            if not token.startswith(prefixo):
+                break
+            listas.append(self._postings[token])
+        if not listas:
+            return _VAZIO
+        if len(listas) == 1:
+            return listas[0]
+        return np.unique(np.concatenate(listas))
+
+    def buscar(self, texto) -> np.ndarray:
+        """
+        Retorna as posições das linhas que contêm TODAS as palavras da consulta,
+        ordenadas da melhor para a pior correspondência.
+        Cada palavra casa com tokens inteiros ou com prefixos deles ('engenh' -> 'engenheiro').
+        """
+        keywords = self.tokens_consulta(texto)
+        if not keywords:
+            return _VAZIO
+
+        # Começa pela palavra mais seletiva para manter as intersecções pequenas
+        candidatos_por_kw = sorted((self._postings_por_prefixo(kw) for kw in keywords), key=len)
+        candidatos = candidatos_por_kw[0]
+        for postings in candidatos_por_kw[1:]:
+            if candidatos.size == 0:
+                break
+            candidatos = np.intersect1d(candidatos, postings, assume_unique=True)
+        if candidatos.size == 0:
+            return _VAZIO
+
+        # Ranking: token exato vale mais que prefixo; em caso de empate, títulos mais
+        # específicos (maior fração dos tokens coberta pela consulta) vêm primeiro.
+        pontos = np.zeros(candidatos.size)
+        for kw in keywords:
+            pontos += np.where(np.isin(candidatos, self._postings.get(kw, _VAZIO), assume_unique=True), 2.0, 1.0)
+        cobertura = len(keywords) / self._tamanhos[candidatos]
+        ordem = np.lexsort((candidatos, -cobertura, -pontos))
+        return candidatos[ordem]
+
+
+def trigramas(texto_normalizado: str) -> frozenset:
+    """Trigramas de cada palavra (com bordas, no estilo do pg_trgm) para comparar nomes com erros de digitação."""
+    resultado = set()
+    for palavra in texto_normalizado.split():
+        palavra = f"  {palavra} "
+        resultado.update(palavra[i:i + 3] for i in range(len(palavra) - 2))
+    return frozenset(resultado)
+
+
+class IndiceNomes:
+    """
+    Agrupa linhas por uma chave (ex.: id_vaga) e guarda os nomes já normalizados
+    de cada linha, para que a busca de um nome percorra apenas as linhas daquela chave.
+    """
+    def __init__(self, chaves: Iterable, nomes: Iterable):
+        grupos = defaultdict(list)
+        self._nomes = []
+        self._tokens = []
+        self._trigramas = []
+        for posicao, (chave, nome) in enumerate(zip(chaves, nomes)):
+            grupos[chave].append(posicao)
+            nome_norm = ' '.join(tokenizar(nome))
+            self._nomes.append(nome_norm)
+            self._tokens.append(tuple(nome_norm.split()))
+            self._trigramas.append(trigramas(nome_norm))
+        self._grupos = {chave: np.asarray(pos, dtype=np.int64) for chave, pos in grupos.items()}
+
+    def posicoes(self, chave) -> np.ndarray:
+        """Posições de todas as linhas da chave (lista vazia se a chave não existe)."""
+        return self._grupos.get(chave, _VAZIO)
+
+    def similaridade(self, posicao: int, tokens_consulta: list, trigramas_consulta: frozenset) -> float:
+        """
+        Similaridade entre 0 e 1: o maior valor entre a fração das palavras da consulta
+        presentes no nome (por palavra inteira ou prefixo) e o coeficiente de Dice dos trigramas.
+        """
+        tokens_nome = self._tokens[posicao]
+        presentes = sum(1 for t in tokens_consulta if any(n.startswith(t) for n in tokens_nome))
+        contencao = presentes / len(tokens_consulta)
+        trig_nome = self._trigramas[posicao]
+        dice = 2 * len(trigramas_consulta & trig_nome) / (len(trigramas_consulta) + len(trig_nome)) if trig_nome else 0.0
+        return max(contencao, dice)
+
+    def buscar(self, nome, chave, limiar: float = 0.0) -> list:
+        """Retorna [(posição, similaridade)] das linhas da chave, da mais para a menos parecida."""
+        tokens_consulta = tokenizar(nome)
+        if not tokens_consulta:
+            return []
+        trig_consulta = trigramas(' '.join(tokens_consulta))
+        nome_consulta = ' '.join(tokens_consulta)
+        resultados = []
+        for posicao in self.posicoes(chave).tolist():
+            score = self.similaridade(posicao, tokens_consulta, trig_consulta)
+            if score >= limiar:
+                # Desempate: nome idêntico primeiro, depois o mais curto (mais próximo do que foi digitado)
+                exato = self._nomes[posicao] == nome_consulta
+                resultados.append((posicao, score, exato))
+        resultados.sort(key=lambda r: (-r[1], not r[2], len(self._nomes[r[0]]), r[0]))
+        return [(posicao, score) for posicao, score, _ in resultados]
+
+
+def indice_unico(*colunas: Iterable) -> dict:
+    """
+    Mapa chave -> posição da PRIMEIRA linha com aquela chave (mesma semântica do antigo 'iloc[0]').
+    Com mais de uma coluna, a chave é a tupla dos valores.
+    """
+    chaves = colunas[0] if len(colunas) == 1 else zip(*colunas)
+    mapa = {}
+    for posicao, chave in enumerate(chaves):
+        mapa.setdefault(chave, posicao)
+    return mapa
@@ -0,0 +1,336 @@
+# ingestao_logs.py
+"""
+Ingestão incremental do app_logs.log para o dashboard.
+
+Em vez de reler o arquivo inteiro a cada atualização, o IngestorLogs lê só os bytes novos
+a partir de um offset persistido (seguindo a rotação app_logs.log -> app_logs.log.1), faz o
+parse das linhas novas em lote e soma o resultado em rollups por minuto guardados em Parquet:
+- rollups_minuto.parquet: requisições, erros, soma das durações e um histograma de durações
+  (baldes fixos, somáveis entre lotes, de onde saem p50/p95/p99);
+- contagens_minuto.parquet: contagens por minuto de nivel_profissional e cliente das vagas buscadas;
+- etapas_minuto.parquet: por minuto e etapa (buscas, agente, LLM), total, soma e histograma dos
+  tempos registrados em 'etapas_ms' no log "Requisição finalizada".
+"""
+import io
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.json as pa_json
+
+PASTA_ROLLUPS = 'logs_rollups'
+ARQUIVO_ESTADO = 'estado.json'
+ARQUIVO_MINUTOS = 'rollups_minuto.parquet'
+ARQUIVO_CONTAGENS = 'contagens_minuto.parquet'
+ARQUIVO_ETAPAS = 'etapas_minuto.parquet'
+
+# Arquivo e chaves de agregação de cada rollup, na ordem devolvida por carregar_rollups
+ROLLUPS = ((ARQUIVO_MINUTOS, ['minuto']), (ARQUIVO_CONTAGENS, ['minuto', 'dimensao', 'valor']),
+           (ARQUIVO_ETAPAS, ['minuto', 'etapa']))
+
+# Bordas (ms) dos baldes do histograma de duração: 1 ms a ~2 min em passos de ~25%
+BORDAS_DURACAO_MS = np.round(np.geomspace(1, 120_000, 54), 1)
+COLUNAS_HISTOGRAMA = [f"h{i:02d}" for i in range(len(BORDAS_DURACAO_MS) + 1)]
+
+# As etapas (buscas em memória) vão de microssegundos a minutos: 10 us a ~2 min em passos de ~25%
+BORDAS_ETAPA_MS = np.round(np.geomspace(0.01, 120_000, 72), 3)
+COLUNAS_HISTOGRAMA_ETAPA = [f"h{i:02d}" for i in range(len(BORDAS_ETAPA_MS) + 1)]
+
+# Dimensões contadas a partir dos registros "Vaga Identificada"
+DIMENSOES_VAGA = ('nivel_profissional', 'cliente')
+
+MENSAGEM_FIM_REQUISICAO = 'Requisição finalizada'
+MENSAGEM_VAGA = 'Vaga Identificada'
+
+
+def _gravar_parquet_atomico(df, caminho):
+    descritor, temporario = tempfile.mkstemp(prefix='.rollup-', suffix='.parquet', dir=os.path.dirname(caminho))
+    os.close(descritor)
+    try:
+        df.to_parquet(temporario, index=False)
+        os.replace(temporario, caminho)
+    except Exception:
+        os.remove(temporario)
+        raise
+
+
+def parse_linhas(bloco: bytes) -> pd.DataFrame:
+    """Converte um bloco de linhas JSON em DataFrame de uma vez; linhas inválidas são ignoradas."""
+    if not bloco.strip():
+        return pd.DataFrame()
+    try:
+        # Parser JSON colunar do Arrow (C++, multithread)
+        return pa_json.read_json(pa.py_buffer(bloco)).to_pandas()
+    except pa.ArrowInvalid:
+        pass
+    try:
+        # Tipos conflitantes entre linhas (ex.: id numérico e texto): parser do pandas
+        return pd.read_json(io.BytesIO(bloco), lines=True, dtype=False, convert_dates=False)
+    except ValueError:
+        # Alguma linha corrompida (ex.: escrita interrompida): cai para o parse linha a linha
+        registros = []
+        for linha in bloco.splitlines():
+            try:
+                registros.append(json.loads(linha))
+            except json.JSONDecodeError:
+                continue
+        return pd.DataFrame(registros)
+
+
+def percentis_do_histograma(contagens: np.ndarray, percentis=(50, 95, 99), bordas=BORDAS_DURACAO_MS) -> dict:
+    """Percentis aproximados (borda superior do balde) a partir das contagens do histograma."""
+    total = contagens.sum()
+    if total == 0:
+        return {f'p{p}_ms': None for p in percentis}
+    acumulado = np.cumsum(contagens)
+    bordas = np.append(bordas, np.inf)
+    resultado = {}
+    for p in percentis:
+        balde = int(np.searchsorted(acumulado, total * p / 100))
+        resultado[f'p{p}_ms'] = float(bordas[min(balde, len(bordas) - 1)])
+    return resultado
+
+
+def _histograma_por_chave(chaves: list, valores: pd.Series, bordas, colunas) -> pd.DataFrame:
+    """Contagens por balde de 'valores', agrupadas pelas 'chaves' (uma linha por combinação)."""
+    baldes = np.searchsorted(bordas, valores.to_numpy(), side='left')
+    histograma = pd.crosstab(chaves, baldes).reindex(columns=range(len(colunas)), fill_value=0)
+    histograma.columns = colunas
+    return histograma
+
+
+def _agregar_etapas(df: pd.DataFrame, minuto: pd.Series, fim: pd.Series) -> pd.DataFrame:
+    """Tempos por etapa ('etapas_ms' dos logs de fim de requisição) reduzidos por (minuto, etapa)."""
+    vazio = pd.DataFrame(columns=['minuto', 'etapa', 'n', 'soma_ms'] + COLUNAS_HISTOGRAMA_ETAPA)
+    if 'etapas_ms' not in df.columns:
+        return vazio
+    registros = df.loc[fim, 'etapas_ms']
+    registros = registros[registros.map(lambda v: isinstance(v, dict))]
+    if registros.empty:
+        return vazio
+    longa = pd.DataFrame(registros.tolist(), index=registros.index).apply(pd.to_numeric, errors='coerce')
+    # Requisições passam por etapas diferentes: as ausentes (NaN) não entram na contagem
+    longa = longa.stack().dropna()
+    if longa.empty:
+        return vazio
+    linhas, etapas = longa.index.get_level_values(0), longa.index.get_level_values(1)
+    tabela = pd.DataFrame({'minuto': minuto[linhas].to_numpy(), 'etapa': etapas, 'ms': longa.to_numpy()})
+    totais = tabela.groupby(['minuto', 'etapa']).agg(n=('ms', 'size'), soma_ms=('ms', 'sum'))
+    histograma = _histograma_por_chave([tabela['minuto'], tabela['etapa']], tabela['ms'], BORDAS_ETAPA_MS, COLUNAS_HISTOGRAMA_ETAPA)
+    histograma.index.names = ['minuto', 'etapa']
+    return totais.join(histograma).reset_index()
+
+
+def agregar_por_minuto(df: pd.DataFrame):
+    """Reduz os registros brutos aos rollups por minuto (tabelas de minutos, de contagens e de etapas)."""
+    vazio_minutos = pd.DataFrame(columns=['minuto', 'requisicoes', 'erros', 'soma_duracao_ms'] + COLUNAS_HISTOGRAMA)
+    vazio_contagens = pd.DataFrame(columns=['minuto', 'dimensao', 'valor', 'contagem'])
+    if df.empty or 'asctime' not in df.columns:
+        return vazio_minutos, vazio_contagens, _agregar_etapas(pd.DataFrame(), None, None)
+
+    minuto = pd.to_datetime(df['asctime'], format='%Y-%m-%d %H:%M:%S,%f', errors='coerce').dt.floor('min')
+    mensagem = df['message'] if 'message' in df.columns else pd.Series('', index=df.index)
+    nivel = df['levelname'] if 'levelname' in df.columns else pd.Series('', index=df.index)
+    validos = minuto.notna()
+
+    fim = validos & (mensagem == MENSAGEM_FIM_REQUISICAO)
+    duracao = pd.to_numeric(df['duration_ms'], errors='coerce') if 'duration_ms' in df.columns else pd.Series(np.nan, index=df.index)
+    base = pd.DataFrame({
+        'minuto': minuto,
+        'requisicoes': fim.astype('int64'),
+        'erros': (validos & (nivel == 'ERROR')).astype('int64'),
+        'soma_duracao_ms': duracao.where(fim, 0.0).fillna(0.0),
+    })[validos]
+
+    # Histograma: um balde por requisição finalizada com duração, somado por minuto
+    com_duracao = fim & duracao.notna()
+    histograma = _histograma_por_chave(minuto[com_duracao], duracao[com_duracao], BORDAS_DURACAO_MS, COLUNAS_HISTOGRAMA)
+
+    minutos = base.groupby('minuto').sum()
+    minutos = minutos.join(histograma, how='left').fillna({c: 0 for c in COLUNAS_HISTOGRAMA})
+    minutos[COLUNAS_HISTOGRAMA] = minutos[COLUNAS_HISTOGRAMA].astype('int64')
+    minutos = minutos.reset_index()
+
+    vagas = validos & (mensagem == MENSAGEM_VAGA)
+    partes = []
+    for dimensao in DIMENSOES_VAGA:
+        if dimensao not in df.columns:
+            continue
+        valores = df.loc[vagas, dimensao].dropna().astype(str)
+        if valores.empty:
+            continue
+        contagem = pd.DataFrame({'minuto': minuto[valores.index], 'valor': valores}).value_counts().rename('contagem').reset_index()
+        contagem.insert(1, 'dimensao', dimensao)
+        partes.append(contagem)
+    contagens = pd.concat(partes, ignore_index=True) if partes else vazio_contagens
+    return minutos, contagens, _agregar_etapas(df, minuto, fim)
+
+
+def _somar(existente: pd.DataFrame, novo: pd.DataFrame, chaves: list) -> pd.DataFrame:
+    if existente is None or existente.empty:
+        return novo.reset_index(drop=True)
+    if novo.empty:
+        return existente
+    return pd.concat([existente, novo], ignore_index=True).groupby(chaves, as_index=False, observed=True).sum()
+
+
+class IngestorLogs:
+    """
+    Lê o log de forma incremental e mantém os rollups por minuto.
+    O estado (inode e offset já lidos) fica em 'pasta_rollups/estado.json'; só linhas completas
+    são consumidas (uma linha ainda sendo escrita fica para a próxima chamada).
+    """
+    def __init__(self, caminho_log: str = 'app_logs.log', pasta_rollups: str = PASTA_ROLLUPS,
+                 tamanho_bloco: int = 16 * 1024 * 1024, dias_retencao: float = 30):
+        self.caminho_log = caminho_log
+        self.pasta_rollups = pasta_rollups
+        self.tamanho_bloco = tamanho_bloco
+        self.dias_retencao = dias_retencao
+        os.makedirs(pasta_rollups, exist_ok=True)
+        self.estado = self._ler_estado()
+
+    def _caminho(self, nome):
+        return os.path.join(self.pasta_rollups, nome)
+
+    def _ler_estado(self) -> dict:
+        try:
+            with open(self._caminho(ARQUIVO_ESTADO), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'inode': None, 'offset': 0}
+
+    def _gravar_estado(self):
+        temporario = self._caminho(ARQUIVO_ESTADO + '.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self.estado, f)
+        os.replace(temporario, self._caminho(ARQUIVO_ESTADO))
+
+    def _arquivo_rotacionado(self, inode):
+        """Procura, entre as cópias rotacionadas (.1, .2, ...), o arquivo que estava sendo lido."""
+        i = 1
+        while os.path.exists(f"{self.caminho_log}.{i}"):
+            if os.stat(f"{self.caminho_log}.{i}").st_ino == inode:
+                return f"{self.caminho_log}.{i}"
+            i += 1
+        return None
+
+    def _ler_novos(self, caminho, offset):
+        """Gera blocos de linhas completas a partir do offset; devolve o novo offset ao final."""
+        with open(caminho, 'rb') as f:
+            f.seek(offset)
+            while True:
+                bloco = f.read(self.tamanho_bloco)
+                if not bloco:
+                    return
+                fim_linha = bloco.rfind(b'\n')
+                if fim_linha < 0:
+                    return
+                completo = bloco[:fim_linha + 1]
+                offset += len(completo)
+                f.seek(offset)
+                yield completo, offset
+
+    def ingerir(self) -> dict:
+        """Processa o que foi escrito desde a última chamada; retorna quantas linhas e bytes foram lidos."""
+        if not os.path.exists(self.caminho_log):
+            return {'linhas': 0, 'bytes': 0}
+        info = os.stat(self.caminho_log)
+        leituras = []
+        if self.estado['inode'] is not None and self.estado['inode'] != info.st_ino:
+            # Houve rotação: termina o arquivo antigo (se ainda existir) e lê o novo desde o início
+            antigo = self._arquivo_rotacionado(self.estado['inode'])
+            if antigo is not None:
+                leituras.append((antigo, self.estado['offset']))
+            leituras.append((self.caminho_log, 0))
+        elif info.st_size < self.estado['offset']:
+            leituras.append((self.caminho_log, 0))  # arquivo truncado
+        else:
+            leituras.append((self.caminho_log, self.estado['offset']))
+
+        novos = [[] for _ in ROLLUPS]
+        linhas = bytes_lidos = 0
+        offset = leituras[-1][1]
+        for caminho, inicio in leituras:
+            offset = inicio
+            for bloco, offset in self._ler_novos(caminho, inicio):
+                df = parse_linhas(bloco)
+                linhas += len(df)
+                bytes_lidos += len(bloco)
+                for lista, tabela in zip(novos, agregar_por_minuto(df)):
+                    lista.append(tabela)
+
+        if novos[0]:
+            self._acumular([pd.concat(lista, ignore_index=True) for lista in novos])
+        self.estado = {'inode': info.st_ino, 'offset': offset}
+        self._gravar_estado()
+        return {'linhas': linhas, 'bytes': bytes_lidos}
+
+    def _acumular(self, tabelas_novas: list):
+        tabelas = [_somar(atual, nova, chaves) for atual, nova, (_, chaves)
+                   in zip(carregar_rollups(self.pasta_rollups), tabelas_novas, ROLLUPS)]
+        if self.dias_retencao and not tabelas[0].empty:
+            corte = tabelas[0]['minuto'].max() - pd.Timedelta(days=self.dias_retencao)
+            tabelas = [t[t['minuto'] >= corte] if not t.empty else t for t in tabelas]
+        for tabela, (arquivo, chaves) in zip(tabelas, ROLLUPS):
+            if not tabela.empty:
+                _gravar_parquet_atomico(tabela.sort_values(chaves), self._caminho(arquivo))
+
+
+def carregar_rollups(pasta_rollups: str = PASTA_ROLLUPS, desde=None):
+    """Lê os rollups (minutos, contagens, etapas); 'desde' filtra a partir de um instante (pushdown no Parquet)."""
+    filtros = [('minuto', '>=', pd.Timestamp(desde))] if desde is not None else None
+    resultado = []
+    for nome, _ in ROLLUPS:
+        caminho = os.path.join(pasta_rollups, nome)
+        resultado.append(pd.read_parquet(caminho, filters=filtros) if os.path.exists(caminho) else pd.DataFrame())
+    return tuple(resultado)
+
+
+def resumo_rollups(minutos: pd.DataFrame) -> dict:
+    """Totais do período: requisições, erros, duração média e percentis (do histograma somado)."""
+    if minutos.empty:
+        return {'requisicoes': 0, 'erros': 0, 'duracao_media_ms': 0.0, 'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+    requisicoes = int(minutos['requisicoes'].sum())
+    return {
+        'requisicoes': requisicoes,
+        'erros': int(minutos['erros'].sum()),
+        'duracao_media_ms': float(minutos['soma_duracao_ms'].sum() / requisicoes) if requisicoes else 0.0,
+        **percentis_do_histograma(minutos[COLUNAS_HISTOGRAMA].to_numpy().sum(axis=0)),
+    }
+
+
+def percentis_por_minuto(minutos: pd.DataFrame, percentis=(50, 95, 99)) -> pd.DataFrame:
+    """Série temporal de percentis de duração, um ponto por minuto."""
+    linhas = [percentis_do_histograma(h, percentis) for h in minutos[COLUNAS_HISTOGRAMA].to_numpy()]
+    return pd.DataFrame(linhas, index=minutos['minuto'])
+
+
+def ler_ultimas_linhas(caminho_log: str, n: int = 100, bytes_max: int = 1024 * 1024) -> pd.DataFrame:
+    """Últimas 'n' linhas do log (lendo só o final do arquivo), para o visualizador de logs brutos."""
+    try:
+        with open(caminho_log, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            tamanho = f.tell()
+            f.seek(max(0, tamanho - bytes_max))
+            final = f.read()
+    except FileNotFoundError:
+        return pd.DataFrame()
+    linhas = final.splitlines()
+    if tamanho > bytes_max:
+        linhas = linhas[1:]  # a primeira linha pode ter sido cortada no meio
+    linhas = linhas[-n:]
+    return parse_linhas(b'\n'.join(linhas) + b'\n')
+
+
+def percentis_por_etapa(etapas: pd.DataFrame, percentis=(50, 95, 99)) -> pd.DataFrame:
+    """Percentis de duração de cada etapa no período (histogramas somados), com total e média."""
+    if etapas.empty:
+        return pd.DataFrame()
+    somado = etapas.groupby('etapa', observed=True)[['n', 'soma_ms'] + COLUNAS_HISTOGRAMA_ETAPA].sum()
+    linhas = {etapa: {'n': int(linha['n']), 'media_ms': float(linha['soma_ms'] / linha['n']) if linha['n'] else None,
+                      **percentis_do_histograma(linha[COLUNAS_HISTOGRAMA_ETAPA].to_numpy(), percentis, BORDAS_ETAPA_MS)}
+              for etapa, linha in somado.iterrows()}
+    return pd.DataFrame.from_dict(linhas, orient='index')
@@ -0,0 +1,278 @@
+# llm_resiliente.py
+import asyncio
+import inspect
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from logger_config import logger
+
+
+class LLMIndisponivel(Exception):
+    """O LLM não respondeu a tempo, esgotou as tentativas ou o disjuntor está aberto."""
+
+
+def _erro_retentavel(erro: Exception) -> bool:
+    """Erros de rede e timeouts são transitórios; respostas HTTP só se forem 408/409/429 ou 5xx."""
+    status = getattr(erro, 'status_code', None) or getattr(getattr(erro, 'response', None), 'status_code', None)
+    return status is None or status in (408, 409, 429) or status >= 500
+
+
+class Disjuntor:
+    """
+    Circuit breaker: depois de 'limite_falhas' tentativas seguidas com erro transitório (ver
+    _erro_retentavel; erros do próprio pedido, como 400, não contam), abre e rejeita as
+    chamadas na hora por 'tempo_aberto_s'. Em seguida deixa passar uma chamada de teste
+    (meio aberto): se ela funcionar o circuito fecha, se falhar abre de novo.
+    """
+    def __init__(self, limite_falhas: int = 5, tempo_aberto_s: float = 30.0):
+        self.limite_falhas = limite_falhas
+        self.tempo_aberto_s = tempo_aberto_s
+        self.estado = 'fechado'
+        self._falhas_seguidas = 0
+        self._aberto_em = 0.0
+        self._teste_em_andamento = False
+        self._lock = threading.Lock()
+
+    def permitir(self) -> bool:
+        with self._lock:
+            if self.estado == 'fechado':
+                return True
+            if self.estado == 'aberto' and time.monotonic() - self._aberto_em >= self.tempo_aberto_s:
+                self.estado = 'meio_aberto'
+            if self.estado == 'meio_aberto' and not self._teste_em_andamento:
+                self._teste_em_andamento = True
+                return True
+            return False
+
+    def registrar_sucesso(self):
+        with self._lock:
+            self.estado = 'fechado'
+            self._falhas_seguidas = 0
+            self._teste_em_andamento = False
+
+    def desistir(self):
+        """
+        A chamada não diz nada sobre a saúde do LLM (cancelada antes do resultado ou recusada por
+        erro do próprio pedido): libera a vaga do teste sem mudar o estado.
+        """
+        with self._lock:
+            self._teste_em_andamento = False
+
+    def registrar_falha(self):
+        with self._lock:
+            self._falhas_seguidas += 1
+            self._teste_em_andamento = False
+            if self.estado == 'meio_aberto' or self._falhas_seguidas >= self.limite_falhas:
+                if self.estado != 'aberto':
+                    logger.warning("Disjuntor do LLM aberto", extra={"falhas_seguidas": self._falhas_seguidas})
+                self.estado = 'aberto'
+                self._aberto_em = time.monotonic()
+
+
+class LLMResiliente:
+    """
+    Envolve o cliente do LLM (Groq) com a mesma interface usada pelos agentes (chat, achat,
+    astream_chat), acrescentando:
+    - prazo total por chamada (tentativas e esperas incluídas);
+    - novas tentativas limitadas, com backoff exponencial e jitter, só para erros transitórios;
+    - requisição "hedge": se a resposta passar do p95 das latências recentes, uma segunda
+      requisição idêntica é disparada e vale a que terminar primeiro;
+    - disjuntor que rejeita as chamadas na hora enquanto o LLM está fora do ar.
+    Quando não há resposta possível, levanta LLMIndisponivel (o agente responde com uma
+    mensagem amigável). Os parâmetros vêm de LLM_PRAZO_S, LLM_MAX_TENTATIVAS, LLM_HEDGE,
+    LLM_DISJUNTOR_FALHAS e LLM_DISJUNTOR_ABERTO_S.
+    """
+    def __init__(self, llm, prazo_s: Optional[float] = None, max_tentativas: Optional[int] = None,
+                 backoff_base_s: float = 0.25, backoff_max_s: float = 4.0, hedge: Optional[bool] = None,
+                 amostras_minimas_hedge: int = 20, janela_latencias: int = 500, disjuntor: Optional[Disjuntor] = None):
+        self.llm = llm
+        self.prazo_s = prazo_s or float(os.environ.get('LLM_PRAZO_S', '30'))
+        self.max_tentativas = max_tentativas or int(os.environ.get('LLM_MAX_TENTATIVAS', '3'))
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        if hedge is None:
+            hedge = os.environ.get('LLM_HEDGE', '1').lower() in ('1', 'true', 'sim')
+        self.hedge = hedge
+        self.amostras_minimas_hedge = amostras_minimas_hedge
+        self.disjuntor = disjuntor or Disjuntor(int(os.environ.get('LLM_DISJUNTOR_FALHAS', '5')),
+                                                float(os.environ.get('LLM_DISJUNTOR_ABERTO_S', '30')))
+        # Latências (s) das tentativas bem-sucedidas mais recentes
+        self._latencias = deque(maxlen=janela_latencias)
+        self.contadores = {'chamadas': 0, 'sucessos': 0, 'sucessos_hedge': 0, 'hedges_disparados': 0,
+                           'retentativas': 0, 'timeouts': 0, 'erros': 0, 'rejeitadas_disjuntor': 0, 'falhas': 0}
+
+    def __getattr__(self, nome):
+        # Demais atributos (model, metadata, ...) vêm do cliente original
+        return getattr(self.llm, nome)
+
+    def limiar_hedge_s(self) -> Optional[float]:
+        """p95 das latências recentes, ou None enquanto não houver amostras suficientes."""
+        if not self.hedge or len(self._latencias) < self.amostras_minimas_hedge:
+            return None
+        return float(np.percentile(self._latencias, 95))
+
+    def _espera_backoff(self, tentativa: int) -> float:
+        """Full jitter: sorteia entre 0 e o teto exponencial, para que clientes não tentem em sincronia."""
+        return random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** tentativa))
+
+    async def _tentativa(self, mensagens, **kwargs):
+        inicio = time.monotonic()
+        achat = getattr(self.llm, 'achat', None)
+        if achat is not None and inspect.iscoroutinefunction(achat):
+            resposta = await achat(mensagens, **kwargs)
+        else:
+            resposta = await asyncio.to_thread(self.llm.chat, mensagens, **kwargs)
+        self._latencias.append(time.monotonic() - inicio)
+        return resposta
+
+    async def _tentativa_com_hedge(self, mensagens, restante: float, **kwargs):
+        """Uma tentativa; se passar do limiar de hedge, dispara a segunda cópia e usa a primeira resposta."""
+        # O prazo vale para a tentativa inteira, espera pelo hedge incluída
+        limite = time.monotonic() + restante
+        limiar = self.limiar_hedge_s()
+        principal = asyncio.ensure_future(self._tentativa(mensagens, **kwargs))
+        if limiar is None or limiar >= restante:
+            return await asyncio.wait_for(principal, restante)
+
+        tarefas = {principal}
+        try:
+            feitas, _ = await asyncio.wait(tarefas, timeout=limiar)
+            if not feitas:
+                self.contadores['hedges_disparados'] += 1
+                tarefas.add(asyncio.ensure_future(self._tentativa(mensagens, **kwargs)))
+            erro = None
+            while tarefas:
+                feitas, tarefas = await asyncio.wait(tarefas, timeout=max(0.0, limite - time.monotonic()),
+                                                     return_when=asyncio.FIRST_COMPLETED)
+                if not feitas:
+                    raise asyncio.TimeoutError()
+                for tarefa in feitas:
+                    if tarefa.exception() is None:
+                        if tarefa is not principal:
+                            self.contadores['sucessos_hedge'] += 1
+                        return tarefa.result()
+                    erro = tarefa.exception()
+            raise erro
+        finally:
+            for tarefa in tarefas:
+                tarefa.cancel()
+
+    async def achat(self, mensagens, **kwargs):
+        self.contadores['chamadas'] += 1
+        limite = time.monotonic() + self.prazo_s
+        for tentativa in range(self.max_tentativas):
+            if not self.disjuntor.permitir():
+                self.contadores['rejeitadas_disjuntor'] += 1
+                raise LLMIndisponivel("Disjuntor do LLM aberto.")
+            restante = limite - time.monotonic()
+            try:
+                resposta = await self._tentativa_com_hedge(mensagens, restante, **kwargs)
+            except asyncio.CancelledError:
+                # Cliente desconectou ou a API está encerrando: a chamada de teste do disjuntor não pode ficar presa
+                self.disjuntor.desistir()
+                raise
+            except asyncio.TimeoutError:
+                self.contadores['timeouts'] += 1
+                self.disjuntor.registrar_falha()
+                self.contadores['falhas'] += 1
+                raise LLMIndisponivel(f"O LLM não respondeu em {self.prazo_s:.0f}s.")
+            except Exception as e:
+                self.contadores['erros'] += 1
+                if not _erro_retentavel(e):
+                    # Erro do pedido (ex.: 400): o LLM respondeu, então não abre o disjuntor para todos
+                    self.disjuntor.desistir()
+                    self.contadores['falhas'] += 1
+                    raise LLMIndisponivel(f"Falha ao chamar o LLM: {e}") from e
+                self.disjuntor.registrar_falha()
+                espera = self._espera_backoff(tentativa)
+                ultima = tentativa + 1 == self.max_tentativas
+                if ultima or time.monotonic() + espera >= limite:
+                    self.contadores['falhas'] += 1
+                    raise LLMIndisponivel(f"Falha ao chamar o LLM: {e}") from e
+                self.contadores['retentativas'] += 1
+                logger.warning("Falha transitória do LLM; nova tentativa",
+                               extra={"tentativa": tentativa + 1, "espera_s": round(espera, 3), "detalhe_erro": str(e)})
+                await asyncio.sleep(espera)
+                continue
+            self.disjuntor.registrar_sucesso()
+            self.contadores['sucessos'] += 1
+            return resposta
+
+    def chat(self, mensagens, **kwargs):
+        """Versão síncrona (mesma política), para código fora do event loop."""
+        return asyncio.run(self.achat(mensagens, **kwargs))
+
+    async def astream_chat(self, mensagens, **kwargs):
+        """
+        Streaming com a mesma política até o primeiro pedaço da resposta: prazo, novas tentativas
+        e disjuntor. Depois que o texto começa a chegar não há nova tentativa (o cliente já o
+        recebeu); o prazo passa a valer para o intervalo entre pedaços. Sem hedge no streaming.
+        """
+        self.contadores['chamadas'] += 1
+        limite = time.monotonic() + self.prazo_s
+        for tentativa in range(self.max_tentativas):
+            if not self.disjuntor.permitir():
+                self.contadores['rejeitadas_disjuntor'] += 1
+                raise LLMIndisponivel("Disjuntor do LLM aberto.")
+            inicio = time.monotonic()
+            try:
+                async def primeiro_pedaco():
+                    gerador = await self.llm.astream_chat(mensagens, **kwargs)
+                    return gerador, await gerador.__anext__()
+                gerador, primeiro = await asyncio.wait_for(primeiro_pedaco(), limite - inicio)
+            except asyncio.CancelledError:
+                self.disjuntor.desistir()
+                raise
+            except asyncio.TimeoutError:
+                self.contadores['timeouts'] += 1
+                self.disjuntor.registrar_falha()
+                self.contadores['falhas'] += 1
+                raise LLMIndisponivel(f"O LLM não começou a responder em {self.prazo_s:.0f}s.")
+            except StopAsyncIteration:
+                gerador, primeiro = None, None
+            except Exception as e:
+                self.contadores['erros'] += 1
+                if not _erro_retentavel(e):
+                    self.disjuntor.desistir()
+                    self.contadores['falhas'] += 1
+                    raise LLMIndisponivel(f"Falha ao chamar o LLM: {e}") from e
+                self.disjuntor.registrar_falha()
+                espera = self._espera_backoff(tentativa)
+                if tentativa + 1 == self.max_tentativas or time.monotonic() + espera >= limite:
+                    self.contadores['falhas'] += 1
+                    raise LLMIndisponivel(f"Falha ao chamar o LLM: {e}") from e
+                self.contadores['retentativas'] += 1
+                await asyncio.sleep(espera)
+                continue
+            self._latencias.append(time.monotonic() - inicio)
+            self.disjuntor.registrar_sucesso()
+            self.contadores['sucessos'] += 1
+            return self._continuar_stream(gerador, primeiro)
+
+    async def _continuar_stream(self, gerador, primeiro):
+        if primeiro is None:
+            return
+        yield primeiro
+        while True:
+            try:
+                pedaco = await asyncio.wait_for(gerador.__anext__(), self.prazo_s)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                self.contadores['timeouts'] += 1
+                raise LLMIndisponivel("O streaming do LLM parou de responder.")
+            yield pedaco
+
+    def metricas(self) -> dict:
+        latencias_ms = np.array(self._latencias) * 1000
+        percentis = ({f'p{p}_ms': round(float(np.percentile(latencias_ms, p)), 1) for p in (50, 95, 99)}
+                     if len(latencias_ms) else {})
+        limiar = self.limiar_hedge_s()
+        return {**self.contadores, 'estado_disjuntor': self.disjuntor.estado, **percentis,
+                'limiar_hedge_ms': round(limiar * 1000, 1) if limiar is not None else None}
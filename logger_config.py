@@ -1,34 +1,279 @@
 # logger_config.py
+import atexit
 import logging
-from pythonjsonlogger import jsonlogger
+import logging.handlers
+import os
+import queue
 import sys
+import threading
+import time
+from contextlib import contextmanager
+from pythonjsonlogger import jsonlogger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Arquivo lido pelo dashboard (as cópias rotacionadas ficam em app_logs.log.1, .2, ...)
+ARQUIVO_LOG = "app_logs.log"
+
+
+class HandlerFilaNaoBloqueante(logging.handlers.QueueHandler):
+    """
+    Coloca o registro numa fila em memória e retorna na hora: quem loga (o event loop) nunca
+    espera pelo disco. Sob pressão (fila acima de 'nivel_amostragem' da capacidade) só 1 de cada
+    'amostragem' registros de baixa prioridade (abaixo de WARNING) é mantido; com a fila cheia
+    eles são descartados. Avisos e erros não são amostrados; com a fila cheia também não esperam
+    vaga (quem loga costuma ser o event loop): vão direto para o stderr e entram em 'avisos_fora_da_fila'.
+    """
+    def __init__(self, fila: queue.Queue, amostragem: int = 10, nivel_amostragem: float = 0.5):
+        super().__init__(fila)
+        self.amostragem = max(amostragem, 1)
+        self.limite_amostragem = int(fila.maxsize * nivel_amostragem) if fila.maxsize > 0 else 0
+        self._sequencia = 0
+        self.contadores = {'enfileirados': 0, 'descartados': 0, 'amostrados_fora': 0, 'avisos_fora_da_fila': 0}
+
+    def prepare(self, record):
+        # A formatação fica para a thread de escrita; aqui só congela a mensagem e a exceção
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if record.levelno >= logging.WARNING:
+            try:
+                self.queue.put_nowait(record)
+                self.contadores['enfileirados'] += 1
+            except queue.Full:
+                self.contadores['avisos_fora_da_fila'] += 1
+                sys.stderr.write(f"{record.levelname} {record.getMessage()}\n{record.exc_text or ''}\n")
+            return
+        if self.limite_amostragem and self.queue.qsize() >= self.limite_amostragem:
+            self._sequencia += 1
+            if self._sequencia % self.amostragem:
+                self.contadores['amostrados_fora'] += 1
+                return
+        try:
+            self.queue.put_nowait(record)
+            self.contadores['enfileirados'] += 1
+        except queue.Full:
+            self.contadores['descartados'] += 1
+
+
+class ArquivoRotativoEmLote:
+    """
+    Destino em arquivo que grava um lote de linhas com uma única escrita.
+    Rotaciona por tamanho ('max_bytes') e por tempo ('intervalo_rotacao_s'), mantendo 'backups' cópias.
+    Vários processos (workers do uvicorn) podem gravar no mesmo arquivo: escrita e rotação acontecem
+    sob um lock de arquivo ('<caminho>.lock', que guarda também o instante da última rotação), o
+    tamanho considerado é o do arquivo em disco e, se outro processo já rotacionou, o arquivo é
+    reaberto antes da escrita. Assim cada rotação acontece uma vez só e nenhum lote vai para a cópia antiga.
+    """
+    def __init__(self, caminho: str, max_bytes: int = 10 * 1024 * 1024, backups: int = 5, intervalo_rotacao_s: float = 0):
+        self.caminho = caminho
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.intervalo_rotacao_s = intervalo_rotacao_s
+        self._fd = self._abrir()
+        self._fd_lock = os.open(f"{caminho}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        with self._travado():
+            if self._ultima_rotacao() is None:
+                self._marcar_rotacao()
+
+    def _abrir(self) -> int:
+        return os.open(self.caminho, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    @contextmanager
+    def _travado(self):
+        if fcntl is None:  # sem flock (Windows): vale só o lock do próprio processo
+            yield
+            return
+        fcntl.flock(self._fd_lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd_lock, fcntl.LOCK_UN)
+
+    def _ultima_rotacao(self):
+        try:
+            return float(os.pread(self._fd_lock, 64, 0).decode())
+        except ValueError:
+            return None
+
+    def _marcar_rotacao(self):
+        os.ftruncate(self._fd_lock, 0)
+        os.pwrite(self._fd_lock, repr(time.time()).encode(), 0)
+
+    def _tamanho_atual(self) -> int:
+        """Tamanho do arquivo em disco; reabre o caminho se outro processo o rotacionou."""
+        try:
+            info = os.stat(self.caminho)
+        except FileNotFoundError:
+            info = None
+        if info is None or info.st_ino != os.fstat(self._fd).st_ino:
+            os.close(self._fd)
+            self._fd = self._abrir()
+            info = os.fstat(self._fd)
+        return info.st_size
+
+    def _rotacionar(self):
+        os.close(self._fd)
+        for i in range(self.backups - 1, 0, -1):
+            origem = f"{self.caminho}.{i}"
+            if os.path.exists(origem):
+                os.replace(origem, f"{self.caminho}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.caminho, f"{self.caminho}.1")
+        else:
+            os.remove(self.caminho)
+        self._fd = self._abrir()
+        self._marcar_rotacao()
+
+    def escrever(self, texto: str):
+        dados = texto.encode('utf-8')
+        with self._travado():
+            tamanho = self._tamanho_atual()
+            ultima = self._ultima_rotacao()
+            por_tempo = self.intervalo_rotacao_s and ultima is not None and time.time() - ultima >= self.intervalo_rotacao_s
+            por_tamanho = self.max_bytes and tamanho > 0 and tamanho + len(dados) > self.max_bytes
+            if por_tempo or por_tamanho:
+                self._rotacionar()
+            escritos = 0
+            while escritos < len(dados):
+                escritos += os.write(self._fd, dados[escritos:])
 
-def setup_logger():
-    """Configura um logger para output em formato JSON."""
+    def fechar(self):
+        # Pode ser chamado de novo pelo atexit depois de um 'parar' explícito
+        if self._fd_lock is None:
+            return
+        os.close(self._fd)
+        os.close(self._fd_lock)
+        self._fd_lock = None
+
+
+class EscritorLogEmLote(threading.Thread):
+    """
+    Thread de fundo que esvazia a fila de logs em lotes (até 'tamanho_lote' registros ou
+    'intervalo_s' segundos), formata cada registro e grava o lote de uma vez em cada destino.
+    """
+    def __init__(self, fila: queue.Queue, formatter: logging.Formatter, destinos: list,
+                 tamanho_lote: int = 256, intervalo_s: float = 0.2):
+        super().__init__(name="escritor-logs", daemon=True)
+        self.fila = fila
+        self.formatter = formatter
+        self.destinos = destinos
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_s = intervalo_s
+        self._parar = threading.Event()
+        self.contadores = {'escritos': 0, 'lotes': 0}
+
+    def _proximo_lote(self) -> list:
+        try:
+            lote = [self.fila.get(timeout=self.intervalo_s)]
+        except queue.Empty:
+            return []
+        while len(lote) < self.tamanho_lote:
+            try:
+                lote.append(self.fila.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _gravar(self, lote: list):
+        texto = ''.join(self.formatter.format(registro) + '\n' for registro in lote)
+        for destino in self.destinos:
+            try:
+                destino.escrever(texto)
+            except Exception as e:
+                sys.stderr.write(f"Falha ao gravar logs: {e}\n")
+        self.contadores['escritos'] += len(lote)
+        self.contadores['lotes'] += 1
+
+    def run(self):
+        while not (self._parar.is_set() and self.fila.empty()):
+            lote = self._proximo_lote()
+            if lote:
+                self._gravar(lote)
+
+    def parar(self):
+        """Esvazia a fila, grava o que falta e fecha os arquivos."""
+        self._parar.set()
+        self.join(timeout=5)
+        for destino in self.destinos:
+            if hasattr(destino, 'fechar'):
+                destino.fechar()
+
+
+class SaidaPadrao:
+    """Destino que grava o lote no stdout (mesma interface de ArquivoRotativoEmLote)."""
+    def escrever(self, texto: str):
+        sys.stdout.write(texto)
+        sys.stdout.flush()
+
+
+def setup_logger(caminho_arquivo: str = None, assincrono: bool = None):
+    """
+    Configura um logger para output em formato JSON.
+    Por padrão (LOG_ASSINCRONO=1) os registros vão para uma fila e uma thread de fundo grava
+    em lotes no stdout e no arquivo rotativo. Parâmetros: LOG_MAX_BYTES, LOG_BACKUPS,
+    LOG_ROTACAO_HORAS, LOG_FILA_MAX e LOG_AMOSTRAGEM.
+    """
     logger = logging.getLogger("DecisionAgentLogger")
     logger.setLevel(logging.INFO)
-    
+    caminho_arquivo = caminho_arquivo or os.environ.get('LOG_ARQUIVO', ARQUIVO_LOG)
+    if assincrono is None:
+        assincrono = os.environ.get('LOG_ASSINCRONO', '1').lower() in ('1', 'true', 'sim')
+
     # Evita adicionar handlers duplicados se a função for chamada múltiplas vezes
     if logger.hasHandlers():
+        for handler in logger.handlers:
+            escritor = getattr(handler, 'escritor', None)
+            if escritor is not None:
+                escritor.parar()
         logger.handlers.clear()
 
-    # Log para o console
-    logHandler = logging.StreamHandler(sys.stdout)
-    
     # Formatter que adiciona campos extras ao log JSON
     formatter = jsonlogger.JsonFormatter(
         '%(asctime)s %(name)s %(levelname)s %(message)s %(process)d %(thread)d'
     )
-    
-    logHandler.setFormatter(formatter)
-    logger.addHandler(logHandler)
-    
-    # Log para um arquivo, para ser lido pelo dashboard
-    fileHandler = logging.FileHandler("app_logs.log", mode='a')
-    fileHandler.setFormatter(formatter)
-    logger.addHandler(fileHandler)
-    
+
+    if not assincrono:
+        # Modo síncrono antigo: console + arquivo, gravados na própria thread que loga
+        logHandler = logging.StreamHandler(sys.stdout)
+        logHandler.setFormatter(formatter)
+        logger.addHandler(logHandler)
+        fileHandler = logging.FileHandler(caminho_arquivo, mode='a')
+        fileHandler.setFormatter(formatter)
+        logger.addHandler(fileHandler)
+        return logger
+
+    fila = queue.Queue(maxsize=int(os.environ.get('LOG_FILA_MAX', '10000')))
+    arquivo = ArquivoRotativoEmLote(
+        caminho_arquivo,
+        max_bytes=int(os.environ.get('LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+        backups=int(os.environ.get('LOG_BACKUPS', '5')),
+        intervalo_rotacao_s=float(os.environ.get('LOG_ROTACAO_HORAS', '24')) * 3600,
+    )
+    escritor = EscritorLogEmLote(fila, formatter, [SaidaPadrao(), arquivo])
+    escritor.start()
+    handler = HandlerFilaNaoBloqueante(fila, amostragem=int(os.environ.get('LOG_AMOSTRAGEM', '10')))
+    handler.escritor = escritor
+    logger.addHandler(handler)
+    # Garante que os registros ainda na fila sejam gravados quando o processo terminar
+    atexit.register(escritor.parar)
     return logger
 
+
+def metricas_log(logger_alvo: logging.Logger = None) -> dict:
+    """Contadores do pipeline de logs: enfileirados, descartados, amostrados, escritos, lotes e tamanho da fila."""
+    for handler in (logger_alvo or logger).handlers:
+        if isinstance(handler, HandlerFilaNaoBloqueante):
+            return {**handler.contadores, **handler.escritor.contadores, 'fila': handler.queue.qsize()}
+    return {}
+
 # Cria uma instância única do logger para ser importada por outros módulos
-logger = setup_logger()
\ No newline at end of file
+logger = setup_logger()
@@ -1,33 +1,54 @@
-import os
 import time
-from fastapi import FastAPI, HTTPException
+# Marco zero da subida do processo: mede o tempo de import e o tempo até a API ficar pronta
+INICIO_PROCESSO = time.perf_counter()
+
+import os
+import json
+import asyncio
+import weakref
+import secrets
+from fastapi import FastAPI, HTTPException, Header, Query, Request
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
-from typing import Dict, Any
+from typing import Dict, Any, TYPE_CHECKING
 
 # Importa o Middleware de CORS para permitir a comunicação com o frontend
 from fastapi.middleware.cors import CORSMiddleware
-# Importa a FileResponse para servir o arquivo HTML
-from fastapi.responses import FileResponse
+# Importa a FileResponse para servir o arquivo HTML e a StreamingResponse para o streaming de tokens
+from fastapi.responses import FileResponse, StreamingResponse, PlainTextResponse, JSONResponse
 
 # Importa a função para carregar o arquivo .env
 from dotenv import load_dotenv
 
 # Importa nosso logger configurado para gerar logs estruturados
-from logger_config import logger
+from logger_config import logger, metricas_log
+
+# Fila de admissão com prioridades e limite de taxa por cliente na frente do LLM
+from admissao import (ControleAdmissao, RequisicaoRejeitada, PRIORIDADE_ENTREVISTA, PRIORIDADE_NOVA_ENTREVISTA,
+                      MENSAGEM_AGUARDE)
+
+# Histogramas de latência por etapa e de tokens, expostos em /metrics
+from metricas import registro as registro_metricas, medir_etapa, iniciar_coleta, registrar_tokens
 
-# Imports do nosso módulo de agente, que contém a lógica principal
-from agent import BaseDeDados, AgenteScreener, AgenteEntrevistador
+# Cache das saudações de abertura dos agentes (uma chamada a menos ao LLM no início da entrevista)
+from saudacoes import CacheSaudacoes, vagas_mais_buscadas
 
-# Imports para o LLM
-from llama_index.llms.groq import Groq
+# Recarga a quente da base de dados, sem derrubar a API
+from recarga import RecarregadorBase
 
 # Importa a função de pipeline e a variável de pasta do nosso script de pré-processamento
 from preprocess import executar_pipeline_completo, PASTA_PARQUET_SAIDA
 
+# Os módulos pesados (agent -> pandas/llama_index/scipy, sessoes, llm_resiliente) só são importados
+# pela inicialização em segundo plano (ou no primeiro uso): a API abre a porta em menos de 1 s
+if TYPE_CHECKING:
+    from agent import BaseDeDados
+
 # Carrega as variáveis do arquivo .env para o ambiente do sistema
 load_dotenv()
 
+TEMPO_IMPORT_S = time.perf_counter() - INICIO_PROCESSO
+
 # --- Modelos de Dados da API (Pydantic) ---
 # Define como devem ser os dados que chegam e saem da API
 class PredictRequest(BaseModel):
@@ -42,49 +63,199 @@ class PredictResponse(BaseModel):
 # O dicionário 'state' irá conter objetos que vivem durante toda a execução da API
 state: Dict[str, Any] = {}
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
+def _caminhos_parquet():
+    """Caminhos dos arquivos Parquet na pasta de saída do pipeline."""
+    return {
+        'vagas_path': os.path.join(PASTA_PARQUET_SAIDA, 'vagas.parquet'),
+        'prospects_path': os.path.join(PASTA_PARQUET_SAIDA, 'prospects.parquet'),
+        'applicants_path': os.path.join(PASTA_PARQUET_SAIDA, 'applicants.parquet'),
+    }
+
+def carregar_base() -> "BaseDeDados":
     """
-    Função que gerencia o ciclo de vida da API.
-    O código aqui roda QUANDO A API INICIA.
+    Constrói uma nova BaseDeDados. Com DADOS_SNAPSHOT_PASTA apontando para um snapshot compilado
+    (compilar_dataset.py), a base é carregada já otimizada e indexada. Com DADOS_ARROW_PASTA definida,
+    os workers compartilham as tabelas via memory-map (zero cópia).
     """
-    logger.info("API do Agente Decision iniciando...")
-
-    # 1. Executa todo o pipeline de download e processamento ANTES de carregar a base.
-    logger.info("Iniciando pipeline de dados...")
-    executar_pipeline_completo()
-    logger.info("Pipeline de dados finalizado.")
-
-    # 2. Constrói os caminhos para os arquivos Parquet usando a pasta de saída correta.
-    caminho_vagas = os.path.join(PASTA_PARQUET_SAIDA, 'vagas.parquet')
-    caminho_prospects = os.path.join(PASTA_PARQUET_SAIDA, 'prospects.parquet')
-    caminho_applicants = os.path.join(PASTA_PARQUET_SAIDA, 'applicants.parquet')
-
-    # 3. Carrega a base de dados a partir dos arquivos Parquet pré-processados
+    from agent import BaseDeDados
+    pasta_snapshot = os.environ.get('DADOS_SNAPSHOT_PASTA')
+    if pasta_snapshot and os.path.isdir(pasta_snapshot):
+        logger.info(f"Carregando snapshot compilado de '{pasta_snapshot}'...")
+        return BaseDeDados.de_snapshot(pasta_snapshot)
     logger.info(f"Carregando base de dados dos arquivos em '{PASTA_PARQUET_SAIDA}'...")
-    state['db'] = BaseDeDados(
-        vagas_path=caminho_vagas,
-        prospects_path=caminho_prospects,
-        applicants_path=caminho_applicants
-    )
-
-    # 4. Carrega a chave da API do ambiente (arquivo .env) e inicializa o LLM
-    api_key = os.environ.get('GROQ_API_KEY')
-    if not api_key:
-        logger.critical("A chave da API da Groq não foi encontrada. A aplicação será encerrada.")
-        raise ValueError("Defina GROQ_API_KEY no seu arquivo .env")
-
-    state['llm'] = Groq(model="llama-3.3-70b-versatile", api_key=api_key)
+    return BaseDeDados(**_caminhos_parquet(), pasta_arrow=os.environ.get('DADOS_ARROW_PASTA'))
+
+def assinatura_dados() -> str:
+    """Assinatura dos arquivos dos quais a base é carregada; muda quando algum deles é substituído."""
+    from agent import versao_dos_arquivos, ARQUIVO_SNAPSHOT
+    pasta_snapshot = os.environ.get('DADOS_SNAPSHOT_PASTA')
+    if pasta_snapshot and os.path.isdir(pasta_snapshot):
+        return versao_dos_arquivos(os.path.join(pasta_snapshot, ARQUIVO_SNAPSHOT))
+    return versao_dos_arquivos(*_caminhos_parquet().values())
+
+def trocar_base(nova_base: "BaseDeDados"):
+    """Troca a base em uso com uma única atribuição; requisições em andamento mantêm a referência antiga."""
+    from agent import BaseDeDados
+    state['db'] = nova_base
+    # Entradas da versão anterior saem do cache; consultas atrasadas da base antiga não o repovoam
+    BaseDeDados.cache.ativar_versao(nova_base.versao_cache)
+
+def criar_cliente_llm(api_key: str):
+    """Cliente Groq envolvido pela camada de resiliência (LLM_PRAZO_S, LLM_MAX_TENTATIVAS, LLM_HEDGE, LLM_DISJUNTOR_*)."""
+    from llama_index.llms.groq import Groq
+    from llm_resiliente import LLMResiliente
+    return LLMResiliente(Groq(model="llama-3.3-70b-versatile", api_key=api_key))
+
+def api_pronta() -> bool:
+    """A API atende conversas quando a base, o LLM e o armazém de sessões já estão no 'state'."""
+    return all(chave in state for chave in ('db', 'llm', 'sessions'))
+
+def exigir_pronta():
+    """Responde 503 (com Retry-After) enquanto a inicialização em segundo plano não termina."""
+    if not api_pronta():
+        raise HTTPException(status_code=503, detail="A API está iniciando; tente novamente em instantes.",
+                            headers={"Retry-After": "5"})
+
+async def inicializar():
+    """
+    Carrega tudo o que é pesado, em segundo plano, com a porta já aberta: pipeline de dados,
+    base de dados, cliente do LLM e armazém de sessões. O trabalho bloqueante (imports pesados,
+    download, leitura dos Parquet) roda em threads para o event loop continuar respondendo
+    /healthz e /readyz. Ao final, registra o tempo até a API ficar pronta.
+    """
+    inicializacao = state['inicializacao']
+    try:
+        # 1. Carrega a chave da API do ambiente (arquivo .env); sem ela não adianta baixar os dados
+        api_key = os.environ.get('GROQ_API_KEY')
+        if not api_key:
+            logger.critical("A chave da API da Groq não foi encontrada. A aplicação não ficará pronta.")
+            raise ValueError("Defina GROQ_API_KEY no seu arquivo .env")
+
+        # 2. Executa todo o pipeline de download e processamento ANTES de carregar a base.
+        inicializacao['etapa'] = 'pipeline'
+        logger.info("Iniciando pipeline de dados...")
+        await asyncio.to_thread(executar_pipeline_completo)
+        logger.info("Pipeline de dados finalizado.")
+
+        # 3. Carrega a base de dados (snapshot compilado, Arrow compartilhado ou Parquet)
+        inicializacao['etapa'] = 'base'
+        nova_base = await asyncio.to_thread(carregar_base)
+
+        # 4. Inicializa o LLM e o armazém das sessões de conversa ativas (SESSOES_BACKEND=memoria|sqlite)
+        inicializacao['etapa'] = 'llm'
+        llm = await asyncio.to_thread(criar_cliente_llm, api_key)
+        from sessoes import GerenciadorSessoes, criar_armazem_sessoes
+        sessions = GerenciadorSessoes(criar_armazem_sessoes(), llm)
+
+        # 5. Recarga a quente da base: via /admin/recarregar-base e, se DADOS_RECARGA_INTERVALO_S > 0,
+        # sempre que os arquivos de dados mudarem
+        state['recarregador'] = RecarregadorBase(fabrica=carregar_base, ao_trocar=trocar_base)
+        intervalo_recarga = float(os.environ.get('DADOS_RECARGA_INTERVALO_S', '0'))
+        if intervalo_recarga > 0:
+            state['tarefa_vigia'] = asyncio.create_task(state['recarregador'].vigiar(assinatura_dados, intervalo_recarga))
+            logger.info("Vigia de arquivos de dados ativo", extra={"intervalo_s": intervalo_recarga})
+
+        # 6. Resultados das entrevistas: buffer em memória gravado em lotes Parquet por uma thread
+        from resultados import ArmazemResultados
+        state['resultados'] = ArmazemResultados()
+        state['resultados'].iniciar()
+
+        # 7. Contadores dos componentes expostos como gauges em /metrics
+        from agent import BaseDeDados
+        registro_metricas.registrar_coletor('recruta_cache_consultas', lambda: BaseDeDados.cache.metricas())
+        registro_metricas.registrar_coletor('recruta_llm', lambda: state['llm'].metricas())
+        registro_metricas.registrar_coletor('recruta_sessoes', lambda: state['sessions'].metricas())
+        registro_metricas.registrar_coletor('recruta_resultados', lambda: state['resultados'].metricas())
+
+        # A API fica pronta quando as três peças entram no 'state' (ver api_pronta)
+        trocar_base(nova_base)
+        logger.info("Base de dados carregada", extra={"versao_dataset": nova_base.versao})
+        state['llm'] = llm
+        state['sessions'] = sessions
+        logger.info("Armazém de sessões configurado", extra=sessions.metricas())
+
+        # 8. Com SAUDACOES_PREAQUECER=N, gera as saudações das N vagas mais buscadas (segundo o log)
+        quantidade_preaquecer = int(os.environ.get('SAUDACOES_PREAQUECER', '0'))
+        if quantidade_preaquecer > 0:
+            state['tarefa_saudacoes'] = asyncio.create_task(preaquecer_saudacoes(quantidade_preaquecer))
+
+        inicializacao.update(status='pronta', etapa=None, tempo_ate_pronta_s=round(time.perf_counter() - INICIO_PROCESSO, 3))
+        logger.info("API pronta para receber requisições.", extra={
+            "tempo_import_s": round(TEMPO_IMPORT_S, 3), "tempo_ate_pronta_s": inicializacao['tempo_ate_pronta_s']})
+    except Exception as e:
+        inicializacao.update(status='falhou', erro=str(e))
+        logger.critical("Falha na inicialização da API", extra={"etapa": inicializacao.get('etapa'), "detalhe_erro": str(e)}, exc_info=True)
 
-    # 5. Cria um dicionário para armazenar as sessões de conversa ativas
-    state['sessions'] = {}
+async def preaquecer_saudacoes(quantidade: int):
+    """
+    Gera as saudações das vagas mais buscadas, com o nome do candidato já como marcador, para que
+    as primeiras sessões dessas vagas não esperem pelo LLM. As chamadas passam pela fila do LLM
+    como entrevistas novas; se a fila recusar (API sob carga), o pré-aquecimento para.
+    """
+    from agent import AgenteScreener, AgenteEntrevistador, MARCADOR_NOME, MARCADOR_CONHECIMENTOS
+    db = state['db']
+    geradas = 0
+    try:
+        for id_vaga in await asyncio.to_thread(vagas_mais_buscadas, n=quantidade):
+            pos_vaga = db.pos_vaga.get(id_vaga)
+            if pos_vaga is None:
+                continue
+            titulo = db.df_vagas['titulo_vaga'].iat[pos_vaga]
+            agentes = (
+                AgenteScreener(vaga_info={'id_vaga': id_vaga, 'titulo_vaga': titulo}, nome_candidato=MARCADOR_NOME, llm_instance=state['llm']),
+                AgenteEntrevistador(dossie={'id_vaga': id_vaga, 'titulo_vaga': titulo, 'nome': MARCADOR_NOME,
+                                            'conhecimentos_tecnicos': MARCADOR_CONHECIMENTOS}, llm_instance=state['llm']),
+            )
+            for agente in agentes:
+                if agente.chave_abertura in state['saudacoes']:
+                    continue
+                async with state['admissao'].vaga(PRIORIDADE_NOVA_ENTREVISTA):
+                    resposta = await agente.aconversar(agente.MENSAGEM_ABERTURA)
+                if fala_registrada(agente, resposta):
+                    geradas += lembrar_saudacao(agente, resposta)
+    except RequisicaoRejeitada:
+        logger.warning("Pré-aquecimento das saudações interrompido pela fila do LLM", extra={"saudacoes_geradas": geradas})
+        return
+    except Exception as e:
+        logger.error("Falha no pré-aquecimento das saudações", extra={"detalhe_erro": str(e)}, exc_info=True)
+        return
+    logger.info("Saudações pré-aquecidas", extra={"saudacoes_geradas": geradas})
 
-    logger.info("API iniciada e pronta para receber requisições.")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Função que gerencia o ciclo de vida da API.
+    Só prepara o que é leve e abre a porta na hora; base de dados, LLM e sessões são carregados
+    por 'inicializar' em segundo plano (acompanhe por /readyz; /predict responde 503 até lá).
+    """
+    logger.info("API do Agente Decision iniciando...", extra={"tempo_import_s": round(TEMPO_IMPORT_S, 3)})
+
+    # Controles de concorrência: admissão das chamadas ao LLM (limite de chamadas simultâneas,
+    # fila limitada com prioridades e limite de taxa por cliente) e um lock por sessão
+    # (as entradas somem sozinhas quando nenhuma requisição usa o lock)
+    state['admissao'] = ControleAdmissao()
+    state['session_locks'] = weakref.WeakValueDictionary()
+    logger.info("Controle de admissão configurado", extra={
+        "llm_max_concorrencia": state['admissao'].max_concorrencia, "fila_max": state['admissao'].max_fila,
+        "limite_taxa_cliente": state['admissao'].limitador is not None})
+    registro_metricas.registrar_coletor('recruta_logs', metricas_log)
+    registro_metricas.registrar_coletor('recruta_admissao', lambda: state['admissao'].metricas())
+    state['saudacoes'] = CacheSaudacoes()
+    registro_metricas.registrar_coletor('recruta_saudacoes', lambda: state['saudacoes'].metricas())
+
+    state['inicializacao'] = {'status': 'iniciando', 'etapa': None, 'erro': None, 'tempo_ate_pronta_s': None}
+    state['tarefa_inicializacao'] = asyncio.create_task(inicializar())
 
     yield  # A API fica rodando aqui
 
     # Código que roda QUANDO A API ENCERRA (limpeza)
     logger.info("API encerrando.")
+    for tarefa in ('tarefa_inicializacao', 'tarefa_vigia', 'tarefa_saudacoes'):
+        if tarefa in state:
+            state[tarefa].cancel()
+    # Grava os resultados de entrevista que ainda estão no buffer
+    if 'resultados' in state:
+        await asyncio.to_thread(state['resultados'].parar)
     state.clear()
 
 # --- Criação da Aplicação FastAPI ---
@@ -104,6 +275,154 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Funções Auxiliares de Concorrência ---
+
+def lock_da_sessao(session_id: str) -> asyncio.Lock:
+    """Retorna o lock da sessão, criando-o se necessário. Serializa requisições da mesma sessão."""
+    lock = state['session_locks'].get(session_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        state['session_locks'][session_id] = lock
+    return lock
+
+def identificar_cliente(http: Request, session_id: str) -> str:
+    """Chave do limite de taxa: o cabeçalho X-Client-Id, senão o IP de origem, senão a própria sessão."""
+    if http is None:
+        return session_id
+    return http.headers.get('x-client-id') or (http.client.host if http.client else session_id)
+
+def responder_rejeicao(erro: RequisicaoRejeitada, session_id: str) -> "PredictResponse":
+    """
+    Com ADMISSAO_RESPOSTA=amigavel, a recusa vira uma resposta do agente pedindo para aguardar;
+    caso contrário (padrão), vira 429 com o cabeçalho Retry-After.
+    """
+    logger.warning("Requisição recusada pelo controle de admissão", extra={
+        "session_id": session_id, "motivo": erro.motivo, "retry_after_s": erro.retry_after_s,
+        "fila": state['admissao'].tamanho_fila})
+    if os.environ.get('ADMISSAO_RESPOSTA', 'http').lower() == 'amigavel':
+        return PredictResponse(session_id=session_id, agent_reply=MENSAGEM_AGUARDE)
+    raise HTTPException(status_code=429, detail=MENSAGEM_AGUARDE, headers={"Retry-After": str(erro.retry_after_s)})
+
+async def conversar_com_agente(agent, texto: str, prioridade: int = PRIORIDADE_ENTREVISTA) -> str:
+    """Conversa com o agente sem bloquear o event loop, passando pelo controle de admissão do LLM."""
+    async with state['admissao'].vaga(prioridade):
+        with medir_etapa('llm'):
+            resposta = await agent.aconversar(texto)
+    if agent.ultimo_uso_tokens:
+        registrar_tokens(*agent.ultimo_uso_tokens)
+    return resposta
+
+def registrar_resultado(session_id: str, sessao: dict, resposta: str):
+    """Se a resposta do agente traz o resumo JSON da entrevista, enfileira o resultado (sem I/O aqui)."""
+    if state['resultados'].registrar_turno(session_id, sessao, resposta):
+        logger.info("Resumo da entrevista registrado", extra={
+            "session_id": session_id, "id_vaga": sessao['vaga_info'].get('id_vaga')})
+
+def fala_registrada(agente, resposta: str) -> bool:
+    """
+    A resposta entrou no histórico como fala do agente? Com o LLM fora do ar, o agente devolve o
+    aviso sem registrá-lo: ele não vira saudação em cache nem resultado da entrevista.
+    """
+    from agent import MENSAGEM_LLM_INDISPONIVEL
+    ultima = agente.conversation_history[-1]
+    return ultima.role == 'assistant' and ultima.content == resposta and MENSAGEM_LLM_INDISPONIVEL not in resposta
+
+def lembrar_saudacao(agente, resposta: str) -> bool:
+    """Guarda a primeira fala do agente como modelo de saudação da vaga, se ela puder ser reaproveitada."""
+    modelo = agente.modelo_de_abertura(resposta)
+    if modelo is None:
+        return False
+    state['saudacoes'].guardar(agente.chave_abertura, modelo)
+    return True
+
+def abrir_entrevista(session_id: str, sessao: dict):
+    """
+    Primeira fala do agente recém-criado. Com uma saudação da vaga em cache, ela entra no histórico
+    como se o LLM a tivesse gerado e a resposta sai pronta (sessão salva aqui); senão, o próximo
+    passo é o turno de abertura no LLM, no formato de retorno de 'avancar_sessao'.
+    """
+    agente = sessao['agent']
+    modelo = state['saudacoes'].obter(agente.chave_abertura)
+    if modelo is None:
+        return None, (agente, agente.MENSAGEM_ABERTURA, PRIORIDADE_NOVA_ENTREVISTA), sessao
+    saudacao = agente.preencher_abertura(modelo)
+    agente.iniciar_com_abertura(saudacao)
+    state['sessions'].salvar(session_id, sessao)
+    logger.info("Saudação servida do cache", extra={"session_id": session_id, "agente": type(agente).__name__})
+    return saudacao, None, sessao
+
+def avancar_sessao(session_id: str, user_input: str):
+    """
+    Executa a máquina de estados da sessão (AWAITING_CANDIDATE_NAME -> IN_CONVERSATION) até o ponto
+    em que o LLM seria chamado. Retorna (resposta, None, sessao) quando a resposta já está pronta
+    (a sessão já foi salva) ou (None, (agente, mensagem, prioridade), sessao) quando o próximo passo é
+    conversar com o agente; nesse caso, quem chama salva a sessão depois da resposta do LLM (se o
+    controle de admissão recusar a chamada, nada é salvo e a sessão fica como estava).
+    Deve ser chamada com o lock da sessão adquirido.
+    """
+    # A referência à base é obtida uma única vez: uma recarga no meio da requisição não a afeta
+    db = state['db']
+    current_session = state['sessions'].get(session_id)
+
+    # Se a sessão não existe (ou expirou), é o início de uma nova conversa.
+    if current_session is None:
+        # Sob pressão, sessões novas são recusadas antes das entrevistas em andamento
+        state['admissao'].verificar_nova_sessao()
+        with medir_etapa('buscar_vaga'):
+            vagas_encontradas = db.buscar_vaga_por_texto(user_input)
+        if vagas_encontradas.empty:
+            logger.warning("Vaga não encontrada na busca inicial", extra={"query": user_input, "session_id": session_id})
+            return "Peço desculpas, mas no momento não encontrei um processo seletivo com este nome. Agradeço seu interesse!", None, None
+
+        vaga_confirmada = vagas_encontradas.iloc[0]
+        # Log de dados para monitoramento de drift
+        logger.info("Vaga Identificada", extra={
+            "session_id": session_id, "id_vaga": vaga_confirmada.get('id_vaga'),
+            "titulo_vaga": vaga_confirmada.get('titulo_vaga'), "nivel_profissional": vaga_confirmada.get('nivel profissional'),
+            "cliente": vaga_confirmada.get('cliente')
+        })
+
+        # A sessão guarda só os campos da vaga usados pelos agentes, não a linha inteira do DataFrame.
+        # Essa cópia é o retrato da vaga da sessão: recargas posteriores da base não a alteram.
+        vaga_info = {'id_vaga': vaga_confirmada['id_vaga'], 'titulo_vaga': vaga_confirmada['titulo_vaga']}
+        current_session = {"state": "AWAITING_CANDIDATE_NAME", "vaga_info": vaga_info, "versao_dataset": db.versao}
+        state['sessions'].salvar(session_id, current_session)
+        return f"Excelente! Encontrei a vaga '{vaga_confirmada['titulo_vaga']}'. Para continuarmos, por favor, me informe seu nome completo.", None, current_session
+
+    # Fluxo para quando o agente está esperando o nome do candidato
+    if current_session['state'] == "AWAITING_CANDIDATE_NAME":
+        vaga_info = current_session['vaga_info']
+        with medir_etapa('buscar_candidato'):
+            candidato_existente = db.buscar_candidato_em_vaga(user_input, vaga_info['id_vaga'])
+
+        current_session['nome_candidato'] = user_input
+        if candidato_existente is None:
+            logger.info("Novo candidato detectado", extra={"session_id": session_id, "nome_informado": user_input})
+            from agent import AgenteScreener
+            with medir_etapa('construir_agente'):
+                current_session['agent'] = AgenteScreener(vaga_info=vaga_info, nome_candidato=user_input, llm_instance=state['llm'])
+            current_session['state'] = "IN_CONVERSATION"
+            return abrir_entrevista(session_id, current_session)
+
+        id_candidato = candidato_existente['codigo']
+        current_session['id_candidato'] = id_candidato
+        logger.info("Candidato existente localizado", extra={"session_id": session_id, "codigo_candidato": id_candidato})
+        with medir_etapa('dossie'):
+            dossie = db.get_dossie_entrevista(vaga_info['id_vaga'], id_candidato)
+        if dossie is None: raise HTTPException(status_code=500, detail="Erro ao montar dossiê para candidato existente.")
+        from agent import AgenteEntrevistador
+        with medir_etapa('construir_agente'):
+            current_session['agent'] = AgenteEntrevistador(dossie=dossie, llm_instance=state['llm'])
+        current_session['state'] = "IN_CONVERSATION"
+        return abrir_entrevista(session_id, current_session)
+
+    # Fluxo para quando a conversa já está em andamento
+    elif current_session['state'] == "IN_CONVERSATION":
+        return None, (current_session['agent'], user_input, PRIORIDADE_ENTREVISTA), current_session
+
+    else:
+        raise HTTPException(status_code=500, detail="Estado da sessão inválido.")
+
 # --- Endpoints da API ---
 
 @app.get("/", summary="Endpoint da Interface do Usuário", response_class=FileResponse, include_in_schema=False)
@@ -114,71 +433,225 @@ async def root():
     """
     return "index.html"
 
+@app.get("/healthz", summary="Liveness: o processo está de pé")
+async def healthz():
+    """
+    Responde assim que a porta abre, sem depender da base nem do LLM. Só falha (500) se a
+    inicialização em segundo plano falhou de vez, para que o orquestrador reinicie o contêiner.
+    """
+    inicializacao = state.get('inicializacao', {})
+    if inicializacao.get('status') == 'falhou':
+        raise HTTPException(status_code=500, detail=f"Inicialização falhou: {inicializacao.get('erro')}")
+    return {"status": "vivo"}
+
+@app.get("/readyz", summary="Readiness: a API já atende conversas")
+async def readyz():
+    """200 quando base, LLM e sessões estão carregados; 503 (com a etapa em andamento) enquanto isso não acontece."""
+    inicializacao = state.get('inicializacao', {})
+    if not api_pronta():
+        return JSONResponse(status_code=503, content={"status": inicializacao.get('status', 'iniciando'),
+                                                      "etapa": inicializacao.get('etapa'), "erro": inicializacao.get('erro')},
+                            headers={"Retry-After": "5"})
+    return {"status": "pronta", "versao_dataset": state['db'].versao, "tempo_import_s": round(TEMPO_IMPORT_S, 3),
+            "tempo_ate_pronta_s": inicializacao.get('tempo_ate_pronta_s')}
+
 @app.post("/predict", response_model=PredictResponse, summary="Interage com o agente de recrutamento")
-async def predict(request: PredictRequest):
+async def predict(request: PredictRequest, http: Request = None):
     """
     Endpoint principal para conversar com o agente.
     Ele gerencia o estado da conversa usando um 'session_id'.
+    Quando o controle de admissão recusa a requisição, responde 429 com Retry-After
+    (ou uma resposta amigável do agente, com ADMISSAO_RESPOSTA=amigavel).
     """
+    exigir_pronta()
     start_time = time.time()
+    etapas = iniciar_coleta()
     session_id = request.session_id
     user_input = request.user_input
 
     logger.info("Requisição recebida", extra={"session_id": session_id, "input_length": len(user_input)})
 
     try:
-        # Se a sessão não existe, é o início de uma nova conversa.
-        if session_id not in state['sessions']:
-            vagas_encontradas = state['db'].buscar_vaga_por_texto(user_input)
-            if vagas_encontradas.empty:
-                logger.warning("Vaga não encontrada na busca inicial", extra={"query": user_input, "session_id": session_id})
-                return PredictResponse(session_id=session_id, agent_reply="Peço desculpas, mas no momento não encontrei um processo seletivo com este nome. Agradeço seu interesse!")
-
-            vaga_confirmada = vagas_encontradas.iloc[0]
-            # Log de dados para monitoramento de drift
-            logger.info("Vaga Identificada", extra={
-                "session_id": session_id, "id_vaga": vaga_confirmada.get('id_vaga'),
-                "titulo_vaga": vaga_confirmada.get('titulo_vaga'), "nivel_profissional": vaga_confirmada.get('nivel profissional')
-            })
-
-            state['sessions'][session_id] = {"state": "AWAITING_CANDIDATE_NAME", "vaga_info": vaga_confirmada}
-            return PredictResponse(session_id=session_id, agent_reply=f"Excelente! Encontrei a vaga '{vaga_confirmada['titulo_vaga']}'. Para continuarmos, por favor, me informe seu nome completo.")
-
-        current_session = state['sessions'][session_id]
-
-        # Fluxo para quando o agente está esperando o nome do candidato
-        if current_session['state'] == "AWAITING_CANDIDATE_NAME":
-            vaga_info = current_session['vaga_info']
-            candidato_existente = state['db'].buscar_candidato_em_vaga(user_input, vaga_info['id_vaga'])
-
-            if candidato_existente is None:
-                logger.info("Novo candidato detectado", extra={"session_id": session_id, "nome_informado": user_input})
-                current_session['agent'] = AgenteScreener(vaga_info=vaga_info, nome_candidato=user_input, llm_instance=state['llm'])
-                current_session['state'] = "IN_CONVERSATION"
-                agent_reply = current_session['agent'].conversar("Por favor, inicie a entrevista de triagem se apresentando.")
-            else:
-                id_candidato = candidato_existente['codigo']
-                logger.info("Candidato existente localizado", extra={"session_id": session_id, "codigo_candidato": id_candidato})
-                dossie = state['db'].get_dossie_entrevista(vaga_info['id_vaga'], id_candidato)
-                if dossie is None: raise HTTPException(status_code=500, detail="Erro ao montar dossiê para candidato existente.")
-                current_session['agent'] = AgenteEntrevistador(dossie=dossie, llm_instance=state['llm'])
-                current_session['state'] = "IN_CONVERSATION"
-                agent_reply = current_session['agent'].conversar("Por favor, inicie a entrevista aprofundada se apresentando.")
-
-            return PredictResponse(session_id=session_id, agent_reply=agent_reply)
-
-        # Fluxo para quando a conversa já está em andamento
-        elif current_session['state'] == "IN_CONVERSATION":
-            agent = current_session['agent']
-            agent_reply = agent.conversar(user_input)
+        state['admissao'].verificar_cliente(identificar_cliente(http, session_id))
+        # Requisições da mesma sessão são processadas uma de cada vez, para que
+        # o histórico da conversa não seja intercalado
+        async with lock_da_sessao(session_id):
+            agent_reply, turno_llm, sessao = avancar_sessao(session_id, user_input)
+            if turno_llm is not None:
+                agent, mensagem, prioridade = turno_llm
+                agent_reply = await conversar_com_agente(agent, mensagem, prioridade)
+                state['sessions'].salvar(session_id, sessao)
+                if fala_registrada(agent, agent_reply):
+                    if prioridade == PRIORIDADE_NOVA_ENTREVISTA:
+                        lembrar_saudacao(agent, agent_reply)
+                    registrar_resultado(session_id, sessao, agent_reply)
             return PredictResponse(session_id=session_id, agent_reply=agent_reply)
 
-        else:
-            raise HTTPException(status_code=500, detail="Estado da sessão inválido.")
-
+    except RequisicaoRejeitada as e:
+        return responder_rejeicao(e, session_id)
     except Exception as e:
         logger.error("Erro inesperado no endpoint /predict", extra={"session_id": session_id, "detalhe_erro": str(e)}, exc_info=True)
         raise HTTPException(status_code=500, detail="Ocorreu um erro interno no servidor.")
     finally:
         duration = time.time() - start_time
-        logger.info("Requisição finalizada", extra={"session_id": session_id, "duration_ms": round(duration * 1000, 2)})
\ No newline at end of file
+        logger.info("Requisição finalizada", extra={"session_id": session_id, "duration_ms": round(duration * 1000, 2), "etapas_ms": etapas})
+
+def evento_sse(tipo: str, conteudo: str = "") -> str:
+    """Formata um evento Server-Sent Events com payload JSON (preserva quebras de linha do texto)."""
+    return f"data: {json.dumps({'tipo': tipo, 'conteudo': conteudo}, ensure_ascii=False)}\n\n"
+
+@app.post("/predict/stream", summary="Interage com o agente recebendo a resposta em streaming (SSE)")
+async def predict_stream(request: PredictRequest, http: Request = None):
+    """
+    Mesma máquina de estados do /predict, mas a resposta do LLM é enviada token a token
+    como Server-Sent Events: eventos 'token' com pedaços do texto, seguidos de 'fim' (ou 'erro').
+    O limite de taxa do cliente é verificado antes do streaming (429); recusas da fila do LLM,
+    que só se conhecem depois de aberto o stream, chegam como a mensagem amigável do agente.
+    """
+    exigir_pronta()
+    session_id = request.session_id
+    user_input = request.user_input
+    logger.info("Requisição recebida", extra={"session_id": session_id, "input_length": len(user_input), "streaming": True})
+    try:
+        state['admissao'].verificar_cliente(identificar_cliente(http, session_id))
+    except RequisicaoRejeitada as e:
+        return responder_rejeicao(e, session_id)
+
+    async def gerar_eventos():
+        start_time = time.time()
+        etapas = iniciar_coleta()
+        primeiro_token_ms = None
+        try:
+            async with lock_da_sessao(session_id):
+                agent_reply, turno_llm, sessao = avancar_sessao(session_id, user_input)
+                if turno_llm is None:
+                    primeiro_token_ms = round((time.time() - start_time) * 1000, 2)
+                    yield evento_sse('token', agent_reply)
+                else:
+                    agent, mensagem, prioridade = turno_llm
+                    partes = []
+                    async with state['admissao'].vaga(prioridade):
+                        with medir_etapa('llm'):
+                            async for delta in agent.aconversar_stream(mensagem):
+                                if primeiro_token_ms is None:
+                                    primeiro_token_ms = round((time.time() - start_time) * 1000, 2)
+                                partes.append(delta)
+                                yield evento_sse('token', delta)
+                    if agent.ultimo_uso_tokens:
+                        registrar_tokens(*agent.ultimo_uso_tokens)
+                    state['sessions'].salvar(session_id, sessao)
+                    agent_reply = ''.join(partes)
+                    if fala_registrada(agent, agent_reply):
+                        if prioridade == PRIORIDADE_NOVA_ENTREVISTA:
+                            lembrar_saudacao(agent, agent_reply)
+                        registrar_resultado(session_id, sessao, agent_reply)
+            yield evento_sse('fim')
+        except RequisicaoRejeitada as e:
+            logger.warning("Requisição recusada pelo controle de admissão", extra={
+                "session_id": session_id, "motivo": e.motivo, "retry_after_s": e.retry_after_s, "streaming": True})
+            yield evento_sse('token', MENSAGEM_AGUARDE)
+            yield evento_sse('fim')
+        except Exception as e:
+            logger.error("Erro inesperado no endpoint /predict/stream", extra={"session_id": session_id, "detalhe_erro": str(e)}, exc_info=True)
+            yield evento_sse('erro', "Ocorreu um erro interno no servidor.")
+        finally:
+            duration = time.time() - start_time
+            logger.info("Requisição finalizada", extra={
+                "session_id": session_id, "duration_ms": round(duration * 1000, 2), "ttft_ms": primeiro_token_ms, "streaming": True,
+                "etapas_ms": etapas
+            })
+
+    return StreamingResponse(gerar_eventos(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/vagas/{id_vaga}/candidatos-recomendados", summary="Candidatos mais aderentes às competências da vaga")
+async def candidatos_recomendados(id_vaga: str, k: int = Query(10, ge=1, le=100), somente_prospects: bool = False):
+    """
+    Ranqueia toda a base de candidatos (ou só os prospects da vaga) pela aderência entre os
+    conhecimentos técnicos e as competências pedidas, retornando os k primeiros.
+    """
+    exigir_pronta()
+    db = state['db']
+    # A primeira chamada constrói a matriz de competências: roda fora do event loop
+    with medir_etapa('recomendar'):
+        candidatos = await asyncio.to_thread(db.recomendar_candidatos_para_vaga, id_vaga, k, somente_prospects)
+    if candidatos is None:
+        raise HTTPException(status_code=404, detail="Vaga não encontrada.")
+    return {"id_vaga": id_vaga, "titulo_vaga": db.df_vagas['titulo_vaga'].iat[db.pos_vaga[id_vaga]],
+            "candidatos": candidatos.to_dict(orient='records')}
+
+@app.get("/candidatos/{id_candidato}/vagas-recomendadas", summary="Vagas mais aderentes aos conhecimentos do candidato")
+async def vagas_recomendadas(id_candidato: str, k: int = Query(10, ge=1, le=100)):
+    """Ranqueia todas as vagas pela aderência aos conhecimentos técnicos do candidato, retornando as k primeiras."""
+    exigir_pronta()
+    db = state['db']
+    with medir_etapa('recomendar'):
+        vagas = await asyncio.to_thread(db.recomendar_vagas_para_candidato, id_candidato, k)
+    if vagas is None:
+        raise HTTPException(status_code=404, detail="Candidato não encontrado.")
+    return {"id_candidato": id_candidato, "vagas": vagas.to_dict(orient='records')}
+
+@app.get("/resultados", summary="Resultados (resumos JSON) das entrevistas concluídas")
+async def listar_resultados(id_vaga: str = None, id_candidato: str = None, session_id: str = None,
+                            limite: int = Query(100, ge=1, le=1000)):
+    """
+    Resumos gerados pelos agentes ao final das entrevistas, filtrados por vaga, candidato ou sessão,
+    do mais recente ao mais antigo. Inclui os que ainda não foram gravados em disco.
+    """
+    exigir_pronta()
+    resultados = await asyncio.to_thread(state['resultados'].consultar, id_vaga, id_candidato, session_id, limite)
+    registros = []
+    for registro in resultados.to_dict(orient='records'):
+        registro['criado_em'] = registro['criado_em'].isoformat()
+        registro['resumo'] = json.loads(registro.pop('resumo_json'))
+        registros.append(registro)
+    return {"total": len(registros), "resultados": registros}
+
+@app.get("/metrics", summary="Métricas no formato do Prometheus", response_class=PlainTextResponse)
+async def metrics():
+    """Histogramas de latência por etapa e de tokens do LLM, mais os contadores do cache, do LLM, das sessões e dos logs."""
+    return PlainTextResponse(registro_metricas.texto_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/sessoes/metricas", summary="Métricas do armazém de sessões")
+async def metricas_sessoes():
+    """Retorna o backend em uso, o número de sessões, os bytes ocupados e os contadores de hits/misses/despejos."""
+    exigir_pronta()
+    return state['sessions'].metricas()
+
+@app.get("/admissao/metricas", summary="Métricas do controle de admissão")
+async def metricas_admissao():
+    """Retorna as chamadas ao LLM em andamento, a profundidade da fila por prioridade e os contadores de recusas."""
+    return state['admissao'].metricas()
+
+@app.get("/cache/metricas", summary="Métricas do cache de consultas da base")
+async def metricas_cache():
+    """Retorna hits, misses, despejos e invalidações do cache de buscas, com os bytes ocupados e a versão em cache."""
+    exigir_pronta()
+    from agent import BaseDeDados
+    return BaseDeDados.cache.metricas()
+
+@app.get("/llm/metricas", summary="Métricas da camada de resiliência do LLM")
+async def metricas_llm():
+    """Retorna os contadores por resultado (sucessos, hedges, retentativas, timeouts, rejeições), o estado do disjuntor e as latências p50/p95/p99."""
+    exigir_pronta()
+    return state['llm'].metricas()
+
+@app.post("/admin/recarregar-base", summary="Recarrega a base de dados sem reiniciar a API")
+async def recarregar_base(atualizar_dados: bool = False, x_admin_token: str = Header(default="")):
+    """
+    Constrói uma nova BaseDeDados em segundo plano, valida e troca a base em uso de forma atômica.
+    Com 'atualizar_dados=true', roda antes o pipeline de download. Exige o cabeçalho X-Admin-Token
+    igual à variável ADMIN_TOKEN (sem ADMIN_TOKEN configurado, o endpoint fica desabilitado).
+    """
+    token_esperado = os.environ.get('ADMIN_TOKEN')
+    # Comparação em bytes: com texto, compare_digest recusa caracteres fora do ASCII (TypeError -> 500)
+    if not token_esperado or not secrets.compare_digest(x_admin_token.encode(), token_esperado.encode()):
+        raise HTTPException(status_code=403, detail="Acesso negado.")
+    exigir_pronta()
+    recarregador = state['recarregador']
+    if recarregador.em_andamento:
+        raise HTTPException(status_code=409, detail="Já existe uma recarga em andamento.")
+    try:
+        return await recarregador.recarregar(motivo="admin", preparar=executar_pipeline_completo if atualizar_dados else None)
+    except Exception as e:
+        logger.error("Falha na recarga da base; a base atual foi mantida", extra={"detalhe_erro": str(e)}, exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Falha na recarga; a base atual foi mantida: {e}")
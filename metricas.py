@@ -0,0 +1,142 @@
+# metricas.py
+"""
+Métricas da API no formato texto do Prometheus (exposto em /metrics), sem dependências extras.
+
+- Histogramas de latência por etapa da requisição (buscas na base, construção do agente, LLM)
+  e de tokens de prompt/resposta por chamada ao LLM.
+- 'medir_etapa' cronometra um trecho, alimenta o histograma e, se houver uma coleta ativa na
+  requisição atual (contextvar), acumula o tempo nela para o log "Requisição finalizada".
+- Coletores registrados com 'registrar_coletor' expõem contadores de outros componentes
+  (cache de consultas, cliente do LLM, sessões) como gauges no momento da coleta.
+"""
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+# Latência (s): de 100 us a 60 s
+BORDAS_LATENCIA_S = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                     0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Tokens por chamada ao LLM
+BORDAS_TOKENS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+_etapas_da_requisicao: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar('etapas_da_requisicao', default=None)
+
+
+def _rotulos(rotulos: tuple) -> str:
+    return ','.join(f'{chave}="{valor}"' for chave, valor in rotulos)
+
+
+def _numero(valor) -> str:
+    if valor == math.inf:
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Histograma:
+    """Histograma cumulativo no estilo Prometheus, com uma série por combinação de rótulos."""
+    def __init__(self, nome: str, ajuda: str, bordas: tuple):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.bordas = tuple(bordas)
+        self._series = {}  # rótulos -> [contagens por balde..., soma, total]
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, **rotulos):
+        chave = tuple(sorted(rotulos.items()))
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [0] * (len(self.bordas) + 1) + [0.0, 0]
+            for i, borda in enumerate(self.bordas):
+                if valor <= borda:
+                    serie[i] += 1
+                    break
+            else:
+                serie[len(self.bordas)] += 1
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def series(self) -> dict:
+        with self._lock:
+            return {chave: list(serie) for chave, serie in self._series.items()}
+
+    def texto(self) -> list:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} histogram"]
+        for chave, serie in sorted(self.series().items()):
+            acumulado = 0
+            for borda, contagem in zip(self.bordas + (math.inf,), serie):
+                acumulado += contagem
+                rotulos = _rotulos(chave + (('le', _numero(borda)),))
+                linhas.append(f"{self.nome}_bucket{{{rotulos}}} {acumulado}")
+            sufixo = f"{{{_rotulos(chave)}}}" if chave else ''
+            linhas.append(f"{self.nome}_sum{sufixo} {serie[-2]}")
+            linhas.append(f"{self.nome}_count{sufixo} {serie[-1]}")
+        return linhas
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self.histogramas = {}
+        self.coletores = {}
+
+    def histograma(self, nome: str, ajuda: str, bordas: tuple) -> Histograma:
+        if nome not in self.histogramas:
+            self.histogramas[nome] = Histograma(nome, ajuda, bordas)
+        return self.histogramas[nome]
+
+    def registrar_coletor(self, prefixo: str, coletor: Callable[[], dict]):
+        """'coletor' devolve um dicionário; os valores numéricos viram gauges '<prefixo>_<chave>'."""
+        self.coletores[prefixo] = coletor
+
+    def texto_prometheus(self) -> str:
+        linhas = []
+        for histograma in self.histogramas.values():
+            linhas.extend(histograma.texto())
+        for prefixo, coletor in self.coletores.items():
+            try:
+                valores = coletor()
+            except Exception:
+                continue  # componente ainda não inicializado (ex.: durante a subida da API)
+            for chave, valor in valores.items():
+                if isinstance(valor, bool) or not isinstance(valor, (int, float)) or valor is None:
+                    continue
+                nome = f"{prefixo}_{chave}"
+                linhas.extend([f"# TYPE {nome} gauge", f"{nome} {valor}"])
+        return '\n'.join(linhas) + '\n'
+
+
+registro = RegistroMetricas()
+latencia_etapas = registro.histograma(
+    'recruta_etapa_duracao_segundos', "Duração de cada etapa do atendimento (buscas, agente, LLM).", BORDAS_LATENCIA_S)
+tokens_llm = registro.histograma(
+    'recruta_llm_tokens', "Tokens por chamada ao LLM (tipo=prompt|resposta).", BORDAS_TOKENS)
+
+
+def iniciar_coleta() -> dict:
+    """Começa a acumular os tempos das etapas da requisição atual; retorna o dicionário {etapa: ms}."""
+    etapas = {}
+    _etapas_da_requisicao.set(etapas)
+    return etapas
+
+
+@contextmanager
+def medir_etapa(etapa: str):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao = time.perf_counter() - inicio
+        latencia_etapas.observar(duracao, etapa=etapa)
+        etapas = _etapas_da_requisicao.get()
+        if etapas is not None:
+            etapas[etapa] = round(etapas.get(etapa, 0.0) + duracao * 1000, 3)
+
+
+def registrar_tokens(prompt: Optional[int], resposta: Optional[int]):
+    if prompt is not None:
+        tokens_llm.observar(prompt, tipo='prompt')
+    if resposta is not None:
+        tokens_llm.observar(resposta, tipo='resposta')
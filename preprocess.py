@@ -1,7 +1,10 @@
 # preprocess.py (Versão Otimizada para Produção)
+import hashlib
+import json
 import os
 import shutil
-import gdown
+import tempfile
+import time
 
 # --- CONFIGURAÇÃO ---
 # URL da sua pasta no Google Drive que contém os arquivos PARQUET
@@ -10,33 +13,193 @@ URL_PASTA_PARQUET_DRIVE = 'https://drive.google.com/drive/u/0/folders/1NTLOk60QF
 # Pasta final onde os Parquets serão salvos no servidor
 PASTA_PARQUET_SAIDA = 'data_processed'
 
-def executar_pipeline_completo():
+# Arquivos que precisam existir para a API conseguir carregar a base
+ARQUIVOS_ESPERADOS = ('vagas.parquet', 'prospects.parquet', 'applicants.parquet')
+
+# Manifesto com tamanho e hash de cada arquivo baixado (fica dentro da pasta de saída)
+NOME_MANIFESTO = 'manifest.json'
+
+# Idade máxima do cache para fontes remotas, em horas (DADOS_MAX_IDADE_HORAS)
+MAX_IDADE_CACHE_HORAS = 24.0
+
+
+def calcular_sha256(caminho, tamanho_bloco=1 << 20):
+    """Calcula o SHA-256 do arquivo lendo em blocos (não carrega o arquivo inteiro na memória)."""
+    digest = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            digest.update(bloco)
+    return digest.hexdigest()
+
+
+def gerar_manifesto(pasta, fonte=''):
+    """Gera o manifesto (tamanho, mtime e sha256) dos arquivos esperados na pasta."""
+    arquivos = {}
+    for nome in ARQUIVOS_ESPERADOS:
+        caminho = os.path.join(pasta, nome)
+        info = os.stat(caminho)
+        arquivos[nome] = {'tamanho': info.st_size, 'mtime_ns': info.st_mtime_ns, 'sha256': calcular_sha256(caminho)}
+    return {'fonte': fonte, 'criado_em': time.time(), 'arquivos': arquivos}
+
+
+def ler_manifesto(pasta):
+    try:
+        with open(os.path.join(pasta, NOME_MANIFESTO), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def verificar_cache(pasta, manifesto):
     """
-    Pipeline simplificado: Apenas baixa os arquivos Parquet já processados do Google Drive.
+    Confere se os arquivos da pasta batem com o manifesto.
+    Se tamanho e mtime não mudaram o arquivo é aceito direto; caso contrário o hash é recalculado.
+    """
+    if not manifesto:
+        return False
+    for nome in ARQUIVOS_ESPERADOS:
+        esperado = manifesto['arquivos'].get(nome)
+        caminho = os.path.join(pasta, nome)
+        if esperado is None or not os.path.isfile(caminho):
+            return False
+        info = os.stat(caminho)
+        if info.st_size != esperado['tamanho']:
+            return False
+        if info.st_mtime_ns != esperado['mtime_ns'] and calcular_sha256(caminho) != esperado['sha256']:
+            return False
+    return True
+
+
+class FonteGoogleDrive:
+    """Baixa os Parquets de uma pasta pública do Google Drive (via gdown)."""
+    remota = True
+
+    def __init__(self, url=URL_PASTA_PARQUET_DRIVE):
+        self.url = url
+
+    def descricao(self):
+        return self.url
+
+    def assinatura(self):
+        # Não há como saber se a pasta do Drive mudou sem baixar; o cache vale por idade
+        return None
+
+    def baixar(self, destino):
+        import gdown
+        gdown.download_folder(self.url, output=destino, quiet=False)
+
+
+class FontePastaLocal:
+    """Copia os Parquets de uma pasta local ou montada (também aceita URLs 'file://')."""
+    remota = False
+
+    def __init__(self, pasta):
+        self.pasta = pasta[len('file://'):] if pasta.startswith('file://') else pasta
+
+    def descricao(self):
+        return f"file://{os.path.abspath(self.pasta)}"
+
+    def assinatura(self):
+        """Tamanho e mtime dos arquivos de origem: se mudarem, o cache é refeito."""
+        assinatura = {}
+        for nome in ARQUIVOS_ESPERADOS:
+            info = os.stat(os.path.join(self.pasta, nome))
+            assinatura[nome] = [info.st_size, info.st_mtime_ns]
+        return assinatura
+
+    def baixar(self, destino):
+        for nome in ARQUIVOS_ESPERADOS:
+            shutil.copy2(os.path.join(self.pasta, nome), os.path.join(destino, nome))
+
+
+def criar_fonte(fonte=None):
+    """Cria a fonte de dados a partir do parâmetro ou de DADOS_FONTE (URL do Drive, pasta local ou 'file://')."""
+    fonte = fonte or os.environ.get('DADOS_FONTE') or URL_PASTA_PARQUET_DRIVE
+    if not isinstance(fonte, str):
+        return fonte
+    if fonte.startswith('file://') or os.path.isdir(fonte):
+        return FontePastaLocal(fonte)
+    return FonteGoogleDrive(fonte)
+
+
+def _cache_atual(manifesto, fonte):
+    """Decide se o cache ainda corresponde à fonte configurada."""
+    if manifesto.get('fonte') != fonte.descricao():
+        return False
+    if fonte.remota:
+        max_idade = float(os.environ.get('DADOS_MAX_IDADE_HORAS', MAX_IDADE_CACHE_HORAS))
+        return time.time() - manifesto.get('criado_em', 0) <= max_idade * 3600
+    return manifesto.get('assinatura_fonte') == fonte.assinatura()
+
+
+def _trocar_pasta(pasta_nova, pasta_destino):
+    """Substitui a pasta de destino pela nova com renomeações (a pasta antiga só é apagada no final)."""
+    pasta_antiga = None
+    if os.path.exists(pasta_destino):
+        pasta_antiga = f"{pasta_destino}.antigo-{os.getpid()}"
+        os.replace(pasta_destino, pasta_antiga)
+    os.replace(pasta_nova, pasta_destino)
+    if pasta_antiga:
+        shutil.rmtree(pasta_antiga, ignore_errors=True)
+
+
+def executar_pipeline_completo(fonte=None, pasta_saida=None, offline=None, forcar=False):
+    """
+    Pipeline de dados com cache local verificado por manifesto:
+    - se os Parquets da pasta de saída estão íntegros e atuais, nada é baixado;
+    - caso contrário, baixa para uma pasta temporária, gera o manifesto e troca a pasta de uma vez;
+    - em modo offline (DADOS_OFFLINE=1) nunca acessa a rede e usa apenas o cache.
+    Se o download falhar e existir um cache íntegro, a aplicação sobe com o cache.
     """
     print("--- Iniciando pipeline de dados otimizado ---")
-    
-    # Garante que não há dados antigos, limpando execuções anteriores
-    if os.path.exists(PASTA_PARQUET_SAIDA):
-        shutil.rmtree(PASTA_PARQUET_SAIDA)
-        print(f"Diretório antigo '{PASTA_PARQUET_SAIDA}' removido.")
-    
-    os.makedirs(PASTA_PARQUET_SAIDA)
-    print(f"Diretório de saída '{PASTA_PARQUET_SAIDA}' criado.")
-    
-    print(f"Baixando arquivos Parquet pré-processados...")
+    inicio = time.time()
+    pasta_saida = pasta_saida or PASTA_PARQUET_SAIDA
+    if offline is None:
+        offline = os.environ.get('DADOS_OFFLINE', '').lower() in ('1', 'true', 'sim')
+    fonte = criar_fonte(fonte)
+
+    manifesto = ler_manifesto(pasta_saida)
+    cache_integro = verificar_cache(pasta_saida, manifesto)
+
+    if offline:
+        if not cache_integro:
+            raise RuntimeError(f"Modo offline ativo, mas não há cache íntegro em '{pasta_saida}'.")
+        print(f"Modo offline: usando o cache em '{pasta_saida}' sem acessar a rede.")
+        return manifesto
+
+    if cache_integro and not forcar and _cache_atual(manifesto, fonte):
+        print(f"Cache em '{pasta_saida}' íntegro e atual; download ignorado ({time.time() - inicio:.2f}s).")
+        return manifesto
+
+    pasta_pai = os.path.dirname(os.path.abspath(pasta_saida))
+    pasta_temp = tempfile.mkdtemp(prefix='.download-', dir=pasta_pai)
+    print(f"Baixando arquivos Parquet pré-processados de '{fonte.descricao()}'...")
     try:
-        # Baixa os arquivos diretamente para a pasta de saída
-        gdown.download_folder(URL_PASTA_PARQUET_DRIVE, output=PASTA_PARQUET_SAIDA, quiet=False)
+        fonte.baixar(pasta_temp)
+        faltando = [nome for nome in ARQUIVOS_ESPERADOS if not os.path.isfile(os.path.join(pasta_temp, nome))]
+        if faltando:
+            raise FileNotFoundError(f"Arquivos ausentes na fonte: {', '.join(faltando)}")
+        novo_manifesto = gerar_manifesto(pasta_temp, fonte=fonte.descricao())
+        novo_manifesto['assinatura_fonte'] = fonte.assinatura()
+        with open(os.path.join(pasta_temp, NOME_MANIFESTO), 'w', encoding='utf-8') as f:
+            json.dump(novo_manifesto, f, indent=2)
+        _trocar_pasta(pasta_temp, pasta_saida)
         print("Arquivos Parquet baixados com sucesso.")
     except Exception as e:
-        print(f"ERRO CRÍTICO: Falha ao baixar os arquivos Parquet do Google Drive.")
+        shutil.rmtree(pasta_temp, ignore_errors=True)
+        if cache_integro:
+            print(f"AVISO: Falha ao baixar os arquivos ({e}). Usando o cache existente em '{pasta_saida}'.")
+            return manifesto
+        print(f"ERRO CRÍTICO: Falha ao baixar os arquivos Parquet e não há cache utilizável.")
         print(f"Detalhe do erro: {e}")
         # Se falhar aqui, a aplicação não poderá iniciar
         raise e
 
-    print("--- Pipeline de dados otimizado finalizado. ---")
+    print(f"--- Pipeline de dados otimizado finalizado ({time.time() - inicio:.2f}s). ---")
+    return novo_manifesto
 
 if __name__ == '__main__':
     # Permite que você teste o script localmente rodando 'python preprocess.py'
-    executar_pipeline_completo()
\ No newline at end of file
+    # Use 'python preprocess.py --forcar' para ignorar o cache e baixar de novo
+    import sys
+    executar_pipeline_completo(forcar='--forcar' in sys.argv)
@@ -0,0 +1,110 @@
+# recarga.py
+import asyncio
+import gc
+import time
+from typing import Callable, Optional
+
+from logger_config import logger
+
+# Colunas sem as quais a API não funciona
+COLUNAS_OBRIGATORIAS = {
+    'df_vagas': ['id_vaga', 'titulo_vaga'],
+    'df_prospects': ['id_vaga', 'codigo', 'nome'],
+    'df_applicants': ['id_candidato'],
+}
+
+
+def _rss_mb() -> float:
+    """RSS atual do processo em MB (Linux); NaN em outros sistemas."""
+    try:
+        with open('/proc/self/status') as f:
+            for linha in f:
+                if linha.startswith('VmRSS:'):
+                    return int(linha.split()[1]) / 1024
+    except FileNotFoundError:
+        pass
+    return float('nan')
+
+
+def validar_base(db):
+    """Confere se a base recém-carregada pode substituir a atual; levanta ValueError se não puder."""
+    for atributo, colunas in COLUNAS_OBRIGATORIAS.items():
+        df = getattr(db, atributo)
+        if df.empty:
+            raise ValueError(f"Tabela '{atributo}' vazia na nova base.")
+        faltando = [c for c in colunas if c not in df.columns]
+        if faltando:
+            raise ValueError(f"Tabela '{atributo}' sem as colunas obrigatórias: {', '.join(faltando)}")
+    if len(db.pos_vaga) == 0 or len(db.indice_vagas) != len(db.df_vagas):
+        raise ValueError("Índices da nova base inconsistentes com as tabelas.")
+
+
+class RecarregadorBase:
+    """
+    Recarrega a BaseDeDados fora do caminho das requisições: a nova base é construída em uma
+    thread, validada e só então trocada de uma vez (uma única atribuição em 'ao_trocar').
+    Requisições em andamento continuam usando a referência à base antiga que já obtiveram.
+    """
+    def __init__(self, fabrica: Callable[[], object], ao_trocar: Callable[[object], None],
+                 validar: Callable[[object], None] = validar_base):
+        self.fabrica = fabrica
+        self.ao_trocar = ao_trocar
+        self.validar = validar
+        self._lock = asyncio.Lock()
+        self.ultima_recarga: Optional[dict] = None
+
+    @property
+    def em_andamento(self) -> bool:
+        return self._lock.locked()
+
+    async def recarregar(self, motivo: str = "manual", preparar: Optional[Callable[[], None]] = None) -> dict:
+        """
+        Executa a recarga completa e retorna um resumo (versão, duração e memória).
+        'preparar' roda antes da fábrica, também fora do event loop (ex.: baixar os dados).
+        Se a validação falhar, a base atual é mantida e a exceção é propagada.
+        """
+        async with self._lock:
+            inicio = time.time()
+            rss_antes = _rss_mb()
+            logger.info("Recarga da base iniciada", extra={"motivo": motivo})
+            if preparar is not None:
+                await asyncio.to_thread(preparar)
+            nova_base = await asyncio.to_thread(self.fabrica)
+            await asyncio.to_thread(self.validar, nova_base)
+            # Pico: as duas bases estão na memória ao mesmo tempo logo antes da troca
+            rss_pico = _rss_mb()
+
+            versao = getattr(nova_base, 'versao', None)
+            self.ao_trocar(nova_base)
+            del nova_base
+            gc.collect()
+
+            self.ultima_recarga = {
+                "motivo": motivo,
+                "versao_dataset": versao,
+                "duracao_ms": round((time.time() - inicio) * 1000, 2),
+                "rss_antes_mb": round(rss_antes, 1),
+                "rss_pico_mb": round(rss_pico, 1),
+                "rss_depois_mb": round(_rss_mb(), 1),
+            }
+            logger.info("Recarga da base concluída", extra=self.ultima_recarga)
+            return self.ultima_recarga
+
+    async def vigiar(self, assinatura: Callable[[], str], intervalo_s: float):
+        """
+        Verifica a assinatura dos arquivos de dados a cada 'intervalo_s' segundos e recarrega
+        quando ela muda. Falhas são registradas, a base atual continua em uso e uma nova
+        tentativa só acontece na próxima mudança dos arquivos.
+        """
+        ultima = await asyncio.to_thread(assinatura)
+        while True:
+            await asyncio.sleep(intervalo_s)
+            try:
+                atual = await asyncio.to_thread(assinatura)
+                if atual != ultima and not self.em_andamento:
+                    ultima = atual
+                    await self.recarregar(motivo="arquivos alterados")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Falha na recarga automática da base", extra={"detalhe_erro": str(e)}, exc_info=True)
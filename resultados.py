@@ -0,0 +1,240 @@
+# resultados.py
+"""
+Persistência dos resultados das entrevistas: o resumo JSON que os agentes geram ao final da
+conversa ("gere o resumo JSON") é extraído da resposta, validado e guardado num buffer em memória.
+Uma thread de fundo grava o buffer em lotes num dataset Parquet particionado por data (UTC) e
+id_vaga; o turno da conversa nunca faz I/O de arquivo. 'consultar' lê os resultados de volta
+(por vaga, candidato ou sessão), incluindo os que ainda estão no buffer.
+"""
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from logger_config import logger
+
+# Resumos maiores que isso (JSON compacto) são descartados como inválidos
+MAX_BYTES_RESUMO = 32 * 1024
+
+ESQUEMA_RESULTADOS = pa.schema([
+    ('criado_em', pa.timestamp('ms', tz='UTC')),
+    ('session_id', pa.string()),
+    ('tipo_agente', pa.string()),
+    ('id_candidato', pa.string()),
+    ('nome_candidato', pa.string()),
+    ('titulo_vaga', pa.string()),
+    ('versao_dataset', pa.string()),
+    ('turnos', pa.int32()),
+    ('resumo_json', pa.string()),
+    ('data', pa.string()),
+    ('id_vaga', pa.string()),
+])
+# Pastas data=AAAA-MM-DD/id_vaga=.../ (tipos fixos: ids numéricos continuam texto na leitura)
+PARTICIONAMENTO = ds.partitioning(pa.schema([('data', pa.string()), ('id_vaga', pa.string())]), flavor='hive')
+
+_RE_BLOCO_JSON = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL | re.IGNORECASE)
+
+
+def extrair_resumo_json(texto: str) -> Optional[dict]:
+    """
+    Último objeto JSON da resposta do agente: de preferência num bloco ```json```; sem bloco,
+    o último objeto '{...}' decodificável no texto. None se não houver nenhum.
+    """
+    if not texto or '{' not in texto:
+        return None
+    for bloco in reversed(_RE_BLOCO_JSON.findall(texto)):
+        try:
+            objeto = json.loads(bloco)
+        except ValueError:
+            continue
+        if isinstance(objeto, dict):
+            return objeto
+    decodificador = json.JSONDecoder()
+    ultimo = None
+    inicio = texto.find('{')
+    while inicio != -1:
+        try:
+            objeto, fim = decodificador.raw_decode(texto, inicio)
+        except ValueError:
+            inicio = texto.find('{', inicio + 1)
+            continue
+        if isinstance(objeto, dict):
+            ultimo = objeto
+        inicio = texto.find('{', fim)
+    return ultimo
+
+
+def validar_resumo(resumo) -> Optional[str]:
+    """JSON compacto do resumo, ou None se não for um objeto não vazio de tamanho razoável."""
+    if not isinstance(resumo, dict) or not resumo:
+        return None
+    texto = json.dumps(resumo, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    return texto if len(texto.encode('utf-8')) <= MAX_BYTES_RESUMO else None
+
+
+class ArmazemResultados:
+    """
+    Buffer em memória + escritor em lote dos resumos das entrevistas.
+    O lote é gravado quando chega a 'tamanho_lote' registros ou a cada 'intervalo_s' segundos;
+    com o disco indisponível, os registros voltam ao buffer (limitado a 'max_pendentes').
+    Parâmetros: RESULTADOS_PASTA, RESULTADOS_LOTE e RESULTADOS_INTERVALO_S.
+    """
+    def __init__(self, pasta: Optional[str] = None, tamanho_lote: Optional[int] = None,
+                 intervalo_s: Optional[float] = None, max_pendentes: int = 50_000):
+        self.pasta = pasta or os.environ.get('RESULTADOS_PASTA', 'resultados_entrevistas')
+        self.tamanho_lote = tamanho_lote or int(os.environ.get('RESULTADOS_LOTE', '500'))
+        self.intervalo_s = intervalo_s or float(os.environ.get('RESULTADOS_INTERVALO_S', '30'))
+        self.max_pendentes = max_pendentes
+        self._pendentes = deque()
+        self._lock = threading.Lock()
+        self._lock_escrita = threading.Lock()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+        self.contadores = {'registrados': 0, 'resumos_invalidos': 0, 'gravados': 0, 'lotes': 0,
+                           'falhas_gravacao': 0, 'descartados': 0}
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._executar, name="escritor-resultados", daemon=True)
+        self._thread.start()
+
+    def registrar_turno(self, session_id: str, sessao: dict, resposta: str) -> bool:
+        """
+        Chamado depois de cada resposta do agente: se ela traz o resumo JSON, enfileira o resultado.
+        Só trabalho em memória (respostas sem '{' saem na primeira verificação).
+        """
+        resumo = extrair_resumo_json(resposta)
+        if resumo is None:
+            return False
+        resumo_json = validar_resumo(resumo)
+        if resumo_json is None:
+            with self._lock:
+                self.contadores['resumos_invalidos'] += 1
+            return False
+        agora = datetime.now(timezone.utc)
+        vaga_info = sessao.get('vaga_info', {})
+        agente = sessao.get('agent')
+        historico = getattr(agente, 'conversation_history', [])
+        id_candidato = sessao.get('id_candidato')
+        registro = {
+            'criado_em': agora, 'data': agora.strftime('%Y-%m-%d'), 'session_id': session_id,
+            'id_vaga': str(vaga_info.get('id_vaga')), 'titulo_vaga': vaga_info.get('titulo_vaga'),
+            'tipo_agente': type(agente).__name__ if agente is not None else None,
+            'id_candidato': str(id_candidato) if id_candidato is not None else None, 'nome_candidato': sessao.get('nome_candidato'),
+            'versao_dataset': sessao.get('versao_dataset'),
+            'turnos': sum(1 for m in historico if getattr(getattr(m, 'role', None), 'value', getattr(m, 'role', None)) == 'user'),
+            'resumo_json': resumo_json,
+        }
+        with self._lock:
+            self._pendentes.append(registro)
+            if len(self._pendentes) > self.max_pendentes:
+                self._pendentes.popleft()
+                self.contadores['descartados'] += 1
+            cheio = len(self._pendentes) >= self.tamanho_lote
+            self.contadores['registrados'] += 1
+        if cheio:
+            self._acordar.set()
+        return True
+
+    def _executar(self):
+        while not self._parar.is_set():
+            self._acordar.wait(self.intervalo_s)
+            self._acordar.clear()
+            self.descarregar()
+        self.descarregar()
+
+    def descarregar(self) -> int:
+        """Grava tudo o que está no buffer como um novo lote; retorna o número de registros gravados."""
+        with self._lock_escrita:
+            with self._lock:
+                lote = list(self._pendentes)
+                self._pendentes.clear()
+            if not lote:
+                return 0
+            try:
+                self._gravar_lote(lote)
+            except Exception as e:
+                logger.warning("Falha ao gravar resultados de entrevista; o lote volta ao buffer", extra={
+                    "registros": len(lote), "pasta": self.pasta, "detalhe_erro": str(e)})
+                with self._lock:
+                    self.contadores['falhas_gravacao'] += 1
+                    self._pendentes.extendleft(reversed(lote))
+                    while len(self._pendentes) > self.max_pendentes:
+                        self._pendentes.popleft()
+                        self.contadores['descartados'] += 1
+                return 0
+            with self._lock:
+                self.contadores['gravados'] += len(lote)
+                self.contadores['lotes'] += 1
+            return len(lote)
+
+    def _gravar_lote(self, lote: list):
+        """
+        Escreve o lote numa pasta temporária (ignorada na leitura por começar com '.') e move
+        cada arquivo para a sua partição: quem consulta nunca vê um Parquet pela metade.
+        """
+        tabela = pa.Table.from_pylist(lote, schema=ESQUEMA_RESULTADOS)
+        os.makedirs(self.pasta, exist_ok=True)
+        pasta_temp = tempfile.mkdtemp(prefix='.lote-', dir=self.pasta)
+        try:
+            ds.write_dataset(tabela, pasta_temp, format='parquet', partitioning=PARTICIONAMENTO,
+                             basename_template=f"lote-{time.time_ns()}-{{i}}.parquet")
+            for raiz, _, arquivos in os.walk(pasta_temp):
+                destino = os.path.join(self.pasta, os.path.relpath(raiz, pasta_temp))
+                for arquivo in arquivos:
+                    os.makedirs(destino, exist_ok=True)
+                    os.replace(os.path.join(raiz, arquivo), os.path.join(destino, arquivo))
+        finally:
+            shutil.rmtree(pasta_temp, ignore_errors=True)
+
+    def parar(self):
+        """Para o escritor gravando o que ainda está no buffer."""
+        self._parar.set()
+        self._acordar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+        else:
+            self.descarregar()
+
+    def consultar(self, id_vaga=None, id_candidato=None, session_id=None, limite: Optional[int] = None) -> pd.DataFrame:
+        """
+        Resultados gravados e pendentes que atendem aos filtros, do mais recente ao mais antigo.
+        Cada sessão aparece uma vez (o resumo mais recente, se o agente gerou mais de um).
+        """
+        filtros = {'id_vaga': id_vaga, 'id_candidato': id_candidato, 'session_id': session_id}
+        filtros = {coluna: str(valor) for coluna, valor in filtros.items() if valor is not None}
+
+        partes = []
+        if os.path.isdir(self.pasta):
+            expressao = None
+            for coluna, valor in filtros.items():
+                condicao = ds.field(coluna) == valor
+                expressao = condicao if expressao is None else expressao & condicao
+            dataset = ds.dataset(self.pasta, format='parquet', partitioning=PARTICIONAMENTO, schema=ESQUEMA_RESULTADOS)
+            partes.append(dataset.to_table(filter=expressao).to_pandas())
+        with self._lock:
+            pendentes = [r for r in self._pendentes if all(str(r[c]) == v for c, v in filtros.items())]
+        if pendentes:
+            partes.append(pa.Table.from_pylist(pendentes, schema=ESQUEMA_RESULTADOS).to_pandas())
+        if not partes:
+            return ESQUEMA_RESULTADOS.empty_table().to_pandas()
+
+        resultados = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+        # Invertido antes da ordenação estável: no mesmo milissegundo, o registro mais novo vem primeiro
+        resultados = resultados.iloc[::-1].sort_values('criado_em', ascending=False, kind='stable')
+        resultados = resultados.drop_duplicates('session_id', keep='first').reset_index(drop=True)
+        return resultados.head(limite) if limite else resultados
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return {**self.contadores, 'pendentes': len(self._pendentes)}
@@ -0,0 +1,72 @@
+# saudacoes.py
+"""
+Cache das primeiras falas dos agentes ("Por favor, inicie a entrevista ... se apresentando.").
+
+A saudação só depende do tipo de agente, da vaga e do prompt: a primeira fala que o LLM gera
+para uma vaga vira um modelo (o nome do candidato vira um marcador, ver
+AgenteAbstrato.modelo_de_abertura) e as sessões seguintes da mesma vaga começam sem chamar o LLM.
+Chave: (classe do agente, id_vaga, versão do prompt). As entradas expiram depois de
+SAUDACOES_TTL_S segundos e o cache guarda no máximo SAUDACOES_MAX_ENTRADAS (0 desliga o cache).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class CacheSaudacoes:
+    """Cache LRU com prazo de validade dos modelos de saudação."""
+    def __init__(self, max_entradas: Optional[int] = None, ttl_s: Optional[float] = None):
+        self.max_entradas = int(os.environ.get('SAUDACOES_MAX_ENTRADAS', '2000')) if max_entradas is None else max_entradas
+        self.ttl_s = ttl_s or float(os.environ.get('SAUDACOES_TTL_S', str(24 * 3600)))
+        self._dados = OrderedDict()  # chave -> (modelo, instante em que expira)
+        self._lock = threading.Lock()
+        self.contadores = {'hits': 0, 'misses': 0, 'guardadas': 0, 'expiradas': 0, 'despejos': 0}
+
+    def obter(self, chave: Optional[Hashable]) -> Optional[str]:
+        """Modelo de saudação válido para a chave, ou None."""
+        if chave is None or self.max_entradas <= 0:
+            return None
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is not None and item[1] <= time.monotonic():
+                del self._dados[chave]
+                self.contadores['expiradas'] += 1
+                item = None
+            if item is None:
+                self.contadores['misses'] += 1
+                return None
+            self._dados.move_to_end(chave)
+            self.contadores['hits'] += 1
+            return item[0]
+
+    def guardar(self, chave: Optional[Hashable], modelo: str):
+        if chave is None or self.max_entradas <= 0:
+            return
+        with self._lock:
+            self._dados[chave] = (modelo, time.monotonic() + self.ttl_s)
+            self._dados.move_to_end(chave)
+            self.contadores['guardadas'] += 1
+            while len(self._dados) > self.max_entradas:
+                self._dados.popitem(last=False)
+                self.contadores['despejos'] += 1
+
+    def __contains__(self, chave) -> bool:
+        with self._lock:
+            item = self._dados.get(chave)
+            return item is not None and item[1] > time.monotonic()
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return {**self.contadores, 'entradas': len(self._dados), 'max_entradas': self.max_entradas}
+
+
+def vagas_mais_buscadas(caminho_log: str = 'app_logs.log', n: int = 10, linhas: int = 50_000) -> list:
+    """id_vaga das n vagas mais buscadas nos registros "Vaga Identificada" mais recentes do log."""
+    from ingestao_logs import MENSAGEM_VAGA, ler_ultimas_linhas
+    registros = ler_ultimas_linhas(caminho_log, n=linhas, bytes_max=32 * 1024 * 1024)
+    if registros.empty or 'message' not in registros.columns or 'id_vaga' not in registros.columns:
+        return []
+    ids = registros.loc[registros['message'] == MENSAGEM_VAGA, 'id_vaga'].dropna().astype(str)
+    return ids.value_counts().head(n).index.tolist()
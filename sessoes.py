@@ -0,0 +1,284 @@
+# sessoes.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+from agent import AgenteAbstrato, AgenteScreener, AgenteEntrevistador
+
+# Classes de agente que podem ser restauradas a partir de uma sessão serializada
+TIPOS_AGENTE = {cls.__name__: cls for cls in (AgenteScreener, AgenteEntrevistador)}
+
+
+def _valor_json(valor):
+    """Converte escalares do numpy/pandas (np.int64, etc.) em tipos nativos para o JSON."""
+    return valor.item() if hasattr(valor, 'item') else str(valor)
+
+
+def serializar_sessao(sessao: dict) -> bytes:
+    """
+    Converte a sessão em JSON compacto: apenas ids, campos básicos da vaga e a lista de mensagens.
+    O agente vivo (chave 'agent') é substituído pelo seu tipo, histórico e estado.
+    """
+    dados = {chave: valor for chave, valor in sessao.items() if chave != 'agent'}
+    agente = sessao.get('agent')
+    if agente is not None:
+        dados['tipo_agente'] = type(agente).__name__
+        dados['historico'] = agente.exportar_historico()
+        dados['estado_agente'] = agente.exportar_estado()
+    return json.dumps(dados, ensure_ascii=False, separators=(',', ':'), default=_valor_json).encode('utf-8')
+
+
+def desserializar_sessao(dados: bytes, llm_instance) -> dict:
+    """Reconstrói a sessão e, se houver histórico, o agente correspondente ligado ao LLM informado."""
+    sessao = json.loads(dados)
+    historico = sessao.pop('historico', None)
+    tipo_agente = sessao.pop('tipo_agente', None)
+    estado_agente = sessao.pop('estado_agente', None)
+    if historico is not None:
+        classe = TIPOS_AGENTE.get(tipo_agente, AgenteAbstrato)
+        sessao['agent'] = classe.de_historico(llm_instance, historico, estado_agente)
+    return sessao
+
+
+class ArmazemSessoes(ABC):
+    """
+    Interface comum dos armazéns de sessão, com despejo LRU + TTL e métricas.
+    As sessões são guardadas já serializadas (bytes), o que permite contabilizar a memória
+    e retomar a sessão em qualquer processo que use o mesmo backend.
+    """
+    def __init__(self, max_sessoes: int = 10_000, ttl_segundos: float = 3600, max_bytes: Optional[int] = None):
+        self.max_sessoes = max_sessoes
+        self.ttl_segundos = ttl_segundos
+        self.max_bytes = max_bytes
+        self.contadores = {'hits': 0, 'misses': 0, 'expiradas': 0, 'despejadas_lru': 0}
+
+    @abstractmethod
+    def carregar(self, session_id: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def gravar(self, session_id: str, dados: bytes):
+        ...
+
+    @abstractmethod
+    def remover(self, session_id: str):
+        ...
+
+    @abstractmethod
+    def tamanho(self) -> tuple:
+        """Retorna (número de sessões, bytes ocupados)."""
+
+    def metricas(self) -> dict:
+        n_sessoes, n_bytes = self.tamanho()
+        return {**self.contadores, 'sessoes': n_sessoes, 'bytes': n_bytes}
+
+
+class ArmazemSessoesMemoria(ArmazemSessoes):
+    """Armazém no próprio processo: OrderedDict em ordem de último acesso (o mais antigo primeiro)."""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._dados = OrderedDict()  # session_id -> (bytes, instante do último acesso)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _descartar(self, session_id, contador):
+        dados, _ = self._dados.pop(session_id)
+        self._bytes -= len(dados)
+        self.contadores[contador] += 1
+
+    def _despejar(self, agora):
+        # Expiradas ficam no início da ordem LRU, então a varredura para na primeira sessão válida
+        while self._dados:
+            session_id, (_, acesso) = next(iter(self._dados.items()))
+            if agora - acesso <= self.ttl_segundos:
+                break
+            self._descartar(session_id, 'expiradas')
+        while self._dados and (len(self._dados) > self.max_sessoes or (self.max_bytes is not None and self._bytes > self.max_bytes)):
+            self._descartar(next(iter(self._dados)), 'despejadas_lru')
+
+    def carregar(self, session_id):
+        agora = time.time()
+        with self._lock:
+            item = self._dados.get(session_id)
+            if item is not None and agora - item[1] > self.ttl_segundos:
+                self._descartar(session_id, 'expiradas')
+                item = None
+            if item is None:
+                self.contadores['misses'] += 1
+                return None
+            self.contadores['hits'] += 1
+            self._dados[session_id] = (item[0], agora)
+            self._dados.move_to_end(session_id)
+            return item[0]
+
+    def gravar(self, session_id, dados):
+        agora = time.time()
+        with self._lock:
+            antigo = self._dados.pop(session_id, None)
+            if antigo is not None:
+                self._bytes -= len(antigo[0])
+            self._dados[session_id] = (dados, agora)
+            self._bytes += len(dados)
+            self._despejar(agora)
+
+    def remover(self, session_id):
+        with self._lock:
+            antigo = self._dados.pop(session_id, None)
+            if antigo is not None:
+                self._bytes -= len(antigo[0])
+
+    def tamanho(self):
+        with self._lock:
+            return len(self._dados), self._bytes
+
+
+class ArmazemSessoesSQLite(ArmazemSessoes):
+    """
+    Armazém em arquivo SQLite (modo WAL), compartilhado entre os workers do uvicorn
+    na mesma máquina: qualquer processo consegue retomar qualquer sessão.
+    O número de sessões e os bytes ocupados ficam na tabela 'sessoes_totais', mantida por
+    triggers a cada insert/update/delete (de qualquer processo): o despejo na gravação consulta
+    os totais em O(1), sem varrer a tabela.
+    """
+    def __init__(self, caminho: str = 'sessoes.sqlite3', **kwargs):
+        super().__init__(**kwargs)
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS sessoes (session_id TEXT PRIMARY KEY, dados BLOB NOT NULL, acesso REAL NOT NULL)"
+        )
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS idx_sessoes_acesso ON sessoes (acesso)")
+        # Totais criados uma vez (a contagem inicial cobre arquivos anteriores aos triggers), numa
+        # transação para não disputar com outro worker subindo ao mesmo tempo
+        self._conexao.execute("BEGIN IMMEDIATE")
+        try:
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS sessoes_totais (id INTEGER PRIMARY KEY CHECK (id = 0), "
+                "sessoes INTEGER NOT NULL, bytes INTEGER NOT NULL)"
+            )
+            self._conexao.execute(
+                "INSERT OR IGNORE INTO sessoes_totais SELECT 0, COUNT(*), COALESCE(SUM(length(dados)), 0) FROM sessoes"
+            )
+            self._conexao.execute(
+                "CREATE TRIGGER IF NOT EXISTS sessoes_totais_insert AFTER INSERT ON sessoes BEGIN "
+                "UPDATE sessoes_totais SET sessoes = sessoes + 1, bytes = bytes + length(NEW.dados) WHERE id = 0; END"
+            )
+            self._conexao.execute(
+                "CREATE TRIGGER IF NOT EXISTS sessoes_totais_update AFTER UPDATE OF dados ON sessoes BEGIN "
+                "UPDATE sessoes_totais SET bytes = bytes + length(NEW.dados) - length(OLD.dados) WHERE id = 0; END"
+            )
+            self._conexao.execute(
+                "CREATE TRIGGER IF NOT EXISTS sessoes_totais_delete AFTER DELETE ON sessoes BEGIN "
+                "UPDATE sessoes_totais SET sessoes = sessoes - 1, bytes = bytes - length(OLD.dados) WHERE id = 0; END"
+            )
+            self._conexao.execute("COMMIT")
+        except Exception:
+            self._conexao.execute("ROLLBACK")
+            raise
+
+    def _despejar(self, agora):
+        cursor = self._conexao.execute("DELETE FROM sessoes WHERE acesso < ?", (agora - self.ttl_segundos,))
+        self.contadores['expiradas'] += max(cursor.rowcount, 0)
+        n_sessoes, n_bytes = self._tamanho()
+        excedente = max(n_sessoes - self.max_sessoes, 0)
+        if excedente:
+            cursor = self._conexao.execute(
+                "DELETE FROM sessoes WHERE session_id IN (SELECT session_id FROM sessoes ORDER BY acesso LIMIT ?)", (excedente,)
+            )
+            self.contadores['despejadas_lru'] += max(cursor.rowcount, 0)
+        while self.max_bytes is not None and n_bytes > self.max_bytes:
+            linha = self._conexao.execute("SELECT session_id, length(dados) FROM sessoes ORDER BY acesso LIMIT 1").fetchone()
+            if linha is None:
+                break
+            self._conexao.execute("DELETE FROM sessoes WHERE session_id = ?", (linha[0],))
+            self.contadores['despejadas_lru'] += 1
+            n_bytes -= linha[1]
+
+    def carregar(self, session_id):
+        agora = time.time()
+        with self._lock:
+            linha = self._conexao.execute("SELECT dados, acesso FROM sessoes WHERE session_id = ?", (session_id,)).fetchone()
+            if linha is not None and agora - linha[1] > self.ttl_segundos:
+                self._conexao.execute("DELETE FROM sessoes WHERE session_id = ?", (session_id,))
+                self.contadores['expiradas'] += 1
+                linha = None
+            if linha is None:
+                self.contadores['misses'] += 1
+                return None
+            self.contadores['hits'] += 1
+            self._conexao.execute("UPDATE sessoes SET acesso = ? WHERE session_id = ?", (agora, session_id))
+            return bytes(linha[0])
+
+    def gravar(self, session_id, dados):
+        agora = time.time()
+        with self._lock:
+            self._conexao.execute(
+                "INSERT INTO sessoes (session_id, dados, acesso) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET dados = excluded.dados, acesso = excluded.acesso",
+                (session_id, dados, agora),
+            )
+            self._despejar(agora)
+
+    def remover(self, session_id):
+        with self._lock:
+            self._conexao.execute("DELETE FROM sessoes WHERE session_id = ?", (session_id,))
+
+    def _tamanho(self):
+        n_sessoes, n_bytes = self._conexao.execute("SELECT sessoes, bytes FROM sessoes_totais WHERE id = 0").fetchone()
+        return n_sessoes, n_bytes
+
+    def tamanho(self):
+        with self._lock:
+            return self._tamanho()
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+
+class GerenciadorSessoes:
+    """Fachada usada pela API: converte sessões (com agente vivo) de/para o armazém configurado."""
+    def __init__(self, armazem: ArmazemSessoes, llm_instance):
+        self.armazem = armazem
+        self.llm = llm_instance
+
+    def get(self, session_id: str) -> Optional[dict]:
+        dados = self.armazem.carregar(session_id)
+        return None if dados is None else desserializar_sessao(dados, self.llm)
+
+    def salvar(self, session_id: str, sessao: dict):
+        self.armazem.gravar(session_id, serializar_sessao(sessao))
+
+    def remover(self, session_id: str):
+        self.armazem.remover(session_id)
+
+    def metricas(self) -> dict:
+        return {'backend': type(self.armazem).__name__, **self.armazem.metricas()}
+
+
+def criar_armazem_sessoes() -> ArmazemSessoes:
+    """
+    Cria o armazém a partir das variáveis de ambiente:
+    SESSOES_BACKEND ('memoria' ou 'sqlite'), SESSOES_SQLITE_PATH, SESSOES_MAX,
+    SESSOES_TTL_SEGUNDOS e SESSOES_MAX_BYTES.
+    """
+    max_bytes = os.environ.get('SESSOES_MAX_BYTES')
+    config = {
+        'max_sessoes': int(os.environ.get('SESSOES_MAX', '10000')),
+        'ttl_segundos': float(os.environ.get('SESSOES_TTL_SEGUNDOS', '3600')),
+        'max_bytes': int(max_bytes) if max_bytes else None,
+    }
+    backend = os.environ.get('SESSOES_BACKEND', 'memoria').lower()
+    if backend == 'sqlite':
+        return ArmazemSessoesSQLite(caminho=os.environ.get('SESSOES_SQLITE_PATH', 'sessoes.sqlite3'), **config)
+    if backend != 'memoria':
+        raise ValueError(f"SESSOES_BACKEND inválido: '{backend}' (use 'memoria' ou 'sqlite')")
+    return ArmazemSessoesMemoria(**config)
@@ -0,0 +1,109 @@
+# tests/conftest.py
+
+import asyncio
+import weakref
+import pytest
+import pandas as pd
+from unittest.mock import MagicMock
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main
+from agent import BaseDeDados
+from admissao import ControleAdmissao
+from cache_consultas import CacheConsultas
+from resultados import ArmazemResultados
+from saudacoes import CacheSaudacoes
+from sessoes import GerenciadorSessoes, ArmazemSessoesMemoria
+from llama_index.core.llms import ChatMessage
+
+
+@pytest.fixture(autouse=True)
+def logger_sem_arquivo(monkeypatch):
+    """Evita que os testes escrevam no app_logs.log do repositório."""
+    monkeypatch.setattr(main.logger, 'handlers', [])
+
+
+@pytest.fixture(autouse=True)
+def cache_isolado(monkeypatch):
+    """Cada teste usa um cache de consultas novo (o global é compartilhado pelo processo)."""
+    cache = CacheConsultas()
+    monkeypatch.setattr(BaseDeDados, 'cache', cache)
+    return cache
+
+
+@pytest.fixture
+def arquivos_parquet(tmp_path):
+    """Grava pequenas tabelas de vagas/prospects/applicants em Parquet e devolve os caminhos."""
+    vagas = pd.DataFrame({
+        'id_vaga': ['v01', 'v02', 'v03', 'v04'],
+        'titulo_vaga': ['Engenheiro de Software Sênior', 'Cientista de Dados', 'Engenheiro de Software', 'Analista de Segurança da Informação'],
+        'competencia_tecnicas_e_comportamentais': ['Python, Docker, AWS', 'Python, R, SQL', 'Java, Spring', 'ISO 27001, Firewall'],
+        'cliente': ['Empresa A', 'Empresa B', 'Empresa A', 'Empresa C'],
+        'nivel profissional': ['Sênior', 'Pleno', 'Pleno', 'Júnior'],
+    })
+    prospects = pd.DataFrame({
+        'id_vaga': ['v01', 'v01', 'v02', 'v03'],
+        'nome': ['João Silva', 'Maria Souza', 'Carlos Pereira', 'Maria Souza'],
+        'codigo': ['c001', 'c002', 'c003', 'c002'],
+        'situacao_candidado': ['Prospect', 'Entrevista Agendada', 'Prospect', 'Prospect'],
+    })
+    applicants = pd.DataFrame({
+        'id_candidato': ['c001', 'c002', 'c003'],
+        'nome': ['João Silva', 'Maria Souza', 'Carlos Pereira'],
+        'conhecimentos_tecnicos': ['Python, Java', 'Python, Docker', 'SQL, R'],
+    })
+    caminhos = {
+        'vagas_path': tmp_path / 'vagas.parquet',
+        'prospects_path': tmp_path / 'prospects.parquet',
+        'applicants_path': tmp_path / 'applicants.parquet',
+    }
+    vagas.to_parquet(caminhos['vagas_path'])
+    prospects.to_parquet(caminhos['prospects_path'])
+    applicants.to_parquet(caminhos['applicants_path'])
+    return {k: str(v) for k, v in caminhos.items()}
+
+
+class LLMFalso:
+    """LLM assíncrono falso que registra início/fim de cada chamada para verificar concorrência."""
+    def __init__(self, atraso=0.05):
+        self.atraso = atraso
+        self.eventos = []
+        self.em_andamento = 0
+        self.pico = 0
+
+    async def achat(self, mensagens):
+        self.em_andamento += 1
+        self.pico = max(self.pico, self.em_andamento)
+        self.eventos.append(('inicio', mensagens[-1].content))
+        await asyncio.sleep(self.atraso)
+        self.eventos.append(('fim', mensagens[-1].content))
+        self.em_andamento -= 1
+        resposta = MagicMock()
+        resposta.message = ChatMessage(role="assistant", content=f"resposta para: {mensagens[-1].content}")
+        return resposta
+
+    async def astream_chat(self, mensagens):
+        async def gerar():
+            for palavra in ["Olá", ", ", "sou ", "Alex"]:
+                await asyncio.sleep(0)
+                yield MagicMock(delta=palavra)
+        return gerar()
+
+
+@pytest.fixture
+def estado_api(arquivos_parquet, tmp_path, monkeypatch):
+    """Popula o 'state' da API sem rodar o lifespan (sem download nem Groq)."""
+    llm = LLMFalso()
+    novo_estado = {
+        'db': BaseDeDados(**arquivos_parquet),
+        'llm': llm,
+        'sessions': GerenciadorSessoes(ArmazemSessoesMemoria(), llm),
+        'admissao': ControleAdmissao(max_concorrencia=8),
+        'session_locks': weakref.WeakValueDictionary(),
+        'resultados': ArmazemResultados(str(tmp_path / 'resultados')),
+        'saudacoes': CacheSaudacoes(),
+    }
+    monkeypatch.setattr(main, 'state', novo_estado)
+    return novo_estado
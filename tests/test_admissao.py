@@ -0,0 +1,85 @@
+# tests/test_admissao.py
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from admissao import (ControleAdmissao, LimitadorTaxa, RequisicaoRejeitada, MENSAGEM_AGUARDE,
+                      PRIORIDADE_ENTREVISTA, PRIORIDADE_NOVA_ENTREVISTA)
+from main import PredictRequest, predict
+
+
+def test_fila_atende_entrevistas_antes_e_recusa_trabalho_novo_sob_pressao():
+    controle = ControleAdmissao(max_concorrencia=1, max_fila=2, fracao_fila_novas=0.5, espera_max_s=1)
+    ordem = []
+
+    async def chamar(nome, prioridade):
+        async with controle.vaga(prioridade):
+            ordem.append(nome)
+            await asyncio.sleep(0.01)
+
+    async def cenario():
+        ocupante = asyncio.create_task(chamar('ocupante', PRIORIDADE_ENTREVISTA))
+        await asyncio.sleep(0)
+        nova = asyncio.create_task(chamar('nova', PRIORIDADE_NOVA_ENTREVISTA))
+        await asyncio.sleep(0)
+        # A fila já tem 1 (= fração reservada a trabalho novo): novas entrevistas e sessões são recusadas
+        with pytest.raises(RequisicaoRejeitada) as recusa:
+            await chamar('outra nova', PRIORIDADE_NOVA_ENTREVISTA)
+        assert recusa.value.motivo == 'novas' and recusa.value.retry_after_s >= 1
+        with pytest.raises(RequisicaoRejeitada):
+            controle.verificar_nova_sessao()
+        entrevista = asyncio.create_task(chamar('entrevista', PRIORIDADE_ENTREVISTA))
+        await asyncio.sleep(0)
+        assert controle.metricas()['fila'] == 2
+        with pytest.raises(RequisicaoRejeitada) as cheia:
+            await chamar('excedente', PRIORIDADE_ENTREVISTA)
+        assert cheia.value.motivo == 'fila_cheia'
+        await asyncio.gather(ocupante, nova, entrevista)
+
+    asyncio.run(cenario())
+    assert ordem == ['ocupante', 'entrevista', 'nova']
+    metricas = controle.metricas()
+    assert metricas['em_uso'] == 0 and metricas['fila'] == 0 and metricas['admitidas'] == 3
+    assert metricas['rejeitadas_novas'] == 2 and metricas['rejeitadas_fila_cheia'] == 1
+
+
+def test_espera_longa_desiste_e_libera_a_vez():
+    controle = ControleAdmissao(max_concorrencia=1, max_fila=4, espera_max_s=0.02)
+
+    async def cenario():
+        async with controle.vaga():
+            with pytest.raises(RequisicaoRejeitada) as recusa:
+                async with controle.vaga():
+                    pass
+            assert recusa.value.motivo == 'tempo_espera'
+        async with controle.vaga():
+            pass
+
+    asyncio.run(cenario())
+    assert controle.em_uso == 0 and controle.contadores['rejeitadas_tempo_espera'] == 1
+
+
+def test_limitador_de_taxa_por_cliente():
+    limitador = LimitadorTaxa(taxa_por_s=1, rajada=2)
+    assert limitador.permitir('a') is None and limitador.permitir('a') is None
+    assert 0 < limitador.permitir('a') <= 1
+    assert limitador.permitir('b') is None
+
+
+def test_predict_recusa_com_429_ou_resposta_amigavel(estado_api, monkeypatch):
+    estado_api['admissao'] = ControleAdmissao(max_concorrencia=2, taxa_por_cliente=0.01, rajada_por_cliente=1)
+
+    async def cenario():
+        await predict(PredictRequest(session_id="r1", user_input="Cientista de Dados"))
+        with pytest.raises(HTTPException) as erro:
+            await predict(PredictRequest(session_id="r1", user_input="Fulano"))
+        assert erro.value.status_code == 429 and int(erro.value.headers['Retry-After']) >= 1
+        monkeypatch.setenv('ADMISSAO_RESPOSTA', 'amigavel')
+        return await predict(PredictRequest(session_id="r1", user_input="Fulano"))
+
+    assert asyncio.run(cenario()).agent_reply == MENSAGEM_AGUARDE
+    # A sessão não avançou: continua esperando o nome do candidato
+    assert estado_api['sessions'].get('r1')['state'] == "AWAITING_CANDIDATE_NAME"
+    assert estado_api['admissao'].metricas()['rejeitadas_limite_cliente'] == 2
@@ -1,8 +1,9 @@
 # tests/test_agent.py
 
+import asyncio
 import pytest
 import pandas as pd
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, AsyncMock
 
 # Importa as classes do seu projeto que vamos testar
 import sys
@@ -126,4 +127,40 @@ def test_agente_conversar_chama_llm_e_atualiza_historico(mock_llm):
     assert len(agente.conversation_history) == 3
     assert agente.conversation_history[1].role == "user"
     assert agente.conversation_history[2].role == "assistant"
-    print("✅ Teste 'test_agente_conversar_chama_llm_e_atualiza_historico' passou.")
\ No newline at end of file
+    print("✅ Teste 'test_agente_conversar_chama_llm_e_atualiza_historico' passou.")
+
+
+def test_agente_aconversar_usa_achat(mock_llm):
+    """Testa se 'aconversar' usa a API assíncrona do LLM quando ela existe."""
+    mock_llm.achat = AsyncMock(return_value=mock_llm.chat.return_value)
+    agente = AgenteScreener(vaga_info=pd.Series({'titulo_vaga': 'Analista de BI'}), nome_candidato="Teste", llm_instance=mock_llm)
+
+    resposta_agente = asyncio.run(agente.aconversar("Olá"))
+
+    assert resposta_agente == "Esta é uma resposta simulada do LLM."
+    mock_llm.achat.assert_awaited_once()
+    mock_llm.chat.assert_not_called()
+    assert len(agente.conversation_history) == 3
+
+def test_agente_aconversar_sem_achat_usa_thread(mock_llm):
+    """Sem 'achat' assíncrono, a chamada síncrona roda fora do event loop."""
+    agente = AgenteScreener(vaga_info=pd.Series({'titulo_vaga': 'Analista de BI'}), nome_candidato="Teste", llm_instance=mock_llm)
+
+    resposta_agente = asyncio.run(agente.aconversar("Olá"))
+
+    assert resposta_agente == "Esta é uma resposta simulada do LLM."
+    mock_llm.chat.assert_called_once()
+
+def test_agente_registra_tokens_e_limita_historico(mock_llm):
+    """O histórico enviado ao LLM respeita o orçamento de tokens configurado."""
+    from historico import GerenciadorHistorico
+    agente = AgenteScreener(vaga_info=pd.Series({'titulo_vaga': 'Analista de BI'}), nome_candidato="Teste", llm_instance=mock_llm)
+    agente.gerenciador_historico = GerenciadorHistorico(max_tokens=300, mensagens_recentes=2)
+
+    for i in range(20):
+        agente.conversar(f"Resposta longa número {i} " + "com bastante detalhe " * 5)
+
+    assert len(agente.tokens_prompt_por_turno) == 20
+    assert max(agente.tokens_prompt_por_turno) <= 300
+    assert agente.conversation_history[0].role == "system"
+    assert "Resposta longa número 19" in agente.conversation_history[-2].content
@@ -0,0 +1,32 @@
+# tests/test_bench_escala.py
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+from bench_escala import gerar_dados_sinteticos, comparar_com_baseline
+from agent import BaseDeDados
+
+
+def test_dados_sinteticos_carregam_e_as_buscas_encontram(tmp_path):
+    caminhos = gerar_dados_sinteticos(200, str(tmp_path))
+    db = BaseDeDados(**caminhos)
+    assert len(db.df_applicants) == 200 and len(db.df_prospects) == 200 and len(db.df_vagas) == 20
+
+    prospect = db.df_prospects.iloc[0]
+    assert not db.buscar_vaga_por_texto(db.df_vagas['titulo_vaga'].iloc[0]).empty
+    assert db.buscar_candidato_em_vaga(prospect['nome'], prospect['id_vaga']) is not None
+    assert db.get_dossie_entrevista(prospect['id_vaga'], prospect['codigo']) is not None
+
+
+def test_comparacao_aponta_regressoes_acima_da_tolerancia():
+    medida = {'init_s': 1.0, 'pico_rss_mb': 100.0,
+              **{b: {'p50_us': 10.0, 'p95_us': 20.0}
+                 for b in ('buscar_vaga_por_texto', 'buscar_candidato_em_vaga', 'get_dossie_entrevista')}}
+    baseline = {'resultados': {'10000': medida}}
+    assert comparar_com_baseline({'10000': medida}, baseline) == []
+
+    lenta = {**medida, 'init_s': 2.0, 'get_dossie_entrevista': {'p50_us': 10.0, 'p95_us': 50.0}}
+    regressoes = comparar_com_baseline({'10000': lenta, '100000': lenta}, baseline)
+    assert len(regressoes) == 2
+    assert all(r.startswith('10000 linhas') for r in regressoes)
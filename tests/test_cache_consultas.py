@@ -0,0 +1,58 @@
+# tests/test_cache_consultas.py
+
+import numpy as np
+import pytest
+
+from agent import BaseDeDados
+from cache_consultas import CacheConsultas
+
+
+def test_variacoes_da_mesma_busca_reaproveitam_o_cache(arquivos_parquet, cache_isolado):
+    db = BaseDeDados(**arquivos_parquet)
+
+    primeira = db.buscar_vaga_por_texto("Engenheiro de Software")
+    segunda = db.buscar_vaga_por_texto("  ENGENHEIRO   software ")
+    assert list(primeira['id_vaga']) == list(segunda['id_vaga'])
+    assert db.buscar_candidato_em_vaga("joao silva", 'v01')['codigo'] == 'c001'
+    assert db.buscar_candidato_em_vaga("João  Silva", 'v01')['codigo'] == 'c001'
+    assert db.get_dossie_entrevista('v01', 'c001')['nome'] == 'João Silva'
+    assert db.get_dossie_entrevista('v01', 'c001')['nome'] == 'João Silva'
+
+    metricas = cache_isolado.metricas()
+    assert metricas['hits'] == 3 and metricas['misses'] == 3
+    assert metricas['versao_dataset'] == db.versao_cache
+
+    # O DataFrame devolvido é novo a cada chamada: alterá-lo não contamina o cache
+    primeira.loc[primeira.index[0], 'titulo_vaga'] = 'alterado'
+    assert 'alterado' not in set(db.buscar_vaga_por_texto("engenheiro software")['titulo_vaga'])
+
+
+def test_resultados_em_cache_sao_somente_leitura():
+    cache = CacheConsultas()
+    posicoes = cache.obter('v1', 'k', lambda: np.array([3, 1, 2]))
+    with pytest.raises(ValueError):
+        posicoes[0] = 0
+    assert cache.obter('v1', 'lista', lambda: [(1, 0.5)]) == ((1, 0.5),)
+
+
+def test_despejo_por_bytes_e_invalidacao_por_versao():
+    cache = CacheConsultas(max_bytes=3000)
+    for i in range(10):
+        cache.obter('v1', ('vagas', i), lambda: np.arange(100))
+    metricas = cache.metricas()
+    assert metricas['despejos'] > 0 and metricas['bytes'] <= 3000
+    assert metricas['entradas'] < 10
+
+    # Nova versão descarta as entradas antigas; consultas atrasadas da versão antiga não entram no cache
+    cache.obter('v2', 'k', lambda: 1)
+    assert cache.metricas()['invalidacoes'] == 1
+    cache.obter('v1', 'atrasada', lambda: 1)
+    metricas = cache.metricas()
+    assert metricas['versao_dataset'] == 'v2' and metricas['entradas'] == 1
+
+    # Voltar explicitamente a uma versão antiga (troca de base) volta a usar o cache
+    cache.ativar_versao('v1')
+    cache.obter('v1', 'k', lambda: 1)
+    cache.obter('v1', 'k', lambda: 1)
+    assert cache.metricas()['versao_dataset'] == 'v1'
+    assert cache.metricas()['hits'] == 1
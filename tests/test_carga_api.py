@@ -0,0 +1,26 @@
+# tests/test_carga_api.py
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+from carga_api import LLMSimulado, rodar_carga, gerar_sessoes_sinteticas, comparar_relatorios
+from agent import BaseDeDados
+
+
+def test_carga_reproduz_sessoes_e_relata_percentis_por_fase(arquivos_parquet):
+    sessoes = gerar_sessoes_sinteticas(BaseDeDados(**arquivos_parquet), n_sessoes=6, turnos_conversa=2)
+    llm = LLMSimulado(latencia_s=0.001, tokens_por_s=10_000, taxa_erro=0.0)
+
+    relatorio = asyncio.run(rodar_carga(arquivos_parquet, sessoes, concorrencia=3, llm_simulado=llm))
+
+    assert relatorio['sessoes'] == 6 and relatorio['vazao_rps'] > 0
+    for fase in ('busca_vaga', 'nome', 'conversa'):
+        assert relatorio['fases'][fase]['n'] > 0
+        assert relatorio['fases'][fase]['erros'] == 0
+        assert {'p50_ms', 'p95_ms', 'p99_ms'} <= set(relatorio['fases'][fase])
+    assert relatorio['llm']['sucessos'] == relatorio['llm']['chamadas']
+
+    comparacao = comparar_relatorios(relatorio, relatorio)
+    assert comparacao['total']['p99_%'] == 0.0
@@ -0,0 +1,47 @@
+# tests/test_competencias.py
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from competencias import MatrizCompetencias
+from main import candidatos_recomendados, vagas_recomendadas
+
+
+def test_matriz_ranqueia_por_cosseno_com_idf():
+    matriz = MatrizCompetencias(
+        ["Python, Java", "Python, Docker", "SQL, R", None, "Experiência com AWS e Docker"],
+        ["Python, Docker, AWS", "Python, R, SQL", "Java, Spring"])
+    assert 'experiencia' not in matriz.termos and 'com' not in matriz.termos
+
+    posicoes, pontos = matriz.candidatos_para_vaga(0, k=3)
+    assert posicoes.tolist() == [4, 1, 0]
+    assert list(pontos) == sorted(pontos, reverse=True) and 0 < pontos[-1] and pontos[0] <= 1
+    # Candidatos sem nenhum termo em comum (ou sem conhecimentos) ficam de fora
+    assert set(matriz.candidatos_para_vaga(0, k=10)[0].tolist()) == {0, 1, 4}
+    assert matriz.candidatos_para_vaga(0, k=2, posicoes_candidatos=[0, 2, 3])[0].tolist() == [0]
+
+    assert matriz.vagas_para_candidato(2)[0].tolist() == [1]
+    assert matriz.termos_em_comum(4, 0) == ['aws', 'docker']
+
+
+def test_base_recomenda_candidatos_e_vagas(estado_api):
+    db = estado_api['db']
+    candidatos = db.recomendar_candidatos_para_vaga('v01', k=2)
+    # v01 pede Python, Docker e AWS: Maria (Python, Docker) vem antes de João (Python, Java)
+    assert candidatos['id_candidato'].tolist() == ['c002', 'c001']
+    assert candidatos['competencias_em_comum'].iloc[0] == ['docker', 'python']
+    assert db.recomendar_candidatos_para_vaga('v02', somente_prospects=True)['id_candidato'].tolist() == ['c003']
+    assert db.recomendar_vagas_para_candidato('c003')['id_vaga'].iloc[0] == 'v02'
+    assert db.recomendar_candidatos_para_vaga('inexistente') is None
+
+
+def test_endpoints_de_recomendacao(estado_api):
+    resposta = asyncio.run(candidatos_recomendados('v03', k=5, somente_prospects=False))
+    assert resposta['titulo_vaga'] == 'Engenheiro de Software'
+    assert [c['id_candidato'] for c in resposta['candidatos']] == ['c001']
+    assert asyncio.run(vagas_recomendadas('c001', k=1))['vagas'][0]['id_vaga'] == 'v03'
+    with pytest.raises(HTTPException) as erro:
+        asyncio.run(vagas_recomendadas('nao-existe', k=1))
+    assert erro.value.status_code == 404
@@ -0,0 +1,34 @@
+# tests/test_compilar_dataset.py
+
+import os
+import json
+import pandas as pd
+
+from agent import BaseDeDados
+from compilar_dataset import compilar
+
+
+def test_snapshot_compilado_carrega_sem_reprocessar(arquivos_parquet, tmp_path):
+    pasta_entrada = os.path.dirname(arquivos_parquet['vagas_path'])
+    pasta_saida = str(tmp_path / 'compilado')
+    metadados = compilar(pasta_entrada, pasta_saida)
+
+    with open(os.path.join(pasta_saida, 'snapshot.json')) as f:
+        assert json.load(f)['versao'] == metadados['versao']
+
+    db = BaseDeDados.de_snapshot(pasta_saida)
+    db_bruto = BaseDeDados(**arquivos_parquet)
+    assert db.versao == db_bruto.versao
+    # Mesmos dados, outra ordem de linhas: o cache de consultas não pode misturar as posições das duas
+    assert db.versao_cache != db_bruto.versao_cache
+    # Tabelas ordenadas pelas chaves e com o texto normalizado pré-calculado
+    assert db.df_prospects[['id_vaga', 'codigo']].values.tolist() == sorted(db.df_prospects[['id_vaga', 'codigo']].values.tolist())
+    assert db.df_vagas.loc[db.df_vagas['id_vaga'] == 'v04', 'titulo_vaga_norm'].iloc[0] == 'analista de seguranca da informacao'
+    # As categorias decididas na compilação voltam com o schema, sem novo 'nunique()'
+    for tabela, df in (('vagas', db.df_vagas), ('prospects', db.df_prospects), ('applicants', db.df_applicants)):
+        assert metadados['tabelas'][tabela]['categorias'] == [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+
+    # As buscas respondem igual à base carregada dos Parquets brutos
+    assert db.buscar_vaga_por_texto("engenheiro software")['id_vaga'].tolist() == ['v03', 'v01']
+    assert db.buscar_candidato_em_vaga("maria", "v01")['codigo'] == 'c002'
+    assert db.get_dossie_entrevista('v01', 'c002')['conhecimentos_tecnicos'] == 'Python, Docker'
@@ -0,0 +1,36 @@
+# tests/test_dados_compartilhados.py
+
+import os
+
+from agent import BaseDeDados
+from dados_compartilhados import materializar_arrow, abrir_tabela_arrow
+
+
+def test_materializa_com_projecao_e_reaproveita(arquivos_parquet, tmp_path):
+    pasta = str(tmp_path / 'arrow')
+    caminhos = {'vagas': arquivos_parquet['vagas_path']}
+    colunas = {'vagas': ['id_vaga', 'titulo_vaga', 'coluna_inexistente']}
+
+    arquivo = materializar_arrow(caminhos, pasta, colunas)['vagas']
+    mtime = os.stat(arquivo).st_mtime_ns
+    assert abrir_tabela_arrow(arquivo).columns.tolist() == ['id_vaga', 'titulo_vaga']
+
+    # Um segundo worker reaproveita o arquivo já materializado
+    materializar_arrow(caminhos, pasta, colunas)
+    assert os.stat(arquivo).st_mtime_ns == mtime
+
+    # Mudar a projeção gera um novo arquivo
+    materializar_arrow(caminhos, pasta, {'vagas': ['id_vaga']})
+    assert abrir_tabela_arrow(arquivo).columns.tolist() == ['id_vaga']
+
+
+def test_base_de_dados_modo_arrow_equivale_ao_parquet(arquivos_parquet, tmp_path):
+    db_parquet = BaseDeDados(**arquivos_parquet)
+    db_arrow = BaseDeDados(**arquivos_parquet, pasta_arrow=str(tmp_path / 'arrow'))
+
+    assert db_arrow.buscar_vaga_por_texto("engenheiro software")['id_vaga'].tolist() == \
+        db_parquet.buscar_vaga_por_texto("engenheiro software")['id_vaga'].tolist()
+    assert db_arrow.buscar_candidato_em_vaga("maria", "v01")['codigo'] == 'c002'
+    dossie = db_arrow.get_dossie_entrevista('v01', 'c002')
+    assert dossie['nome'] == 'Maria Souza'
+    assert dossie['conhecimentos_tecnicos'] == 'Python, Docker'
@@ -0,0 +1,35 @@
+# tests/test_historico.py
+
+from llama_index.core.llms import ChatMessage
+
+from historico import GerenciadorHistorico, PREFIXO_RESUMO
+
+
+def _conversa(n_rodadas):
+    historico = [ChatMessage(role="system", content="Prompt do sistema " * 10)]
+    for i in range(n_rodadas):
+        historico.append(ChatMessage(role="assistant", content=f"Pergunta {i}: " + "detalhe " * 20))
+        historico.append(ChatMessage(role="user", content=f"Resposta {i}: " + "conteudo " * 20))
+    return historico
+
+
+def test_historico_dentro_do_orcamento_nao_muda():
+    gerenciador = GerenciadorHistorico(max_tokens=10_000)
+    historico = _conversa(3)
+    assert gerenciador.compactar(historico) is historico
+
+
+def test_historico_compacta_rodadas_antigas_em_fatos():
+    gerenciador = GerenciadorHistorico(max_tokens=400, mensagens_recentes=4)
+    historico = gerenciador.compactar(_conversa(10))
+
+    assert historico[0].content.startswith("Prompt do sistema")
+    assert historico[1].content.startswith(PREFIXO_RESUMO)
+    assert historico[-1].content.startswith("Resposta 9:")
+    assert gerenciador.tokens(historico) <= 400
+
+    # Compactações seguidas atualizam o mesmo bloco de fatos, sem duplicá-lo
+    historico += _conversa(4)[1:]
+    historico = gerenciador.compactar(historico)
+    assert sum(1 for m in historico if m.content.startswith(PREFIXO_RESUMO)) == 1
+    assert gerenciador.tokens(historico) <= 400
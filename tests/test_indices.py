@@ -0,0 +1,70 @@
+# tests/test_indices.py
+
+from agent import BaseDeDados
+from indices import IndiceInvertido, IndiceNomes, indice_unico, normalizar_texto
+
+
+def test_normalizar_texto_remove_acentos():
+    assert normalizar_texto("Segurança da INFORMAÇÃO") == "seguranca da informacao"
+    assert normalizar_texto(None) == ""
+
+
+def test_indice_invertido_intersecta_e_ranqueia():
+    indice = IndiceInvertido(['Engenheiro de Software Sênior', 'Cientista de Dados', 'Engenheiro de Software'])
+    # Ambas contêm as palavras; o título mais específico (sem 'Sênior') vem primeiro
+    assert indice.buscar("vaga de engenheiro software").tolist() == [2, 0]
+    # Prefixos e acentos são tolerados
+    assert indice.buscar("engenh senior").tolist() == [0]
+    assert indice.buscar("de para").size == 0
+    assert indice.buscar("Cientista Java").size == 0
+
+
+def test_indice_invertido_stop_words_configuraveis():
+    indice = IndiceInvertido(['Analista de Dados', 'Analista de Sistemas'], stop_words=['analista'])
+    assert indice.buscar("analista").size == 0
+    assert indice.buscar("de").tolist() == [0, 1]
+
+
+def test_base_de_dados_busca_vaga_real(arquivos_parquet):
+    db = BaseDeDados(**arquivos_parquet)
+    resultado = db.buscar_vaga_por_texto("Engenheiro Software")
+    assert resultado['id_vaga'].tolist() == ['v03', 'v01']
+    assert db.buscar_vaga_por_texto("seguranca").iloc[0]['id_vaga'] == 'v04'
+    assert db.buscar_vaga_por_texto("vaga de").empty
+
+
+def test_indice_nomes_restringe_a_chave_e_tolera_erros():
+    indice = IndiceNomes(['v01', 'v01', 'v02'], ['João Silva', 'Maria Souza', 'Maria (Souza)*'])
+    assert indice.posicoes('v01').tolist() == [0, 1]
+    resultado = indice.buscar("maria souza", 'v01', limiar=0.6)
+    assert resultado[0] == (1, 1.0)
+    assert [p for p, _ in indice.buscar("Mria Souza", 'v01', limiar=0.5)] == [1]
+    # Metacaracteres de regex no nome não causam erro
+    assert [p for p, _ in indice.buscar("Maria (Souza)*", 'v02', limiar=0.6)] == [2]
+    assert indice.buscar("Maria", 'v99') == []
+
+
+def test_base_de_dados_busca_candidato_real(arquivos_parquet):
+    db = BaseDeDados(**arquivos_parquet)
+    assert db.buscar_candidato_em_vaga("maria", "v01")['codigo'] == 'c002'
+    assert db.buscar_candidato_em_vaga("Carlos Pereira", "v01") is None
+    ranking = db.ranquear_candidatos_em_vaga("Joao Silva", "v01")
+    assert ranking['codigo'].tolist() == ['c001']
+    assert ranking['similaridade'].iloc[0] == 1.0
+
+
+def test_indice_unico_mantem_primeira_ocorrencia():
+    assert indice_unico(['a', 'b', 'a']) == {'a': 0, 'b': 1}
+    assert indice_unico(['v1', 'v1'], ['c1', 'c2']) == {('v1', 'c1'): 0, ('v1', 'c2'): 1}
+
+
+def test_base_de_dados_dossie_real(arquivos_parquet):
+    db = BaseDeDados(**arquivos_parquet)
+    dossie = db.get_dossie_entrevista('v01', 'c002')
+    assert dossie['titulo_vaga'] == 'Engenheiro de Software Sênior'
+    assert dossie['conhecimentos_tecnicos'] == 'Python, Docker'
+    assert dossie['situacao_candidado'] == 'Entrevista Agendada'
+    assert dossie.get('inexistente', 'N/A') == 'N/A'
+    # Sem prospect ligando vaga e candidato, o dossiê ainda é montado com vaga + applicant
+    assert db.get_dossie_entrevista('v04', 'c003')['nome'] == 'Carlos Pereira'
+    assert db.get_dossie_entrevista('v99', 'c002') is None
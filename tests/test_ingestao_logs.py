@@ -0,0 +1,76 @@
+# tests/test_ingestao_logs.py
+
+import json
+import os
+
+from ingestao_logs import IngestorLogs, carregar_rollups, resumo_rollups, percentis_por_etapa, ler_ultimas_linhas
+
+
+def _escrever(caminho, registros, modo='a'):
+    with open(caminho, modo, encoding='utf-8') as f:
+        for registro in registros:
+            f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+
+def _fim(asctime, duracao):
+    return {"asctime": asctime, "levelname": "INFO", "message": "Requisição finalizada", "duration_ms": duracao,
+            "etapas_ms": {"buscar_vaga": 0.2, "llm": duracao - 1}}
+
+
+def test_ingestao_incremental_segue_rotacao_e_soma_rollups(tmp_path):
+    log = str(tmp_path / 'app_logs.log')
+    pasta = str(tmp_path / 'rollups')
+    _escrever(log, [
+        _fim("2025-06-08 10:00:05,000", 100.0),
+        {"asctime": "2025-06-08 10:00:30,000", "levelname": "ERROR", "message": "Erro inesperado no endpoint /predict"},
+        {"asctime": "2025-06-08 10:01:00,000", "levelname": "INFO", "message": "Vaga Identificada",
+         "nivel_profissional": "Sênior", "cliente": "Empresa A"},
+    ], 'w')
+    # Linha ainda sendo escrita (sem '\n') fica para a próxima ingestão
+    with open(log, 'a', encoding='utf-8') as f:
+        f.write('{"asctime": "2025-06-08 10:00:')
+    assert IngestorLogs(log, pasta).ingerir()['linhas'] == 3
+
+    # Um novo ingestor (ex.: dashboard reiniciado) continua do offset persistido, atravessando a rotação
+    with open(log, 'a', encoding='utf-8') as f:
+        f.write('59,000", "levelname": "INFO", "message": "Requisição finalizada", "duration_ms": 2000.0}\n')
+    os.replace(log, log + '.1')
+    _escrever(log, [_fim("2025-06-08 10:02:00,000", 50.0)], 'w')
+    assert IngestorLogs(log, pasta).ingerir()['linhas'] == 2
+    assert IngestorLogs(log, pasta).ingerir()['linhas'] == 0
+
+    minutos, contagens, etapas = carregar_rollups(pasta)
+    por_minuto = minutos.set_index(minutos['minuto'].dt.strftime('%H:%M'))
+    assert por_minuto.loc['10:00', 'requisicoes'] == 2 and por_minuto.loc['10:00', 'erros'] == 1
+    assert por_minuto.loc['10:02', 'requisicoes'] == 1
+
+    resumo = resumo_rollups(minutos)
+    assert resumo['requisicoes'] == 3 and resumo['erros'] == 1
+    assert resumo['duracao_media_ms'] == (100.0 + 2000.0 + 50.0) / 3
+    assert 100 <= resumo['p50_ms'] <= 130 and resumo['p99_ms'] >= 2000
+
+    assert set(zip(contagens['dimensao'], contagens['valor'])) == {('nivel_profissional', 'Sênior'), ('cliente', 'Empresa A')}
+    por_etapa = percentis_por_etapa(etapas)
+    assert por_etapa.loc['buscar_vaga', 'n'] == 2 and por_etapa.loc['llm', 'n'] == 2
+    assert 0.2 <= por_etapa.loc['buscar_vaga', 'p95_ms'] <= 0.25
+    assert por_etapa.loc['llm', 'p50_ms'] < 130
+
+    assert list(ler_ultimas_linhas(log, 10)['duration_ms']) == [50.0]
+
+
+def test_etapas_ausentes_nao_entram_nos_percentis(tmp_path):
+    log = str(tmp_path / 'app_logs.log')
+    pasta = str(tmp_path / 'rollups')
+    fim = {"asctime": "2025-06-08 10:00:05,000", "levelname": "INFO", "message": "Requisição finalizada", "duration_ms": 300.0}
+    _escrever(log, [
+        {**fim, "etapas_ms": {"buscar_vaga": 1.0, "llm": 100.0}},
+        {**fim, "etapas_ms": {"llm": 200.0}},
+        {**fim, "etapas_ms": {"recomendar": 5.0}},
+    ], 'w')
+    IngestorLogs(log, pasta).ingerir()
+
+    por_etapa = percentis_por_etapa(carregar_rollups(pasta)[2])
+    assert por_etapa['n'].to_dict() == {'buscar_vaga': 1, 'llm': 2, 'recomendar': 1}
+    assert por_etapa.loc['llm', 'media_ms'] == 150.0
+    assert por_etapa['p95_ms'].notna().all() and (por_etapa['p95_ms'] < float('inf')).all()
+    assert 100 <= por_etapa.loc['llm', 'p95_ms'] <= 250
@@ -0,0 +1,119 @@
+# tests/test_llm_resiliente.py
+
+import asyncio
+import time
+import pytest
+from unittest.mock import MagicMock
+
+from agent import AgenteScreener, MENSAGEM_LLM_INDISPONIVEL
+from llm_resiliente import LLMResiliente, LLMIndisponivel, Disjuntor
+from llama_index.core.llms import ChatMessage
+
+
+class LLMRoteirizado:
+    """LLM falso que segue um roteiro de (atraso, erro) por chamada."""
+    def __init__(self, roteiro):
+        self.roteiro = list(roteiro)
+        self.chamadas = 0
+
+    async def achat(self, mensagens):
+        atraso, erro = self.roteiro[min(self.chamadas, len(self.roteiro) - 1)]
+        self.chamadas += 1
+        await asyncio.sleep(atraso)
+        if erro is not None:
+            raise erro
+        resposta = MagicMock()
+        resposta.message = ChatMessage(role="assistant", content="ok")
+        return resposta
+
+
+def _mensagens():
+    return [ChatMessage(role="user", content="Olá")]
+
+
+def test_retentativa_apos_erro_transitorio():
+    llm = LLMResiliente(LLMRoteirizado([(0, ConnectionError("reset")), (0, None)]),
+                        max_tentativas=3, backoff_base_s=0.001, hedge=False)
+    resposta = asyncio.run(llm.achat(_mensagens()))
+    assert resposta.message.content == "ok"
+    assert llm.contadores['retentativas'] == 1 and llm.contadores['sucessos'] == 1
+
+
+def test_erro_nao_retentavel_e_prazo_estourado_viram_llm_indisponivel():
+    erro_auth = RuntimeError("unauthorized")
+    erro_auth.status_code = 401
+    llm = LLMResiliente(LLMRoteirizado([(0, erro_auth)]), max_tentativas=3, hedge=False)
+    with pytest.raises(LLMIndisponivel):
+        asyncio.run(llm.achat(_mensagens()))
+    assert llm.contadores['retentativas'] == 0
+
+    lento = LLMResiliente(LLMRoteirizado([(1.0, None)]), prazo_s=0.05, hedge=False)
+    with pytest.raises(LLMIndisponivel):
+        asyncio.run(lento.achat(_mensagens()))
+    assert lento.contadores['timeouts'] == 1
+
+
+def test_hedge_acima_do_p95_usa_a_resposta_mais_rapida():
+    # A primeira chamada fica presa; a cópia disparada depois do limiar responde logo
+    llm = LLMResiliente(LLMRoteirizado([(1.0, None), (0, None)]), prazo_s=2, hedge=True, amostras_minimas_hedge=3)
+    llm._latencias.extend([0.01, 0.01, 0.02])
+    resposta = asyncio.run(asyncio.wait_for(llm.achat(_mensagens()), 0.5))
+    assert resposta.message.content == "ok"
+    assert llm.contadores['hedges_disparados'] == 1 and llm.contadores['sucessos_hedge'] == 1
+
+
+def test_disjuntor_aberto_falha_rapido_com_resposta_amigavel():
+    llm = LLMResiliente(LLMRoteirizado([(0, ConnectionError("fora do ar"))]), max_tentativas=1, hedge=False,
+                        disjuntor=Disjuntor(limite_falhas=2, tempo_aberto_s=60))
+    agente = AgenteScreener({'titulo_vaga': 'Cientista de Dados'}, "Ana", llm)
+
+    for _ in range(3):
+        assert asyncio.run(agente.aconversar("Olá")) == MENSAGEM_LLM_INDISPONIVEL
+    # A terceira chamada nem chegou ao LLM, e a fala do usuário não ficou no histórico
+    assert llm.llm.chamadas == 2
+    assert llm.metricas()['estado_disjuntor'] == 'aberto'
+    assert llm.contadores['rejeitadas_disjuntor'] == 1
+    assert len(agente.conversation_history) == 1
+
+
+def test_hedge_respeita_o_prazo_total_da_chamada():
+    # As duas cópias ficam presas: o timeout sai em prazo_s, sem somar a espera pelo hedge
+    llm = LLMResiliente(LLMRoteirizado([(1.0, None)]), prazo_s=0.3, hedge=True, amostras_minimas_hedge=3)
+    llm._latencias.extend([0.1, 0.1, 0.1])
+    inicio = time.monotonic()
+    with pytest.raises(LLMIndisponivel):
+        asyncio.run(llm.achat(_mensagens()))
+    assert time.monotonic() - inicio <= 0.3 + 0.05
+    assert llm.contadores['hedges_disparados'] == 1 and llm.contadores['timeouts'] == 1
+
+
+def test_chamada_de_teste_cancelada_libera_o_disjuntor():
+    llm = LLMResiliente(LLMRoteirizado([(0, ConnectionError("fora do ar")), (1.0, None), (0, None)]),
+                        max_tentativas=1, hedge=False, disjuntor=Disjuntor(limite_falhas=1, tempo_aberto_s=0))
+
+    async def cenario():
+        with pytest.raises(LLMIndisponivel):
+            await llm.achat(_mensagens())
+        # Meio aberto: a chamada de teste é cancelada (cliente desconectou)
+        teste = asyncio.create_task(llm.achat(_mensagens()))
+        await asyncio.sleep(0.05)
+        teste.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await teste
+        return await llm.achat(_mensagens())
+
+    assert asyncio.run(cenario()).message.content == "ok"
+    assert llm.metricas()['estado_disjuntor'] == 'fechado' and llm.contadores['rejeitadas_disjuntor'] == 0
+
+
+def test_erro_do_pedido_nao_abre_o_disjuntor():
+    erro_pedido = RuntimeError("bad request")
+    erro_pedido.status_code = 400
+    llm = LLMResiliente(LLMRoteirizado([(0, erro_pedido)]), max_tentativas=1, hedge=False,
+                        disjuntor=Disjuntor(limite_falhas=2, tempo_aberto_s=60))
+    for _ in range(3):
+        with pytest.raises(LLMIndisponivel):
+            asyncio.run(llm.achat(_mensagens()))
+    # Todas as chamadas chegaram ao LLM: um pedido malformado não bloqueia os demais usuários
+    assert llm.llm.chamadas == 3 and llm.contadores['rejeitadas_disjuntor'] == 0
+    assert llm.metricas()['estado_disjuntor'] == 'fechado'
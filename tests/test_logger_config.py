@@ -0,0 +1,79 @@
+# tests/test_logger_config.py
+
+import json
+import logging
+import queue
+import time
+
+from logger_config import HandlerFilaNaoBloqueante, ArquivoRotativoEmLote, setup_logger, metricas_log
+
+
+def _registro(nivel, mensagem="m"):
+    return logging.LogRecord("teste", nivel, __file__, 1, mensagem, None, None)
+
+
+def test_fila_cheia_descarta_info_mas_nunca_erros(capsys):
+    fila = queue.Queue(maxsize=4)
+    handler = HandlerFilaNaoBloqueante(fila, amostragem=2, nivel_amostragem=0.5)
+    for _ in range(10):
+        handler.emit(_registro(logging.INFO))
+    # Acima de 50% da fila só metade dos INFO entra; com a fila cheia o resto é descartado
+    assert fila.qsize() == 4
+    assert handler.contadores['amostrados_fora'] > 0 and handler.contadores['descartados'] > 0
+
+    fila.get_nowait()
+    handler.emit(_registro(logging.ERROR, "falha grave"))
+    assert [r.levelno for r in list(fila.queue)].count(logging.ERROR) == 1
+    # Fila cheia: o erro não espera vaga (não trava o event loop), vai para o stderr e é contado
+    inicio = time.monotonic()
+    handler.emit(_registro(logging.ERROR, "outra falha"))
+    assert time.monotonic() - inicio < 0.1
+    assert handler.contadores['avisos_fora_da_fila'] == 1 and "outra falha" in capsys.readouterr().err
+
+
+def test_arquivo_rotaciona_por_tamanho(tmp_path):
+    caminho = str(tmp_path / 'app.log')
+    arquivo = ArquivoRotativoEmLote(caminho, max_bytes=100, backups=2)
+    for i in range(5):
+        arquivo.escrever(f"linha {i} " + "x" * 60 + "\n")
+    arquivo.fechar()
+    assert (tmp_path / 'app.log.1').exists() and (tmp_path / 'app.log.2').exists()
+    assert not (tmp_path / 'app.log.3').exists()
+    assert (tmp_path / 'app.log').read_text().startswith("linha 4")
+
+
+def test_logger_assincrono_grava_json_em_lote(tmp_path, capsys):
+    # O fixture 'logger_sem_arquivo' já esvaziou os handlers do logger da API; eles voltam ao final
+    caminho = str(tmp_path / 'app.log')
+    logger = setup_logger(caminho, assincrono=True)
+    try:
+        logger.info("Requisição recebida", extra={"session_id": "s1"})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.error("Erro inesperado", exc_info=True)
+        assert metricas_log(logger)['enfileirados'] == 2
+    finally:
+        logger.handlers[0].escritor.parar()
+        logger.handlers.clear()
+
+    registros = [json.loads(linha) for linha in open(caminho, encoding='utf-8')]
+    assert registros[0]['message'] == "Requisição recebida" and registros[0]['session_id'] == "s1"
+    assert registros[1]['levelname'] == "ERROR" and "ValueError: boom" in registros[1]['exc_info']
+
+
+def test_dois_processos_no_mesmo_arquivo_rotacionam_uma_vez(tmp_path):
+    # Dois workers com o mesmo arquivo: cada rotação acontece uma vez e nenhum lote vai para a cópia antiga
+    caminho = str(tmp_path / 'app.log')
+    workers = [ArquivoRotativoEmLote(caminho, max_bytes=300, backups=50) for _ in range(2)]
+    for i in range(40):
+        workers[i % 2].escrever(f"linha {i:02d} " + "x" * 60 + "\n")
+    for arquivo in workers:
+        arquivo.fechar()
+
+    copias = sorted(tmp_path.glob('app.log.[0-9]*'), key=lambda p: -int(p.suffix[1:]))
+    arquivos = copias + [tmp_path / 'app.log']
+    assert all(p.stat().st_size <= 300 for p in arquivos)
+    # Da cópia mais antiga até o arquivo atual: todas as linhas, em ordem e sem repetição
+    linhas = [linha.split()[1] for p in arquivos for linha in p.read_text().splitlines()]
+    assert linhas == [f"{i:02d}" for i in range(40)]
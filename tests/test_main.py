@@ -0,0 +1,96 @@
+# tests/test_main.py
+
+import asyncio
+import json
+import threading
+from unittest.mock import MagicMock
+
+import httpx
+
+import main
+from agent import BaseDeDados
+from main import PredictRequest, predict, predict_stream
+
+
+def test_predict_fluxo_completo(estado_api):
+    async def cenario():
+        r1 = await predict(PredictRequest(session_id="s1", user_input="vaga de Cientista de Dados"))
+        assert "Cientista de Dados" in r1.agent_reply
+        r2 = await predict(PredictRequest(session_id="s1", user_input="Fulano Novo"))
+        assert r2.agent_reply.startswith("resposta para: Por favor, inicie a entrevista de triagem")
+        r3 = await predict(PredictRequest(session_id="s1", user_input="Sei Python"))
+        assert r3.agent_reply == "resposta para: Sei Python"
+    asyncio.run(cenario())
+    assert len(estado_api['sessions'].get('s1')['agent'].conversation_history) == 5
+
+
+def test_predict_serializa_mesma_sessao_e_paraleliza_sessoes(estado_api):
+    async def cenario():
+        for sid in ("a", "b"):
+            await predict(PredictRequest(session_id=sid, user_input="Cientista de Dados"))
+            await predict(PredictRequest(session_id=sid, user_input="Fulano"))
+        estado_api['llm'].eventos.clear()
+        estado_api['llm'].pico = 0
+        await asyncio.gather(
+            predict(PredictRequest(session_id="a", user_input="a1")),
+            predict(PredictRequest(session_id="a", user_input="a2")),
+            predict(PredictRequest(session_id="b", user_input="b1")),
+        )
+    asyncio.run(cenario())
+
+    eventos_a = [e for e in estado_api['llm'].eventos if e[1].startswith('a')]
+    assert eventos_a == [('inicio', 'a1'), ('fim', 'a1'), ('inicio', 'a2'), ('fim', 'a2')]
+    # Sessões diferentes chamam o LLM ao mesmo tempo
+    assert estado_api['llm'].pico == 2
+
+
+def test_predict_stream_envia_tokens_e_atualiza_historico(estado_api):
+    async def ler_eventos(texto):
+        resposta = await predict_stream(PredictRequest(session_id="s2", user_input=texto))
+        corpo = "".join([pedaco async for pedaco in resposta.body_iterator])
+        return [json.loads(linha[len("data: "):]) for linha in corpo.split("\n\n") if linha]
+
+    async def cenario():
+        eventos_vaga = await ler_eventos("Cientista de Dados")
+        assert eventos_vaga[0]['tipo'] == 'token' and "Cientista de Dados" in eventos_vaga[0]['conteudo']
+        assert eventos_vaga[-1]['tipo'] == 'fim'
+        return await ler_eventos("Fulano Novo")
+
+    eventos = asyncio.run(cenario())
+    assert [e['conteudo'] for e in eventos if e['tipo'] == 'token'] == ["Olá", ", ", "sou ", "Alex"]
+    assert eventos[-1]['tipo'] == 'fim'
+    sessao = estado_api['sessions'].get('s2')
+    assert sessao['state'] == "IN_CONVERSATION"
+    assert sessao['agent'].conversation_history[-1].content == "Olá, sou Alex"
+
+
+def test_api_abre_a_porta_antes_de_carregar_a_base(arquivos_parquet, monkeypatch):
+    liberar_carga = threading.Event()
+
+    def carregar_base_lenta():
+        liberar_carga.wait(5)
+        return BaseDeDados(**arquivos_parquet)
+
+    monkeypatch.setenv('GROQ_API_KEY', 'teste')
+    monkeypatch.setattr(main, 'executar_pipeline_completo', lambda: None)
+    monkeypatch.setattr(main, 'carregar_base', carregar_base_lenta)
+    monkeypatch.setattr(main, 'criar_cliente_llm', lambda api_key: MagicMock())
+    monkeypatch.setattr(main, 'state', {})
+
+    async def cenario():
+        async with main.lifespan(main.app):
+            transporte = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transporte, base_url='http://api') as cliente:
+                assert (await cliente.get('/healthz')).status_code == 200
+                assert (await cliente.get('/readyz')).status_code == 503
+                resposta = await cliente.post('/predict', json={"session_id": "s", "user_input": "Cientista de Dados"})
+                assert resposta.status_code == 503 and resposta.headers['Retry-After']
+
+                liberar_carga.set()
+                await main.state['tarefa_inicializacao']
+                pronta = await cliente.get('/readyz')
+                assert pronta.status_code == 200 and pronta.json()['tempo_ate_pronta_s'] > 0
+                resposta = await cliente.post('/predict', json={"session_id": "s", "user_input": "Cientista de Dados"})
+                assert resposta.status_code == 200 and "Cientista de Dados" in resposta.json()['agent_reply']
+
+    asyncio.run(cenario())
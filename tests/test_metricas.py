@@ -0,0 +1,43 @@
+# tests/test_metricas.py
+
+import asyncio
+
+from metricas import RegistroMetricas, iniciar_coleta, medir_etapa, latencia_etapas
+from main import PredictRequest, predict, metrics
+
+
+def test_histograma_exporta_baldes_cumulativos_e_coletores_como_gauges():
+    registro = RegistroMetricas()
+    histograma = registro.histograma('teste_segundos', "Teste.", (0.1, 1.0))
+    for valor in (0.05, 0.5, 0.7, 3.0):
+        histograma.observar(valor, etapa='x')
+    registro.registrar_coletor('teste_cache', lambda: {'hits': 3, 'estado': 'aberto', 'p95_ms': None})
+    registro.registrar_coletor('teste_quebrado', lambda: 1 / 0)
+
+    linhas = registro.texto_prometheus().splitlines()
+    assert 'teste_segundos_bucket{etapa="x",le="0.1"} 1' in linhas
+    assert 'teste_segundos_bucket{etapa="x",le="1.0"} 3' in linhas
+    assert 'teste_segundos_bucket{etapa="x",le="+Inf"} 4' in linhas
+    assert 'teste_segundos_count{etapa="x"} 4' in linhas
+    assert 'teste_cache_hits 3' in linhas
+    assert not any(l.startswith(('teste_cache_estado', 'teste_cache_p95_ms', 'teste_quebrado')) for l in linhas)
+
+
+def test_medir_etapa_acumula_na_coleta_da_requisicao():
+    etapas = iniciar_coleta()
+    antes = latencia_etapas.series().get((('etapa', 'teste'),), [0, 0])[-1]
+    for _ in range(2):
+        with medir_etapa('teste'):
+            pass
+    assert list(etapas) == ['teste'] and etapas['teste'] >= 0
+    assert latencia_etapas.series()[(('etapa', 'teste'),)][-1] == antes + 2
+
+
+def test_metrics_expoe_etapas_da_api(estado_api):
+    async def cenario():
+        await predict(PredictRequest(session_id="m1", user_input="vaga de Cientista de Dados"))
+        await predict(PredictRequest(session_id="m1", user_input="Fulano Novo"))
+        return (await metrics()).body.decode()
+    texto = asyncio.run(cenario())
+    for etapa in ('buscar_vaga', 'buscar_candidato', 'construir_agente', 'llm'):
+        assert f'recruta_etapa_duracao_segundos_bucket{{etapa="{etapa}",le="+Inf"}}' in texto
@@ -0,0 +1,52 @@
+# tests/test_preprocess.py
+
+import os
+import pytest
+
+from preprocess import executar_pipeline_completo, ARQUIVOS_ESPERADOS
+
+
+@pytest.fixture
+def fonte_local(arquivos_parquet):
+    return os.path.dirname(arquivos_parquet['vagas_path'])
+
+
+def test_pipeline_usa_cache_quando_atual(fonte_local, tmp_path):
+    saida = str(tmp_path / 'saida')
+    primeiro = executar_pipeline_completo(fonte=fonte_local, pasta_saida=saida)
+    assert sorted(primeiro['arquivos']) == sorted(ARQUIVOS_ESPERADOS)
+
+    segundo = executar_pipeline_completo(fonte=fonte_local, pasta_saida=saida)
+    assert segundo['criado_em'] == primeiro['criado_em']  # nada foi baixado de novo
+
+    # Mudança na fonte invalida o cache
+    with open(os.path.join(fonte_local, 'vagas.parquet'), 'ab') as f:
+        f.write(b'\0')
+    terceiro = executar_pipeline_completo(fonte=fonte_local, pasta_saida=saida)
+    assert terceiro['arquivos']['vagas.parquet']['sha256'] != primeiro['arquivos']['vagas.parquet']['sha256']
+    assert not [p for p in os.listdir(tmp_path) if p.startswith('.download-') or '.antigo-' in p]
+
+
+def test_pipeline_offline_e_falha_de_download(fonte_local, tmp_path):
+    saida = str(tmp_path / 'saida')
+    with pytest.raises(RuntimeError):
+        executar_pipeline_completo(fonte=fonte_local, pasta_saida=saida, offline=True)
+
+    manifesto = executar_pipeline_completo(fonte=fonte_local, pasta_saida=saida)
+    assert executar_pipeline_completo(fonte=fonte_local, pasta_saida=saida, offline=True) == manifesto
+
+    # Arquivo corrompido no cache é detectado pelo hash
+    with open(os.path.join(saida, 'applicants.parquet'), 'r+b') as f:
+        f.write(b'X')
+    with pytest.raises(RuntimeError):
+        executar_pipeline_completo(fonte=fonte_local, pasta_saida=saida, offline=True)
+
+    class FonteQuebrada:
+        remota = True
+        def descricao(self): return 'quebrada'
+        def assinatura(self): return None
+        def baixar(self, destino): raise ConnectionError("sem rede")
+
+    executar_pipeline_completo(fonte=fonte_local, pasta_saida=saida, forcar=True)
+    # Sem rede, mas com cache íntegro: a aplicação sobe com o cache
+    assert executar_pipeline_completo(fonte=FonteQuebrada(), pasta_saida=saida)['fonte'].startswith('file://')
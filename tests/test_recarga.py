@@ -0,0 +1,64 @@
+# tests/test_recarga.py
+
+import asyncio
+import pytest
+import pandas as pd
+from fastapi import HTTPException
+
+import main
+from agent import BaseDeDados
+from recarga import RecarregadorBase
+
+
+def test_recarga_troca_base_e_mantem_a_atual_se_invalida(arquivos_parquet):
+    bases = {'atual': BaseDeDados(**arquivos_parquet)}
+    antiga = bases['atual']
+    recarregador = RecarregadorBase(fabrica=lambda: BaseDeDados(**arquivos_parquet),
+                                    ao_trocar=lambda nova: bases.update(atual=nova))
+
+    resumo = asyncio.run(recarregador.recarregar(motivo="teste"))
+    assert bases['atual'] is not antiga
+    assert resumo['versao_dataset'] == antiga.versao
+    assert {'duracao_ms', 'rss_pico_mb', 'rss_depois_mb'} <= set(resumo)
+
+    def base_invalida():
+        db = BaseDeDados(**arquivos_parquet)
+        db.df_vagas = db.df_vagas.iloc[0:0]
+        return db
+    recarregador.fabrica = base_invalida
+    atual = bases['atual']
+    with pytest.raises(ValueError):
+        asyncio.run(recarregador.recarregar())
+    assert bases['atual'] is atual
+
+
+def test_endpoint_recarga_exige_token_e_preserva_sessao(estado_api, arquivos_parquet, monkeypatch):
+    monkeypatch.setattr(main, 'carregar_base', lambda: BaseDeDados(**arquivos_parquet))
+    estado_api['recarregador'] = RecarregadorBase(fabrica=lambda: main.carregar_base(), ao_trocar=main.trocar_base)
+    monkeypatch.setenv('ADMIN_TOKEN', 'segredo')
+
+    async def cenario():
+        await main.predict(main.PredictRequest(session_id="s1", user_input="Cientista de Dados"))
+        with pytest.raises(HTTPException) as erro:
+            await main.recarregar_base(x_admin_token="errado")
+        assert erro.value.status_code == 403
+        with pytest.raises(HTTPException) as erro:
+            await main.recarregar_base(x_admin_token="segrêdo")
+        assert erro.value.status_code == 403
+
+        # A nova versão dos dados renomeia a vaga; a sessão já iniciada mantém o retrato antigo
+        vagas = pd.read_parquet(arquivos_parquet['vagas_path'])
+        vagas.loc[vagas['id_vaga'] == 'v02', 'titulo_vaga'] = 'Cientista de Dados Sênior'
+        vagas.to_parquet(arquivos_parquet['vagas_path'])
+        antiga = estado_api['db']
+        resumo = await main.recarregar_base(x_admin_token="segredo")
+        assert estado_api['db'] is not antiga
+        assert resumo['versao_dataset'] == estado_api['db'].versao != antiga.versao
+
+        resposta = await main.predict(main.PredictRequest(session_id="s1", user_input="Fulano Novo"))
+        assert resposta.agent_reply.startswith("resposta para:")
+
+    asyncio.run(cenario())
+    sessao = estado_api['sessions'].get('s1')
+    assert sessao['vaga_info']['titulo_vaga'] == 'Cientista de Dados'
+    assert "Cientista de Dados" in sessao['agent'].conversation_history[0].content
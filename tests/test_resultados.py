@@ -0,0 +1,81 @@
+# tests/test_resultados.py
+
+import asyncio
+import os
+
+from resultados import ArmazemResultados, extrair_resumo_json, validar_resumo
+from main import PredictRequest, predict, listar_resultados
+
+
+def test_extrai_o_ultimo_resumo_json_da_resposta():
+    assert extrair_resumo_json("Obrigado pela conversa!") is None
+    texto = 'Obrigado! Segue o resumo:\n```json\n{"nome": "Ana", "nota": 8}\n```'
+    assert extrair_resumo_json(texto) == {"nome": "Ana", "nota": 8}
+    # Sem bloco cercado: vale o último objeto decodificável, ignorando chaves soltas no texto
+    texto = 'Use {chaves} à vontade. {"a": 1} e por fim {"resumo": {"fit": "alto"}}'
+    assert extrair_resumo_json(texto) == {"resumo": {"fit": "alto"}}
+    assert validar_resumo({}) is None and validar_resumo([1]) is None
+    assert validar_resumo({"b": 1, "a": "é"}) == '{"a":"é","b":1}'
+    assert validar_resumo({"texto": "x" * 40_000}) is None
+
+
+def test_grava_em_lote_particionado_e_consulta(tmp_path):
+    armazem = ArmazemResultados(str(tmp_path), tamanho_lote=100, intervalo_s=60)
+    for i, id_vaga in enumerate(['v01', 'v01', 'v02']):
+        sessao = {'vaga_info': {'id_vaga': id_vaga, 'titulo_vaga': 'Vaga'}, 'id_candidato': f'c{i}'}
+        assert armazem.registrar_turno(f's{i}', sessao, f'{{"nota": {i}}}')
+    assert not armazem.registrar_turno('s9', {'vaga_info': {}}, 'sem resumo')
+    # Nada vai ao disco até o lote ser descarregado, mas a consulta já enxerga os pendentes
+    assert not os.listdir(tmp_path)
+    assert armazem.consultar(id_vaga='v01')['session_id'].tolist() == ['s1', 's0']
+
+    assert armazem.descarregar() == 3
+    pastas = {os.path.basename(p) for p, _, arquivos in os.walk(tmp_path) if arquivos}
+    assert pastas == {'id_vaga=v01', 'id_vaga=v02'}
+    # Um novo resumo da mesma sessão substitui o anterior na consulta
+    armazem.registrar_turno('s2', {'vaga_info': {'id_vaga': 'v02'}, 'id_candidato': 'c2'}, '{"nota": 10}')
+    por_candidato = armazem.consultar(id_candidato='c2')
+    assert len(por_candidato) == 1 and por_candidato['resumo_json'].iloc[0] == '{"nota":10}'
+    assert len(armazem.consultar()) == 3 and len(armazem.consultar(limite=1)) == 1
+    armazem.parar()
+    assert armazem.metricas()['gravados'] == 4 and armazem.metricas()['pendentes'] == 0
+
+
+def test_predict_registra_o_resumo_da_entrevista(estado_api):
+    async def cenario():
+        await predict(PredictRequest(session_id="e1", user_input="Cientista de Dados"))
+        await predict(PredictRequest(session_id="e1", user_input="Carlos Pereira"))
+        # O LLM falso ecoa a mensagem: a resposta traz o JSON como o resumo final do agente
+        await predict(PredictRequest(session_id="e1", user_input='{"fit_cultural": "alto"}'))
+        return await listar_resultados(id_vaga='v02', id_candidato=None, session_id=None, limite=10)
+
+    resposta = asyncio.run(cenario())
+    assert resposta['total'] == 1
+    resultado = resposta['resultados'][0]
+    assert resultado['resumo'] == {"fit_cultural": "alto"}
+    assert resultado['id_candidato'] == 'c003' and resultado['tipo_agente'] == 'AgenteEntrevistador'
+
+
+def test_falha_de_gravacao_volta_o_lote_ao_buffer_e_vai_para_o_log(tmp_path, monkeypatch):
+    armazem = ArmazemResultados(str(tmp_path / 'resultados'), tamanho_lote=100, intervalo_s=60)
+    armazem.registrar_turno('s1', {'vaga_info': {'id_vaga': 'v01'}}, '{"nota": 7}')
+    avisos = []
+    monkeypatch.setattr('resultados.logger.warning', lambda mensagem, extra: avisos.append(extra))
+
+    def disco_cheio(lote):
+        raise OSError("disco cheio")
+    monkeypatch.setattr(armazem, '_gravar_lote', disco_cheio)
+
+    assert armazem.descarregar() == 0
+    assert avisos == [{"registros": 1, "pasta": armazem.pasta, "detalhe_erro": "disco cheio"}]
+    assert armazem.metricas()['falhas_gravacao'] == 1 and armazem.metricas()['pendentes'] == 1
+
+
+def test_id_de_candidato_numerico_e_gravado_como_texto(tmp_path):
+    armazem = ArmazemResultados(str(tmp_path), tamanho_lote=100, intervalo_s=60)
+    armazem.registrar_turno('s1', {'vaga_info': {'id_vaga': 7}, 'id_candidato': 42}, '{"nota": 1}')
+    armazem.registrar_turno('s2', {'vaga_info': {'id_vaga': 'v01'}, 'id_candidato': 'c2'}, '{"nota": 2}')
+    armazem.registrar_turno('s3', {'vaga_info': {'id_vaga': 'v01'}}, '{"nota": 3}')
+    assert armazem.descarregar() == 3
+    assert armazem.consultar(id_candidato=42)['session_id'].tolist() == ['s1']
+    assert armazem.consultar(id_vaga=7)['id_candidato'].tolist() == ['42']
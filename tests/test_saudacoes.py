@@ -0,0 +1,99 @@
+# tests/test_saudacoes.py
+
+import asyncio
+import json
+from unittest.mock import MagicMock
+
+from agent import AgenteScreener, AgenteEntrevistador, MARCADOR_NOME, MARCADOR_PRIMEIRO_NOME, MENSAGEM_LLM_INDISPONIVEL
+from llm_resiliente import LLMIndisponivel
+from main import PredictRequest, predict, predict_stream, preaquecer_saudacoes
+from saudacoes import CacheSaudacoes, vagas_mais_buscadas
+
+
+def test_cache_respeita_validade_e_tamanho(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr('saudacoes.time.monotonic', lambda: agora[0])
+    cache = CacheSaudacoes(max_entradas=2, ttl_s=60)
+    cache.guardar('a', 'olá a')
+    cache.guardar('b', 'olá b')
+    assert cache.obter('a') == 'olá a'
+    cache.guardar('c', 'olá c')  # 'b' é o menos usado recentemente
+    assert cache.obter('b') is None and cache.obter(None) is None
+    agora[0] += 61
+    assert cache.obter('a') is None and 'c' not in cache
+    metricas = cache.metricas()
+    assert metricas['despejos'] == 1 and metricas['expiradas'] == 1 and metricas['hits'] == 1
+    assert CacheSaudacoes(max_entradas=0).obter('a') is None
+
+
+def test_modelo_de_abertura_troca_o_nome_por_marcadores():
+    vaga = {'id_vaga': 'v02', 'titulo_vaga': 'Cientista de Dados'}
+    ana = AgenteScreener(vaga, "Ana Lima", MagicMock())
+    bruno = AgenteScreener(vaga, "Bruno Costa", MagicMock())
+    # A chave não depende do candidato, só da classe, da vaga e do prompt
+    assert ana.chave_abertura == bruno.chave_abertura
+    assert ana.chave_abertura != AgenteScreener({'id_vaga': 'v01', 'titulo_vaga': 'X'}, "Ana", MagicMock()).chave_abertura
+
+    modelo = ana.modelo_de_abertura("Olá, Ana Lima! Sou Alex. Ana, vamos começar pela vaga de Analista?")
+    assert modelo == f"Olá, {MARCADOR_NOME}! Sou Alex. {MARCADOR_PRIMEIRO_NOME}, vamos começar pela vaga de Analista?"
+    assert bruno.preencher_abertura(modelo) == "Olá, Bruno Costa! Sou Alex. Bruno, vamos começar pela vaga de Analista?"
+    # Sobrenome solto (ou nome com outra grafia) não é reaproveitável
+    assert ana.modelo_de_abertura("Olá, Sra. LIMÃ!") is None
+
+    dossie = {'id_vaga': 'v01', 'titulo_vaga': 'Engenheiro', 'nome': 'Maria Souza', 'conhecimentos_tecnicos': 'Python, Docker'}
+    entrevistador = AgenteEntrevistador(dossie, MagicMock())
+    assert entrevistador.modelo_de_abertura("Olá Maria, vi que você conhece docker.") is None
+    assert entrevistador.modelo_de_abertura("Olá Maria Souza, tudo bem?") == f"Olá {MARCADOR_NOME}, tudo bem?"
+
+
+def test_segunda_sessao_da_vaga_comeca_sem_chamar_o_llm(estado_api):
+    llm = estado_api['llm']
+
+    async def abrir(session_id, nome):
+        await predict(PredictRequest(session_id=session_id, user_input="Cientista de Dados"))
+        return (await predict(PredictRequest(session_id=session_id, user_input=nome))).agent_reply
+
+    primeira = asyncio.run(abrir("s1", "Ana Lima"))
+    segunda = asyncio.run(abrir("s2", "Bruno Costa"))
+    assert primeira == segunda == "resposta para: Por favor, inicie a entrevista de triagem se apresentando."
+    assert len([e for e in llm.eventos if e[0] == 'inicio']) == 1
+    assert estado_api['saudacoes'].metricas()['hits'] == 1
+
+    # O histórico recebe a saudação como se tivesse sido gerada
+    historico = estado_api['sessions'].get("s2")['agent'].exportar_historico()
+    assert [m['role'] for m in historico] == ['system', 'user', 'assistant']
+    assert historico[1:] == estado_api['sessions'].get("s1")['agent'].exportar_historico()[1:]
+
+
+def test_abertura_em_streaming_com_llm_fora_do_ar_nao_vira_saudacao(estado_api, monkeypatch):
+    async def fora_do_ar(mensagens):
+        raise LLMIndisponivel("Disjuntor do LLM aberto.")
+    monkeypatch.setattr(estado_api['llm'], 'astream_chat', fora_do_ar)
+
+    async def cenario():
+        await predict(PredictRequest(session_id="s1", user_input="Cientista de Dados"))
+        resposta = await predict_stream(PredictRequest(session_id="s1", user_input="Ana Lima"))
+        corpo = "".join([pedaco async for pedaco in resposta.body_iterator])
+        return [json.loads(linha[len("data: "):]) for linha in corpo.split("\n\n") if linha]
+
+    eventos = asyncio.run(cenario())
+    assert [e['conteudo'] for e in eventos if e['tipo'] == 'token'] == [MENSAGEM_LLM_INDISPONIVEL]
+    # O histórico termina no prompt de sistema: nada vai para o cache nem para os resultados
+    assert estado_api['sessions'].get("s1")['agent'].conversation_history[-1].role == 'system'
+    assert estado_api['saudacoes'].metricas()['guardadas'] == 0
+    assert estado_api['resultados'].metricas()['registrados'] == 0
+
+
+def test_preaquecimento_usa_as_vagas_mais_buscadas(estado_api, tmp_path, monkeypatch):
+    log = tmp_path / 'app_logs.log'
+    linhas = [{'message': 'Vaga Identificada', 'id_vaga': v} for v in ['v01', 'v02', 'v02', 'v04']]
+    linhas.append({'message': 'Requisição finalizada', 'duration_ms': 1.0})
+    log.write_text(''.join(json.dumps(l) + '\n' for l in linhas))
+    assert vagas_mais_buscadas(str(log), n=1) == ['v02']
+
+    monkeypatch.setattr('main.vagas_mais_buscadas', lambda n: vagas_mais_buscadas(str(log), n=n))
+    asyncio.run(preaquecer_saudacoes(2))
+    # Triagem e entrevista aprofundada das duas vagas mais buscadas
+    assert estado_api['saudacoes'].metricas()['entradas'] == 4
+    chave = AgenteScreener({'id_vaga': 'v02', 'titulo_vaga': 'Cientista de Dados'}, "Ana", MagicMock()).chave_abertura
+    assert chave in estado_api['saudacoes']
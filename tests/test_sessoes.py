@@ -0,0 +1,87 @@
+# tests/test_sessoes.py
+
+import pandas as pd
+from unittest.mock import MagicMock
+
+from agent import AgenteScreener, AgenteEntrevistador
+from sessoes import (ArmazemSessoesMemoria, ArmazemSessoesSQLite, GerenciadorSessoes,
+                     serializar_sessao, desserializar_sessao)
+
+
+def test_serializacao_recria_agente_com_historico():
+    """A sessão vira JSON compacto (sem objetos pandas) e volta com o agente e o histórico."""
+    agente = AgenteScreener(vaga_info={'titulo_vaga': 'Cientista de Dados'}, nome_candidato="Ana", llm_instance=MagicMock())
+    sessao = {"state": "IN_CONVERSATION", "vaga_info": {'id_vaga': pd.Series([7]).iloc[0], 'titulo_vaga': 'Cientista de Dados'}, "agent": agente}
+
+    dados = serializar_sessao(sessao)
+    restaurada = desserializar_sessao(dados, llm_instance="llm")
+
+    assert restaurada['vaga_info'] == {'id_vaga': 7, 'titulo_vaga': 'Cientista de Dados'}
+    assert isinstance(restaurada['agent'], AgenteScreener)
+    assert restaurada['agent'].llm == "llm"
+    assert restaurada['agent'].exportar_historico() == agente.exportar_historico()
+
+
+def test_serializacao_preserva_tokens_por_turno_e_dados_da_saudacao():
+    """O estado fora do histórico sobrevive à ida e volta pelo armazém, requisição após requisição."""
+    dossie = {'id_vaga': 'v01', 'titulo_vaga': 'Engenheiro', 'nome': 'Maria Souza', 'conhecimentos_tecnicos': 'Python, Docker'}
+    agente = AgenteEntrevistador(dossie, llm_instance=MagicMock())
+    agente.tokens_prompt_por_turno = [120, 180]
+
+    restaurado = desserializar_sessao(serializar_sessao({"agent": agente}), llm_instance="llm")['agent']
+    assert restaurado.tokens_prompt_por_turno == [120, 180]
+    assert restaurado.chave_abertura == agente.chave_abertura
+    assert restaurado.nome_candidato == 'Maria Souza' and restaurado.termos_privados == ('Python', 'Docker')
+    assert restaurado.modelo_de_abertura("Olá Maria, vi que você usa Docker.") is None
+
+
+def test_armazem_memoria_despeja_por_lru_e_ttl(monkeypatch):
+    relogio = [1000.0]
+    monkeypatch.setattr('sessoes.time.time', lambda: relogio[0])
+    armazem = ArmazemSessoesMemoria(max_sessoes=2, ttl_segundos=60)
+
+    armazem.gravar('a', b'1')
+    armazem.gravar('b', b'22')
+    assert armazem.carregar('a') == b'1'  # 'a' passa a ser a mais recente
+    armazem.gravar('c', b'333')           # excede o limite: despeja 'b'
+    assert armazem.carregar('b') is None
+    assert armazem.tamanho() == (2, 4)
+
+    relogio[0] += 61
+    assert armazem.carregar('a') is None
+    metricas = armazem.metricas()
+    assert metricas['despejadas_lru'] == 1 and metricas['expiradas'] == 1
+    assert metricas['hits'] == 1 and metricas['misses'] == 2
+
+
+def test_armazem_sqlite_compartilhado_entre_processos(tmp_path):
+    """Duas instâncias no mesmo arquivo simulam dois workers: um grava, o outro retoma a sessão."""
+    caminho = str(tmp_path / 'sessoes.sqlite3')
+    worker_1 = GerenciadorSessoes(ArmazemSessoesSQLite(caminho, max_sessoes=10), llm_instance=None)
+    worker_2 = GerenciadorSessoes(ArmazemSessoesSQLite(caminho, max_sessoes=10), llm_instance=None)
+
+    worker_1.salvar('s1', {"state": "AWAITING_CANDIDATE_NAME", "vaga_info": {'id_vaga': 'v01', 'titulo_vaga': 'Analista'}})
+    assert worker_2.get('s1')['vaga_info']['id_vaga'] == 'v01'
+
+    for i in range(12):
+        worker_2.salvar(f"x{i}", {"state": "AWAITING_CANDIDATE_NAME"})
+    metricas = worker_2.metricas()
+    assert metricas['sessoes'] == 10
+    assert metricas['despejadas_lru'] == 3
+    assert worker_1.get('s1') is None
+
+
+def test_totais_do_sqlite_acompanham_gravacoes_de_todos_os_workers(tmp_path):
+    """Os totais usados no despejo são mantidos por triggers, sem COUNT/SUM sobre a tabela a cada gravação."""
+    caminho = str(tmp_path / 'sessoes.sqlite3')
+    worker_1 = ArmazemSessoesSQLite(caminho, max_sessoes=100)
+    worker_1.gravar('a', b'1234')
+    # Um worker que sobe depois encontra os totais já existentes
+    worker_2 = ArmazemSessoesSQLite(caminho, max_sessoes=100)
+    worker_2.gravar('a', b'12')      # atualização: só os bytes mudam
+    worker_2.gravar('b', b'xyz')
+    worker_1.remover('b')
+    worker_1.gravar('c', b'c' * 10)
+
+    esperado = worker_1._conexao.execute("SELECT COUNT(*), SUM(length(dados)) FROM sessoes").fetchone()
+    assert worker_1.tamanho() == worker_2.tamanho() == tuple(esperado) == (2, 12)